@@ -0,0 +1,184 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import orjson
+
+from analytics.prediction_store import Prediction, PredictionStore
+from api_response_models.nationalize_api_models import NationalizeResponse
+
+# Nationalize returns up to five countries per name
+MAX_ENTROPY_BITS = float(np.log2(5))
+
+
+class CountryAggregator:
+    """
+    Streaming aggregates of Nationalize predictions.
+
+    Predictions are added as they arrive and never kept. Per country, the
+    aggregator keeps the weighted sum of probabilities, which is the expected
+    nationality mix of the names, and the weight of the names it is the top
+    country of. Per name, the top probability (confidence) and the Shannon
+    entropy of the renormalized country distribution go into fixed-bin
+    histograms. Memory depends on the number of countries and bins only.
+
+    A name's weight defaults to 1, so the totals count names; pass weights to
+    count e.g. people per name instead. merge() adds the snapshot() of another
+    aggregator, so parallel workers can aggregate their own share.
+    """
+
+    def __init__(self, bins: int = 10):
+        # i / bins is exact for round probabilities such as 0.6, unlike linspace
+        self.confidence_edges = np.arange(bins + 1) / bins
+        self.entropy_edges = self.confidence_edges * MAX_ENTROPY_BITS
+        self.country_codes: List[str] = []
+        self._country_ids_by_code: Dict[str, int] = {}
+        self._totals = np.zeros(0)
+        self._top_totals = np.zeros(0)
+        self._confidence_counts = np.zeros(bins)
+        self._entropy_counts = np.zeros(bins)
+        self.names = 0
+        self.weight = 0.0
+        self.unknown_weight = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, prediction: Prediction, weight: float = 1.0) -> None:
+        self.extend([prediction], weights=[weight])
+
+    def extend(self, predictions: Iterable[Prediction], weights: Optional[Sequence[float]] = None) -> None:
+        """
+        Adds NationalizeResponse models or their dicts.
+        """
+        sizes, codes, probabilities = [], [], []
+        for prediction in predictions:
+            if isinstance(prediction, NationalizeResponse):
+                countries = [(c.country_id, c.probability) for c in prediction.country]
+            else:
+                countries = [(c["country_id"], c["probability"]) for c in prediction["country"]]
+            sizes.append(len(countries))
+            for code, probability in countries:
+                codes.append(code)
+                probabilities.append(probability)
+        with self._lock:
+            ids = [self._intern(code) for code in codes]
+            self._add(np.array(sizes, dtype=np.int64), ids, probabilities, weights)
+
+    def extend_json(self, raw: Union[bytes, str], weights: Optional[Sequence[float]] = None) -> None:
+        """
+        Adds the predictions of a raw name or name[] response body without building models.
+        """
+        data = orjson.loads(raw)
+        self.extend(data if isinstance(data, list) else [data], weights=weights)
+
+    def extend_store(self, store: PredictionStore, weights: Optional[Sequence[float]] = None) -> None:
+        """
+        Adds every row of a PredictionStore, straight from its columns.
+        """
+        with self._lock:
+            ids = np.array([self._intern(code) for code in store.country_codes], dtype=np.int64)
+            self._add(np.diff(store.country_offsets), ids[store.country_ids], store.probabilities, weights)
+
+    def merge(self, snapshot: dict) -> None:
+        """
+        Adds the snapshot of another aggregator, e.g. of a worker process.
+        """
+        if snapshot["confidence_histogram"]["edges"] != self.confidence_edges.tolist():
+            raise ValueError("aggregators with different bins can not be merged")
+        with self._lock:
+            for code in [*snapshot["totals"], *snapshot["top_totals"]]:
+                self._intern(code)
+            for code, total in snapshot["totals"].items():
+                self._totals[self._country_ids_by_code[code]] += total
+            for code, total in snapshot["top_totals"].items():
+                self._top_totals[self._country_ids_by_code[code]] += total
+            self._confidence_counts += snapshot["confidence_histogram"]["counts"]
+            self._entropy_counts += snapshot["entropy_histogram"]["counts"]
+            self.names += snapshot["names"]
+            self.weight += snapshot["weight"]
+            self.unknown_weight += snapshot["unknown_weight"]
+
+    def mix(self) -> Dict[str, float]:
+        """
+        Returns the expected share of every country in the names, largest first.
+        The shares add up to less than one by the probability the API leaves unassigned.
+        """
+        with self._lock:
+            return self._ranked(self._totals / self.weight if self.weight else self._totals)
+
+    def top_countries(self, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Returns the k countries with the largest expected share.
+        """
+        return list(self.mix().items())[:k]
+
+    def snapshot(self) -> dict:
+        """
+        Returns the aggregates as a json serializable dict, see merge().
+        """
+        with self._lock:
+            return {
+                "names": self.names,
+                "weight": self.weight,
+                "unknown_weight": self.unknown_weight,
+                "totals": self._ranked(self._totals),
+                "top_totals": self._ranked(self._top_totals),
+                "confidence_histogram": {
+                    "edges": self.confidence_edges.tolist(),
+                    "counts": self._confidence_counts.tolist(),
+                },
+                "entropy_histogram": {
+                    "edges": self.entropy_edges.tolist(),
+                    "counts": self._entropy_counts.tolist(),
+                },
+            }
+
+    def _add(self, sizes: np.ndarray, ids, probabilities, weights: Optional[Sequence[float]]) -> None:
+        num_names = len(sizes)
+        if not num_names:
+            return
+        weights = np.ones(num_names) if weights is None else np.asarray(weights, dtype=np.float64)
+        if len(weights) != num_names:
+            raise ValueError(f"expected {num_names} weights, got {len(weights)}")
+        ids = np.asarray(ids, dtype=np.int64)
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        rows = np.repeat(np.arange(num_names), sizes)
+        num_countries = len(self.country_codes)
+
+        self._totals += np.bincount(ids, probabilities * weights[rows], minlength=num_countries)
+
+        # the top country of a row is its first entry once sorted by row and descending probability
+        order = np.lexsort((-probabilities, rows))
+        has_countries = sizes > 0
+        firsts = order[np.cumsum(sizes)[has_countries] - sizes[has_countries]]
+        self._top_totals += np.bincount(ids[firsts], weights[has_countries], minlength=num_countries)
+
+        confidence = np.zeros(num_names)
+        confidence[has_countries] = probabilities[firsts]
+        mass = np.bincount(rows, probabilities, minlength=num_names)
+        shares = np.divide(probabilities, mass[rows], out=np.zeros_like(probabilities), where=mass[rows] > 0)
+        surprisal = -shares * np.log2(shares, out=np.zeros_like(shares), where=shares > 0)
+        entropy = np.bincount(rows, surprisal, minlength=num_names)
+
+        known_weights = weights[has_countries]
+        self._confidence_counts += np.histogram(
+            confidence[has_countries], bins=self.confidence_edges, weights=known_weights
+        )[0]
+        self._entropy_counts += np.histogram(
+            np.minimum(entropy[has_countries], MAX_ENTROPY_BITS), bins=self.entropy_edges, weights=known_weights
+        )[0]
+        self.names += num_names
+        self.weight += float(weights.sum())
+        self.unknown_weight += float(weights[~has_countries].sum())
+
+    def _intern(self, code: str) -> int:
+        country_id = self._country_ids_by_code.get(code)
+        if country_id is None:
+            country_id = self._country_ids_by_code[code] = len(self.country_codes)
+            self.country_codes.append(code)
+            self._totals = np.append(self._totals, 0.0)
+            self._top_totals = np.append(self._top_totals, 0.0)
+        return country_id
+
+    def _ranked(self, values: np.ndarray) -> Dict[str, float]:
+        order = np.argsort(-values, kind="stable")
+        return {self.country_codes[i]: float(values[i]) for i in order.tolist() if values[i]}
@@ -0,0 +1,299 @@
+import csv
+from typing import IO, Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+import orjson
+
+from api_response_models.nationalize_api_models import NationalizeResponse
+
+Prediction = Union[NationalizeResponse, dict]
+
+
+class _Column:
+    """
+    Growable NumPy array with amortized O(1) appends.
+    """
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[: self._size]
+
+    def extend(self, values) -> None:
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + len(values)
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[: self._size] = self.values
+            self._data = grown
+        self._data[self._size : end] = values
+        self._size = end
+
+
+class PredictionStore:
+    """
+    Columnar store of Nationalize predictions.
+
+    Every name is a row. Names are kept in one UTF-8 buffer with offsets and
+    counts in an int64 column. The countries of row i are the entries
+    country_offsets[i]:country_offsets[i + 1] of two flat columns: uint16 ids
+    into an interned table of country codes and float32 probabilities.
+    A last name with three countries takes about 50 bytes, instead of about
+    2 KB as a NationalizeResponse with its CountryPrediction models.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._name_buffer = bytearray()
+        self._name_offsets = _Column(np.int64, capacity + 1)
+        self._name_offsets.extend([0])
+        self._counts = _Column(np.int64, capacity)
+        self._country_offsets = _Column(np.int64, capacity + 1)
+        self._country_offsets.extend([0])
+        self._country_ids = _Column(np.uint16, capacity * 3)
+        self._probabilities = _Column(np.float32, capacity * 3)
+        self.country_codes: List[str] = []
+        self._country_ids_by_code: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the columns, including their spare capacity.
+        """
+        return len(self._name_buffer) + sum(
+            column._data.nbytes
+            for column in (
+                self._name_offsets,
+                self._counts,
+                self._country_offsets,
+                self._country_ids,
+                self._probabilities,
+            )
+        )
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts.values
+
+    @property
+    def country_offsets(self) -> np.ndarray:
+        return self._country_offsets.values
+
+    @property
+    def country_ids(self) -> np.ndarray:
+        return self._country_ids.values
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        return self._probabilities.values
+
+    def append(self, prediction: Prediction) -> None:
+        self.extend([prediction])
+
+    def extend(self, predictions: Iterable[Prediction]) -> None:
+        """
+        Appends NationalizeResponse models or their dicts.
+
+        Nothing is appended if any of them is invalid.
+        """
+        encoded_names, name_ends, counts, country_ends, country_ids, probabilities = [], [], [], [], [], []
+        name_end = len(self._name_buffer)
+        country_end = len(self._country_ids)
+        for prediction in predictions:
+            if isinstance(prediction, NationalizeResponse):
+                name, count = prediction.name, prediction.count
+                countries = [(c.country_id, c.probability) for c in prediction.country]
+            else:
+                name, count = prediction["name"], prediction["count"]
+                countries = [(c["country_id"], c["probability"]) for c in prediction["country"]]
+            encoded = name.encode()
+            encoded_names.append(encoded)
+            name_end += len(encoded)
+            name_ends.append(name_end)
+            counts.append(count)
+            for code, probability in countries:
+                country_ids.append(self._intern(code))
+                probabilities.append(probability)
+            country_end += len(countries)
+            country_ends.append(country_end)
+
+        # convert every column before touching any, so a bad value leaves the rows aligned
+        columns = [
+            (column, np.asarray(values, dtype=column._data.dtype))
+            for column, values in (
+                (self._name_offsets, name_ends),
+                (self._counts, counts),
+                (self._country_offsets, country_ends),
+                (self._country_ids, country_ids),
+                (self._probabilities, probabilities),
+            )
+        ]
+        self._name_buffer += b"".join(encoded_names)
+        for column, values in columns:
+            column.extend(values)
+
+    def extend_json(self, raw: Union[bytes, str]) -> None:
+        """
+        Appends the predictions of a raw name or name[] response body without building models.
+        """
+        data = orjson.loads(raw)
+        self.extend(data if isinstance(data, list) else [data])
+
+    @classmethod
+    def from_predictions(cls, predictions: Iterable[Prediction]) -> "PredictionStore":
+        store = cls()
+        store.extend(predictions)
+        return store
+
+    def name(self, row: int) -> str:
+        offsets = self._name_offsets.values
+        return self._name_buffer[offsets[row] : offsets[row + 1]].decode()
+
+    @property
+    def names(self) -> List[str]:
+        offsets = self._name_offsets.values.tolist()
+        buffer = bytes(self._name_buffer)
+        return [buffer[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+
+    def countries(self, row: int) -> List[Tuple[str, float]]:
+        start, end = self.country_offsets[row], self.country_offsets[row + 1]
+        return [
+            (self.country_codes[country_id], probability)
+            for country_id, probability in zip(
+                self.country_ids[start:end].tolist(), self.probabilities[start:end].tolist()
+            )
+        ]
+
+    def to_prediction(self, row: int) -> NationalizeResponse:
+        return NationalizeResponse(
+            count=int(self.counts[row]),
+            name=self.name(row),
+            country=[
+                {"country_id": code, "probability": probability}
+                for code, probability in self.countries(row)
+            ],
+        )
+
+    def top_k(self, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the k most probable country codes of every name and their probabilities.
+
+        Both arrays have shape (len(self), k). Names with fewer than k countries
+        are padded with "" and NaN.
+        """
+        rows, positions = self._positions()
+        width = max(k, int(positions.max()) + 1 if len(positions) else 0)
+        dense = np.full((len(self), width), -np.inf, dtype=np.float32)
+        dense[rows, positions] = self.probabilities
+        order = np.argsort(-dense, axis=1, kind="stable")[:, :k]
+        top_probabilities = np.take_along_axis(dense, order, axis=1)
+
+        ids = np.full((len(self), width), -1, dtype=np.int32)
+        ids[rows, positions] = self.country_ids
+        top_ids = np.take_along_axis(ids, order, axis=1)
+        table = np.array(self.country_codes + [""], dtype=object)
+        top_codes = table[top_ids]
+        top_probabilities[np.isneginf(top_probabilities)] = np.nan
+        return top_codes, top_probabilities
+
+    def filter(self, min_probability: float) -> "PredictionStore":
+        """
+        Returns a store without the countries below min_probability, and without
+        the names that have no country left.
+        """
+        keep = self.probabilities >= np.float32(min_probability)
+        rows, _ = self._positions()
+        kept_per_row = np.bincount(rows[keep], minlength=len(self))
+        kept_rows = np.flatnonzero(kept_per_row)
+
+        store = PredictionStore(capacity=max(1, len(kept_rows)))
+        store.country_codes = list(self.country_codes)
+        store._country_ids_by_code = dict(self._country_ids_by_code)
+        names = self.names
+        for row in kept_rows.tolist():
+            encoded = names[row].encode()
+            store._name_buffer += encoded
+            store._name_offsets.extend([len(store._name_buffer)])
+        store._counts.extend(self.counts[kept_rows])
+        store._country_offsets.extend(np.cumsum(kept_per_row[kept_rows]))
+        store._country_ids.extend(self.country_ids[keep])
+        store._probabilities.extend(self.probabilities[keep])
+        return store
+
+    def to_csv(self, file: Union[str, IO[str]]) -> None:
+        """
+        Writes one row per name and country: name, count, country_id, probability.
+        Names without countries get one row with empty country columns.
+        """
+        if isinstance(file, str):
+            with open(file, "w", newline="", encoding="utf-8") as f:
+                return self.to_csv(f)
+        writer = csv.writer(file)
+        writer.writerow(("name", "count", "country_id", "probability"))
+        offsets = self.country_offsets.tolist()
+        country_ids = self.country_ids.tolist()
+        probabilities = self.probabilities.tolist()
+        for row, (name, count) in enumerate(zip(self.names, self.counts.tolist())):
+            start, end = offsets[row], offsets[row + 1]
+            if start == end:
+                writer.writerow((name, count, "", ""))
+            for index in range(start, end):
+                writer.writerow((name, count, self.country_codes[country_ids[index]], probabilities[index]))
+
+    def to_arrow(self):
+        """
+        Returns a pyarrow Table with one row per name and country, with the
+        country codes dictionary encoded. Names without countries are left out.
+        """
+        pa = _import_pyarrow()
+        rows, _ = self._positions()
+        names = np.array(self.names, dtype=object)
+        table = np.array(self.country_codes, dtype=object)
+        return pa.table(
+            {
+                "name": pa.array(names[rows], type=pa.string()),
+                "count": pa.array(self.counts[rows]),
+                "country_id": pa.DictionaryArray.from_arrays(
+                    pa.array(self.country_ids.astype(np.int32)), pa.array(table, type=pa.string())
+                ),
+                "probability": pa.array(self.probabilities),
+            }
+        )
+
+    def to_parquet(self, path: str) -> None:
+        _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path)
+
+    def _intern(self, code: str) -> int:
+        country_id = self._country_ids_by_code.get(code)
+        if country_id is None:
+            country_id = self._country_ids_by_code[code] = len(self.country_codes)
+            self.country_codes.append(code)
+        return country_id
+
+    def _positions(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the row of every country entry and its position within the row.
+        """
+        sizes = np.diff(self.country_offsets)
+        rows = np.repeat(np.arange(len(self)), sizes)
+        positions = np.arange(len(rows)) - self.country_offsets[:-1][rows]
+        return rows, positions
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Arrow and Parquet export: pip install pyarrow") from e
+    return pyarrow
@@ -0,0 +1,165 @@
+import re
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+
+from pydantic import TypeAdapter
+
+from api_response_models.nationalize_api_models import NationalizeResponse
+from helpers.names import normalize_name
+
+nationalize_batch_adapter = TypeAdapter(List[NationalizeResponse])
+
+
+def decode_nationalize_response(raw: Union[bytes, str]) -> NationalizeResponse:
+    """
+    Validates a single name response body straight from the raw json.
+    """
+    return NationalizeResponse.model_validate_json(raw)
+
+
+def decode_nationalize_batch(raw: Union[bytes, str]) -> List[NationalizeResponse]:
+    """
+    Validates a name[] response body in one pass, without building intermediate dicts.
+    """
+    return nationalize_batch_adapter.validate_json(raw)
+
+
+# the bytes that can change the nesting or string state of json
+_STRUCTURAL = re.compile(rb'["\\{}\[\]]')
+
+
+class NationalizeBatchStreamDecoder:
+    """
+    Incremental decoder of a name[] response body.
+
+    feed() takes the body in chunks of any size and returns the items the chunk
+    completed, each validated on its own as soon as its closing brace arrives.
+    Only the bytes of the item in progress are buffered, so the whole list is
+    never built. A single name body is returned as one item.
+    """
+
+    def __init__(self):
+        self.items = 0
+        self._buffer = bytearray()
+        self._position = 0
+        self._item_start: Optional[int] = None
+        self._item_depth: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: bytes) -> List[NationalizeResponse]:
+        buffer = self._buffer
+        buffer += chunk
+        items = []
+        position = self._position
+        if self._escaped and position < len(buffer):
+            position += 1
+            self._escaped = False
+        while True:
+            match = _STRUCTURAL.search(buffer, position)
+            if match is None:
+                position = len(buffer)
+                break
+            index = match.start()
+            byte = buffer[index]
+            position = index + 1
+            if self._in_string:
+                if byte == 0x22:  # "
+                    self._in_string = False
+                elif byte == 0x5C:  # backslash, skip the escaped byte
+                    if position == len(buffer):
+                        self._escaped = True
+                        break
+                    position += 1
+            elif byte == 0x22:
+                self._in_string = True
+            elif byte in b"{[":
+                if self._item_depth is None:
+                    # items are the elements of a top level array, or the top level object itself
+                    self._item_depth = 1 if byte == 0x5B else 0
+                if self._depth == self._item_depth and byte == 0x7B:
+                    self._item_start = index
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth < 0:
+                    raise ValueError("unbalanced name[] response body")
+                if self._depth == self._item_depth and self._item_start is not None:
+                    items.append(NationalizeResponse.model_validate_json(buffer[self._item_start : position]))
+                    self._item_start = None
+
+        # keep only the item in progress
+        keep_from = position if self._item_start is None else self._item_start
+        del buffer[:keep_from]
+        self._position = position - keep_from
+        if self._item_start is not None:
+            self._item_start -= keep_from
+        self.items += len(items)
+        return items
+
+    def close(self) -> None:
+        """
+        Checks that the body is complete.
+        """
+        if self._item_depth is None or self._depth or self._in_string:
+            raise ValueError("incomplete name[] response body")
+
+
+def iter_nationalize_batch(chunks: Iterable[bytes]) -> Iterator[NationalizeResponse]:
+    """
+    Yields the items of a name[] response body as its chunks arrive.
+    """
+    decoder = NationalizeBatchStreamDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    decoder.close()
+
+
+async def aiter_nationalize_batch(chunks: AsyncIterable[bytes]) -> AsyncIterator[NationalizeResponse]:
+    """
+    iter_nationalize_batch() for async byte streams, e.g. httpx Response.aiter_bytes().
+    """
+    decoder = NationalizeBatchStreamDecoder()
+    async for chunk in chunks:
+        for item in decoder.feed(chunk):
+            yield item
+    decoder.close()
+
+
+class PredictionIndex:
+    """
+    name -> NationalizeResponse index over a batch that was decoded once.
+
+    Names are matched on their normalized form, see helpers.names.normalize_name.
+    """
+
+    def __init__(self, predictions: List[NationalizeResponse]):
+        self.predictions = predictions
+        self._by_name: Dict[str, NationalizeResponse] = {
+            normalize_name(prediction.name): prediction for prediction in predictions
+        }
+
+    @classmethod
+    def from_json(cls, raw: Union[bytes, str]) -> "PredictionIndex":
+        return cls(decode_nationalize_batch(raw))
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self._by_name
+
+    def __getitem__(self, name: str) -> NationalizeResponse:
+        return self._by_name[normalize_name(name)]
+
+    def __iter__(self) -> Iterator[NationalizeResponse]:
+        return iter(self.predictions)
+
+    def __len__(self) -> int:
+        return len(self.predictions)
+
+    def get(self, name: str) -> Optional[NationalizeResponse]:
+        return self._by_name.get(normalize_name(name))
+
+    def missing(self, names: List[str]) -> List[str]:
+        """
+        Returns the names that have no prediction in the batch.
+        """
+        return [name for name in names if normalize_name(name) not in self._by_name]
@@ -0,0 +1,55 @@
+import pytest
+
+from benchmarks.harness import BenchmarkRecorder
+from mocks.quota_store import QuotaStore
+from mocks.server import MockNationalizeServer
+
+recorder = BenchmarkRecorder()
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder():
+    return recorder
+
+
+@pytest.fixture(scope="session")
+def benchmark_server():
+    """
+    Starts a local mock server whose quota never runs out during a benchmark run.
+    """
+    server = MockNationalizeServer(port=0, quota_store=QuotaStore(limit=10**9))
+    server.start_in_thread()
+    yield server
+    server.stop()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not recorder.results:
+        return
+    config = session.config
+    regressions = recorder.regressions(
+        config.getoption("--benchmark-baseline"),
+        config.getoption("--benchmark-threshold"),
+    )
+    recorder.write(config.getoption("--benchmark-output"))
+    if regressions:
+        reporter = config.pluginmanager.get_plugin("terminalreporter")
+        reporter.ensure_newline()
+        reporter.section("benchmark regressions", sep="=", red=True)
+        for regression in regressions:
+            reporter.write_line(regression)
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not recorder.results:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'benchmark':40} {'calls/s':>10} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for name, stats in recorder.results.items():
+        terminalreporter.write_line(
+            f"{name:40} {stats['calls_per_second']:10.1f} {stats['items_per_second']:10.1f} "
+            f"{stats['p50_ms']:9.3f} {stats['p95_ms']:9.3f} {stats['p99_ms']:9.3f}"
+        )
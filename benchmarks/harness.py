@@ -0,0 +1,115 @@
+import json
+import time
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Returns the q-th percentile (0-100) of already sorted values.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float, items_per_call: int = 1) -> dict:
+    """
+    Summarizes per-call latencies in seconds into throughput and latency percentiles in ms.
+    """
+    latencies = sorted(latencies)
+    calls = len(latencies)
+    return {
+        "calls": calls,
+        "calls_per_second": calls / elapsed if elapsed else 0.0,
+        "items_per_second": calls * items_per_call / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / calls * 1000 if calls else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def measure(
+    fn: Callable[[], object], iterations: int, warmup: int = 10, items_per_call: int = 1
+) -> dict:
+    """
+    Calls fn sequentially and summarizes the per-call latencies.
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started, items_per_call)
+
+
+async def measure_async(
+    fn: Callable[[], Awaitable[object]],
+    iterations: int,
+    concurrency: int,
+    items_per_call: int = 1,
+) -> dict:
+    """
+    Awaits fn `iterations` times with up to `concurrency` calls in flight.
+    """
+    latencies = []
+
+    async def worker(calls: int):
+        for _ in range(calls):
+            call_started = time.perf_counter()
+            await fn()
+            latencies.append(time.perf_counter() - call_started)
+
+    calls, extra = divmod(iterations, concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(calls + (i < extra)) for i in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, items_per_call)
+
+
+class BenchmarkRecorder:
+    """
+    Collects benchmark results, writes them to json and compares them with a baseline run.
+    """
+
+    def __init__(self):
+        self.results: Dict[str, dict] = {}
+
+    def record(self, name: str, stats: dict) -> dict:
+        self.results[name] = stats
+        return stats
+
+    def write(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.results, f, indent=2, sort_keys=True)
+
+    def regressions(self, baseline_path: Optional[str], threshold: float) -> List[str]:
+        """
+        Lists the benchmarks whose p50 latency or throughput is more than
+        `threshold` worse than in the baseline.
+        """
+        if not baseline_path or not Path(baseline_path).exists():
+            return []
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for name, stats in self.results.items():
+            previous = baseline.get(name)
+            if not previous:
+                continue
+            if stats["p50_ms"] > previous["p50_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{name}: p50 {stats['p50_ms']:.3f}ms vs baseline {previous['p50_ms']:.3f}ms"
+                )
+            if stats["calls_per_second"] < previous["calls_per_second"] * (1 - threshold):
+                regressions.append(
+                    f"{name}: {stats['calls_per_second']:.1f} calls/s vs baseline {previous['calls_per_second']:.1f} calls/s"
+                )
+        return regressions
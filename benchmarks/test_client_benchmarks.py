@@ -0,0 +1,166 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from api_response_models.decoders import decode_nationalize_batch
+from api_response_models.nationalize_api_models import NationalizeResponse
+from clients.api_client import http_api_client
+from clients.async_api_client import AsyncNationalizeClient
+from clients.metrics import ClientMetrics
+from benchmarks.harness import measure, measure_async
+from helpers.utils import log_config, log_request, log_response
+from mocks.mocks import generate_nationalize_api_mock_responses
+from mocks.quota_store import QuotaStore
+from settings import max_batch_size
+from test_data.test_data import generate_fake_last_names
+
+pytestmark = pytest.mark.benchmark
+
+ITERATIONS = 200
+
+
+@pytest.fixture(scope="module")
+def batch_response(benchmark_server):
+    params = {"name[]": generate_fake_last_names(num_last_names=max_batch_size)}
+    response = requests.get(benchmark_server.url, params=params)
+    assert response.status_code == requests.codes.ok
+    return response
+
+
+class TestClientBenchmarks:
+
+    def test_single_name_requests(self, benchmark_server, benchmark_recorder):
+        """
+        Measures single name requests through http_api_client against the local mock server.
+        """
+        params = {"name": generate_fake_last_names(num_last_names=1)[0]}
+
+        stats = measure(
+            lambda: http_api_client.get(url=benchmark_server.url, params=params),
+            iterations=ITERATIONS,
+        )
+
+        benchmark_recorder.record("http_api_client.single_name", stats)
+
+    def test_batch_requests(self, benchmark_server, benchmark_recorder):
+        """
+        Measures name[] batch requests through http_api_client against the local mock server.
+        """
+        params = {"name[]": generate_fake_last_names(num_last_names=max_batch_size)}
+
+        stats = measure(
+            lambda: http_api_client.get(url=benchmark_server.url, params=params),
+            iterations=ITERATIONS,
+            items_per_call=max_batch_size,
+        )
+
+        benchmark_recorder.record("http_api_client.batch", stats)
+
+    def test_async_batch_requests(self, benchmark_server, benchmark_recorder):
+        """
+        Measures concurrent name[] batch requests through the async client.
+        """
+        params = {"name[]": generate_fake_last_names(num_last_names=max_batch_size)}
+
+        async def run():
+            async with AsyncNationalizeClient(base_url=benchmark_server.url) as client:
+                return await measure_async(
+                    lambda: client.get(params=params),
+                    iterations=ITERATIONS,
+                    concurrency=10,
+                    items_per_call=max_batch_size,
+                )
+
+        benchmark_recorder.record("async_client.batch", asyncio.run(run()))
+
+
+class TestOverheadBenchmarks:
+
+    def test_logging_hooks(self, batch_response, benchmark_recorder):
+        """
+        Measures the cost of the log_request and log_response hooks per response.
+        """
+
+        def hooks():
+            # every response is new to the hooks, so the logging decision is made again
+            batch_response._should_log = None
+            log_request(batch_response)
+            log_response(batch_response)
+
+        benchmark_recorder.record("hooks.log_request_log_response", measure(hooks, iterations=2000))
+
+    def test_logging_hooks_disabled(self, batch_response, benchmark_recorder):
+        """
+        Measures the cost of the logging hooks when logging is off.
+        """
+
+        def hooks():
+            batch_response._should_log = None
+            log_request(batch_response)
+            log_response(batch_response)
+
+        mode = log_config.mode
+        log_config.configure(mode="off")
+        try:
+            stats = measure(hooks, iterations=2000)
+        finally:
+            log_config.configure(mode=mode)
+            batch_response._should_log = None
+
+        benchmark_recorder.record("hooks.log_request_log_response_off", stats)
+
+    def test_metrics_hook(self, batch_response, benchmark_recorder):
+        """
+        Measures the cost of recording a response in ClientMetrics.
+        """
+        metrics = ClientMetrics()
+
+        benchmark_recorder.record(
+            "hooks.client_metrics_observe", measure(lambda: metrics.observe(batch_response), iterations=2000)
+        )
+
+    def test_response_parsing(self, batch_response, benchmark_recorder):
+        """
+        Measures decoding a batch body and validating every item as a NationalizeResponse.
+        """
+        stats = measure(
+            lambda: [NationalizeResponse(**item) for item in batch_response.json()],
+            iterations=2000,
+            items_per_call=max_batch_size,
+        )
+
+        benchmark_recorder.record("parsing.batch_nationalize_response", stats)
+
+    def test_batch_decoding(self, batch_response, benchmark_recorder):
+        """
+        Measures validating a batch body in one pass with decode_nationalize_batch.
+        """
+        stats = measure(
+            lambda: decode_nationalize_batch(batch_response.content),
+            iterations=2000,
+            items_per_call=max_batch_size,
+        )
+
+        benchmark_recorder.record("parsing.decode_nationalize_batch", stats)
+
+    def test_mock_response_generation(self, benchmark_recorder):
+        """
+        Measures generating a mock batch response.
+        """
+        request = SimpleNamespace(
+            params={"name[]": generate_fake_last_names(num_last_names=max_batch_size)}
+        )
+        quota_store = QuotaStore(limit=10**9)
+
+        stats = measure(
+            lambda: generate_nationalize_api_mock_responses(
+                request, test_name="benchmark", quota_store=quota_store
+            ),
+            iterations=50,
+            warmup=2,
+            items_per_call=max_batch_size,
+        )
+
+        benchmark_recorder.record("mocks.batch_response_generation", stats)
@@ -0,0 +1,65 @@
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks.harness import measure, summarize
+
+pytestmark = pytest.mark.benchmark
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+IMPORT_TIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)")
+# imported by the fixtures and tests that need them, never at startup
+LAZY_MODULES = ("faker", "responses", "mocks.mocks", "mocks.payloads")
+
+
+def import_times(statement: str) -> dict:
+    """
+    Runs statement in a fresh interpreter with -X importtime and returns the
+    cumulative import time in seconds of every module it imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        match.group(3): int(match.group(1)) / 1e6
+        for match in map(IMPORT_TIME_LINE.match, result.stderr.splitlines())
+        if match
+    }
+
+
+class TestStartupBenchmarks:
+
+    def test_conftest_import_time(self, benchmark_recorder):
+        """
+        Measures importing conftest.py, which every pytest process and xdist worker pays before the first test.
+        """
+        runs = [import_times("import conftest") for _ in range(5)]
+
+        latencies = [times["conftest"] for times in runs]
+        benchmark_recorder.record("startup.import_conftest", summarize(latencies, sum(latencies)))
+        assert not [module for module in LAZY_MODULES if module in runs[0]]
+
+    def test_collect_only(self, benchmark_recorder):
+        """
+        Measures a --collect-only run of the test suite, from interpreter start to exit.
+        The run does not write the html report.
+        """
+        command = [sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider"]
+        report = ROOT_DIR / "reports" / "report.html"
+        report_written_at = report.stat().st_mtime_ns if report.exists() else None
+
+        stats = measure(
+            lambda: subprocess.run(command, cwd=ROOT_DIR, capture_output=True, check=True),
+            iterations=3,
+            warmup=1,
+        )
+
+        benchmark_recorder.record("startup.collect_only", stats)
+        assert (report.stat().st_mtime_ns if report.exists() else None) == report_written_at
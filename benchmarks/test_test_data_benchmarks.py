@@ -0,0 +1,53 @@
+import pytest
+from faker import Faker
+
+from benchmarks.harness import measure
+from mocks.mocks import generate_random_country_probabilities
+from mocks.payloads import generate_batch_payload
+from test_data.test_data import generate_fake_last_names
+
+pytestmark = pytest.mark.benchmark
+
+
+class TestTestDataBenchmarks:
+
+    def test_pooled_fake_last_names(self, benchmark_recorder):
+        """
+        Measures drawing a batch of last names from the pooled generator.
+        """
+        stats = measure(
+            lambda: generate_fake_last_names(num_last_names=10),
+            iterations=5000,
+            items_per_call=10,
+        )
+
+        benchmark_recorder.record("test_data.pooled_last_names", stats)
+
+    def test_faker_per_call_last_name(self, benchmark_recorder):
+        """
+        Measures constructing a Faker per last name, the approach the pool replaces.
+        """
+        stats = measure(lambda: Faker().last_name(), iterations=50, warmup=2)
+
+        benchmark_recorder.record("test_data.faker_per_call_last_name", stats)
+
+    def test_mock_country_probabilities(self, benchmark_recorder):
+        """
+        Measures generating the country probabilities of one mock prediction.
+        """
+        stats = measure(
+            lambda: generate_random_country_probabilities(num_countries=3),
+            iterations=5000,
+        )
+
+        benchmark_recorder.record("test_data.mock_country_probabilities", stats)
+
+    def test_vectorized_large_batch_payload(self, benchmark_recorder):
+        """
+        Measures generating and serializing a 1000 name batch body in one vectorized step.
+        """
+        names = generate_fake_last_names(num_last_names=1000)
+
+        stats = measure(lambda: generate_batch_payload(names), iterations=200, items_per_call=1000)
+
+        benchmark_recorder.record("mocks.vectorized_batch_payload_1000", stats)
@@ -0,0 +1,227 @@
+import os
+import sys
+import csv
+import json
+import asyncio
+import argparse
+from collections import OrderedDict, deque
+from itertools import islice
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from api_response_models.decoders import decode_nationalize_batch
+from api_response_models.nationalize_api_models import ErrorResponse
+from clients.async_api_client import AsyncNationalizeClient
+from clients.exceptions import NationalizeApiError
+from helpers.names import normalize_name
+from settings import max_batch_size, max_concurrency
+
+INPUT_FORMATS = ("csv", "jsonl", "txt")
+DEFAULT_DEDUPE_WINDOW = 100_000
+
+
+def detect_format(path: str) -> str:
+    suffix = Path(path).suffix.lstrip(".").lower()
+    return suffix if suffix in INPUT_FORMATS else "txt"
+
+
+def read_names(stream: IO[str], input_format: str, column: str = "name") -> Iterator[str]:
+    """
+    Yields names from a csv (by column), jsonl (by key) or plain text (one per line) stream.
+    """
+    if input_format == "csv":
+        for row in csv.DictReader(stream):
+            yield row[column]
+    elif input_format == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)[column]
+    else:
+        for line in stream:
+            yield line.rstrip("\r\n")
+
+
+def dedupe_window(
+    names: Iterable[str], window: int, seen_names: Iterable[str] = ()
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yields (row offset after the name, name), skipping names whose normalized form
+    was seen in the last `window` unique names. `seen_names` are the unique names
+    before the first one, e.g. those already written by a run that is resumed.
+    """
+    seen = OrderedDict((normalize_name(name), None) for name in seen_names)
+    while len(seen) > window:
+        seen.popitem(last=False)
+    for offset, name in enumerate(names, start=1):
+        name = name.strip()
+        if not name:
+            continue
+        key = normalize_name(name)
+        if key in seen:
+            seen.move_to_end(key)
+            continue
+        seen[key] = None
+        if len(seen) > window:
+            seen.popitem(last=False)
+        yield offset, name
+
+
+def batch_names(
+    rows: Iterable[Tuple[int, str]], batch_size: int, start_offset: int = 0
+) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Groups names into batches and yields (row offset after the batch, names).
+    """
+    names = []
+    offset = 0
+    for offset, name in rows:
+        names.append(name)
+        if len(names) == batch_size:
+            yield start_offset + offset, names
+            names = []
+    if names:
+        yield start_offset + offset, names
+
+
+def read_written_names(path: str, window: int) -> List[str]:
+    """
+    Returns the names of the last `window` predictions of a json lines output file.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = deque((line for line in f if line.strip()), maxlen=window)
+    names = []
+    for line in lines:
+        try:
+            names.append(json.loads(line)["name"])
+        except (ValueError, KeyError):
+            # the last line of a run that was killed while writing
+            continue
+    return names
+
+
+def read_checkpoint(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return int(f.read().strip() or 0)
+
+
+def write_checkpoint(path: str, offset: int) -> None:
+    """
+    Atomically records how many input rows have been written to the output.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(offset))
+    os.replace(tmp_path, path)
+
+
+async def enrich(
+    batches: Iterable[Tuple[int, List[str]]],
+    output: IO[str],
+    client: AsyncNationalizeClient,
+    checkpoint_path: Optional[str] = None,
+    concurrency: int = max_concurrency,
+) -> int:
+    """
+    Looks up the batches with up to `concurrency` requests in flight and writes
+    the predictions as json lines in input order, checkpointing after every batch.
+
+    Returns the number of rows written. Raises NationalizeApiError on the first
+    error response, after everything before it has been written.
+    """
+    in_flight = deque()
+    written = 0
+    batches = iter(batches)
+    try:
+        while True:
+            while len(in_flight) < concurrency:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                offset, names = batch
+                request = client.get(params={"name[]": names})
+                in_flight.append((offset, asyncio.ensure_future(request)))
+            if not in_flight:
+                return written
+
+            offset, task = in_flight.popleft()
+            response = await task
+            if response.status_code != requests.codes.ok:
+                raise NationalizeApiError(
+                    response.status_code,
+                    ErrorResponse.model_validate_json(response.content).error,
+                )
+            predictions = decode_nationalize_batch(response.content)
+            output.writelines(prediction.model_dump_json() + "\n" for prediction in predictions)
+            output.flush()
+            written += len(predictions)
+            if checkpoint_path:
+                write_checkpoint(checkpoint_path, offset)
+    finally:
+        for _, task in in_flight:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in in_flight), return_exceptions=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Enrich a list of names with Nationalize predictions, written as json lines."
+    )
+    parser.add_argument("input", help="csv, jsonl or txt file of names, or - for stdin")
+    parser.add_argument("-o", "--output", required=True, help="json lines file the predictions are appended to")
+    parser.add_argument("--format", choices=INPUT_FORMATS, help="input format, detected from the file extension by default")
+    parser.add_argument("--column", default="name", help="csv column or jsonl key holding the name")
+    parser.add_argument("--checkpoint", help="checkpoint file, defaults to <output>.checkpoint")
+    parser.add_argument("--resume", action="store_true", help="continue after the rows recorded in the checkpoint")
+    parser.add_argument("--batch-size", type=int, default=max_batch_size)
+    parser.add_argument("--concurrency", type=int, default=max_concurrency)
+    parser.add_argument("--dedupe-window", type=int, default=DEFAULT_DEDUPE_WINDOW)
+    parser.add_argument("--url", help="Nationalize API url, defaults to settings.url")
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+    start_offset = read_checkpoint(checkpoint_path) if args.resume else 0
+    input_format = args.format or detect_format(args.input)
+
+    stream = sys.stdin if args.input == "-" else open(args.input, newline="")
+    try:
+        names = islice(read_names(stream, input_format, args.column), start_offset, None)
+        # a resumed run skips the names the previous one wrote just before it stopped
+        seen_names = read_written_names(args.output, args.dedupe_window) if args.resume else []
+        batches = batch_names(
+            dedupe_window(names, args.dedupe_window, seen_names), args.batch_size, start_offset
+        )
+        with open(args.output, "a" if args.resume else "w") as output:
+
+            async def run():
+                client_options = {"base_url": args.url} if args.url else {}
+                async with AsyncNationalizeClient(
+                    concurrency=args.concurrency, **client_options
+                ) as client:
+                    return await enrich(
+                        batches, output, client, checkpoint_path, args.concurrency
+                    )
+
+            try:
+                written = asyncio.run(run())
+            except NationalizeApiError as e:
+                print(
+                    f"Stopped on {e.error}, resume with --resume after the rate limit resets",
+                    file=sys.stderr,
+                )
+                return 2
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    print(f"Wrote {written} predictions to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
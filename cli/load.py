@@ -0,0 +1,259 @@
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import httpx
+import numpy as np
+import requests
+
+import constants.error_constants
+from clients.async_api_client import AsyncNationalizeClient
+from helpers.utils import LOG_MODES, log_config
+from mocks.quota_store import QuotaStore
+from mocks.server import MockNationalizeServer
+from settings import url, max_batch_size, request_timeout
+from test_data.test_data import generate_fake_last_names, get_fake_data_pool
+
+MOCK_URL = "mock"
+CLIENT_SATURATED = "CLIENT_SATURATED"
+ERROR_NAMES = {
+    value: name
+    for name, value in vars(constants.error_constants).items()
+    if name.startswith("ERROR_")
+}
+
+
+class Scenario(NamedTuple):
+    """
+    Load test scenario, read from a json file with the same keys.
+
+    Requests arrive at `target_rps`, ramping up linearly from zero over
+    `ramp_up_seconds`, for `duration_seconds` in total. `batch_ratio` is the
+    share of name[] requests of `batch_size` names; the rest are single name
+    requests. At most `concurrency` requests are in flight. `url` is the API
+    url or "mock" for a local mock server with `mock_latency_seconds` latency
+    and a quota of `mock_quota_limit` names.
+    """
+
+    target_rps: float
+    duration_seconds: float
+    ramp_up_seconds: float = 0
+    concurrency: int = 100
+    batch_ratio: float = 0.5
+    batch_size: int = max_batch_size
+    timeout_seconds: float = request_timeout
+    url: str = url
+    mock_latency_seconds: float = 0
+    mock_quota_limit: int = 10**9
+
+
+def load_scenario(path: str) -> Scenario:
+    with open(path) as f:
+        options = json.load(f)
+    unknown = set(options) - set(Scenario._fields)
+    if unknown:
+        raise ValueError(f"unknown scenario keys: {', '.join(sorted(unknown))}")
+    return Scenario(**options)
+
+
+def arrival_times(scenario: Scenario) -> Iterator[float]:
+    """
+    Yields the scheduled start of every request in seconds from the start of the run.
+
+    The rate grows linearly to target_rps during the ramp-up and stays there,
+    so the i-th request is scheduled where the integral of the rate reaches i.
+    """
+    rate, ramp, duration = scenario.target_rps, scenario.ramp_up_seconds, scenario.duration_seconds
+    ramp_requests = rate * ramp / 2
+    for i in range(1, math.floor(_requests_until(duration, rate, ramp)) + 1):
+        if i <= ramp_requests:
+            yield math.sqrt(2 * ramp * i / rate)
+        else:
+            yield ramp + (i - ramp_requests) / rate
+
+
+def _requests_until(t: float, rate: float, ramp: float) -> float:
+    if t <= ramp:
+        return rate * t * t / (2 * ramp)
+    return rate * ramp / 2 + rate * (t - ramp)
+
+
+class Result(NamedTuple):
+    scheduled_at: float
+    latency: Optional[float]
+    outcome: str
+    num_of_names: int
+
+
+def classify(response: httpx.Response) -> str:
+    """
+    Returns "ok" or the name of the ERROR_* constant of an error response.
+    """
+    if response.status_code == requests.codes.ok:
+        return "ok"
+    try:
+        error = response.json().get("error")
+    except ValueError:
+        error = None
+    return ERROR_NAMES.get(error, f"HTTP_{response.status_code}")
+
+
+async def run_scenario(scenario: Scenario, base_url: str) -> dict:
+    """
+    Runs the scenario open-loop and returns its report, see summarize().
+
+    Requests are started at their scheduled time whether or not earlier ones
+    have finished, and latency is measured from the scheduled time, so a slow
+    server shows up as latency instead of as a lower request rate. Requests
+    that would exceed `concurrency` are not sent and count as CLIENT_SATURATED.
+    """
+    rng = get_fake_data_pool().random
+    results: List[Result] = []
+    tasks = set()
+
+    async with AsyncNationalizeClient(
+        base_url=base_url,
+        concurrency=scenario.concurrency,
+        limits=httpx.Limits(
+            max_connections=scenario.concurrency,
+            max_keepalive_connections=scenario.concurrency,
+        ),
+        timeout=scenario.timeout_seconds,
+    ) as client:
+
+        async def send(scheduled_at: float, params: dict) -> None:
+            num_of_names = len(params.get("name[]", ())) or 1
+            try:
+                outcome = classify(await client.get(params))
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            latency = time.perf_counter() - started - scheduled_at
+            results.append(Result(scheduled_at, latency, outcome, num_of_names))
+
+        started = time.perf_counter()
+        # arrivals and params are generated as the run goes, so long runs do not hold them all
+        for scheduled_at in arrival_times(scenario):
+            params = (
+                {"name[]": generate_fake_last_names(num_last_names=scenario.batch_size)}
+                if rng.random() < scenario.batch_ratio
+                else {"name": generate_fake_last_names(num_last_names=1)[0]}
+            )
+            delay = started + scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= scenario.concurrency:
+                results.append(Result(scheduled_at, None, CLIENT_SATURATED, 0))
+                continue
+            task = asyncio.create_task(send(scheduled_at, params))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return summarize(results, elapsed)
+
+
+def summarize(results: List[Result], elapsed: float) -> dict:
+    """
+    Summarizes results into throughput, latency percentiles, an error breakdown
+    and a per-second timeline to spot the saturation point.
+    """
+    sent = [result for result in results if result.latency is not None]
+    ok = [result for result in sent if result.outcome == "ok"]
+    report = {
+        "scheduled": len(results),
+        "sent": len(sent),
+        "ok": len(ok),
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(sent) / elapsed if elapsed else 0.0,
+        "ok_per_second": len(ok) / elapsed if elapsed else 0.0,
+        "names_per_second": sum(r.num_of_names for r in ok) / elapsed if elapsed else 0.0,
+        "latency_ms": _latency_percentiles([r.latency for r in sent]),
+        "errors": dict(Counter(r.outcome for r in results if r.outcome != "ok").most_common()),
+    }
+
+    by_second: Dict[int, List[Result]] = defaultdict(list)
+    for result in results:
+        by_second[int(result.scheduled_at)].append(result)
+    report["timeline"] = [
+        {
+            "second": second,
+            "scheduled": len(bucket),
+            "ok": sum(r.outcome == "ok" for r in bucket),
+            "errors": sum(r.outcome != "ok" for r in bucket),
+            "p95_ms": _latency_percentiles([r.latency for r in bucket if r.latency is not None])["p95"],
+        }
+        for second, bucket in sorted(by_second.items())
+    ]
+    return report
+
+
+def _latency_percentiles(latencies: List[float]) -> dict:
+    if not latencies:
+        return {"p50": None, "p90": None, "p95": None, "p99": None, "max": None}
+    values = np.percentile(np.array(latencies) * 1000, [50, 90, 95, 99, 100]).tolist()
+    return dict(zip(("p50", "p90", "p95", "p99", "max"), values))
+
+
+def format_report(report: dict) -> str:
+    latency = report["latency_ms"]
+    lines = [
+        f"scheduled {report['scheduled']}, sent {report['sent']}, ok {report['ok']} in {report['elapsed_seconds']:.1f}s",
+        f"throughput {report['requests_per_second']:.1f} req/s, {report['ok_per_second']:.1f} ok/s, {report['names_per_second']:.1f} names/s",
+    ]
+    if latency["p50"] is not None:
+        lines.append(
+            "latency ms " + " ".join(f"{key} {value:.1f}" for key, value in latency.items())
+        )
+    lines.extend(f"{outcome}: {count}" for outcome, count in report["errors"].items())
+    lines.append(f"{'second':>6} {'sched':>6} {'ok':>6} {'errors':>6} {'p95 ms':>9}")
+    for row in report["timeline"]:
+        p95 = f"{row['p95_ms']:9.1f}" if row["p95_ms"] is not None else f"{'-':>9}"
+        lines.append(f"{row['second']:6} {row['scheduled']:6} {row['ok']:6} {row['errors']:6} {p95}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Open-loop load generator for the Nationalize API, driven by a scenario file."
+    )
+    parser.add_argument("scenario", help="json scenario file, see cli.load.Scenario")
+    parser.add_argument("--url", help='API url or "mock", overrides the scenario url')
+    parser.add_argument("-o", "--output", help="write the json report to this file")
+    parser.add_argument("--log-mode", choices=LOG_MODES, default="off", help="API request logging")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario)
+    if args.url:
+        scenario = scenario._replace(url=args.url)
+    log_config.configure(mode=args.log_mode)
+
+    server = None
+    base_url = scenario.url
+    if scenario.url == MOCK_URL:
+        server = MockNationalizeServer(
+            port=0,
+            latency=scenario.mock_latency_seconds,
+            quota_store=QuotaStore(limit=scenario.mock_quota_limit),
+        )
+        base_url = server.start_in_thread()
+    try:
+        report = asyncio.run(run_scenario(scenario, base_url))
+    finally:
+        if server:
+            server.stop()
+
+    print(format_report(report), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
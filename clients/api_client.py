@@ -1,5 +1,29 @@
+from typing import Iterator, List
+
 import requests
+from api_response_models.decoders import iter_nationalize_batch
+from api_response_models.nationalize_api_models import NationalizeResponse
+from clients.exceptions import error_from_body
+from clients.metrics import client_metrics
+from helpers.compression import accept_encoding_header
 from helpers.utils import log_request, log_response
+from settings import url, stream_chunk_size
 
 http_api_client = requests.Session()
-http_api_client.hooks['response'] = [log_request, log_response]
\ No newline at end of file
+http_api_client.headers["Accept-Encoding"] = accept_encoding_header()
+http_api_client.hooks['response'] = [client_metrics.observe, log_request, log_response]
+
+
+def stream_nationalize_batch(
+    names: List[str], session: requests.Session = http_api_client, base_url: str = url
+) -> Iterator[NationalizeResponse]:
+    """
+    Sends a name[] request and yields its predictions while the body is still
+    being received and decompressed, see iter_nationalize_batch().
+
+    Raises NationalizeApiError for error responses.
+    """
+    with session.get(base_url, params={"name[]": names}, stream=True) as response:
+        if response.status_code != requests.codes.ok:
+            raise error_from_body(response.status_code, response.content)
+        yield from iter_nationalize_batch(response.iter_content(chunk_size=stream_chunk_size))
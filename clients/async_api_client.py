@@ -0,0 +1,129 @@
+import asyncio
+from typing import AsyncIterator, List, Optional, Union
+
+import httpx
+
+from api_response_models.decoders import (
+    aiter_nationalize_batch,
+    decode_nationalize_batch,
+    decode_nationalize_response,
+)
+from api_response_models.nationalize_api_models import (
+    NationalizeResponse,
+    ErrorResponse,
+)
+from clients.exceptions import error_from_body
+from clients.metrics import client_metrics
+from helpers.compression import accept_encoding_header
+from helpers.utils import async_log_request, async_log_response
+from settings import (
+    url,
+    max_concurrency,
+    max_connections,
+    max_keepalive_connections,
+    request_timeout,
+)
+
+
+def parse_nationalize_response(
+    response: httpx.Response,
+) -> Union[NationalizeResponse, List[NationalizeResponse], ErrorResponse]:
+    """
+    Parses a response body into NationalizeResponse (single or batch) or ErrorResponse.
+    """
+    if response.status_code >= 400:
+        return ErrorResponse.model_validate_json(response.content)
+    if response.content.lstrip().startswith(b"["):
+        return decode_nationalize_batch(response.content)
+    return decode_nationalize_response(response.content)
+
+
+class AsyncNationalizeClient:
+    """
+    asyncio client for the Nationalize API.
+
+    Requests share one keep-alive connection pool. All requests go to a single
+    host, so the pool limits double as per-host connection limits. The number
+    of requests in flight is bounded by `concurrency`. Responses are
+    compressed with the best coding both sides support.
+    """
+
+    def __init__(
+        self,
+        base_url: str = url,
+        concurrency: int = max_concurrency,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout: float = request_timeout,
+    ):
+        self.base_url = base_url
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            limits=limits
+            or httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            transport=transport,
+            timeout=timeout,
+            headers={"Accept-Encoding": accept_encoding_header()},
+            event_hooks={
+                "request": [client_metrics.async_trace_request],
+                "response": [client_metrics.async_observe, async_log_request, async_log_response],
+            },
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def get(self, params: Optional[dict] = None) -> httpx.Response:
+        """
+        Sends a GET request once a concurrency slot is free.
+        """
+        async with self._semaphore:
+            return await self._client.get(self.base_url, params=params)
+
+    async def gather(self, params_list: List[dict]) -> List[httpx.Response]:
+        """
+        Sends all requests concurrently and returns the responses in order.
+        """
+        return await asyncio.gather(*(self.get(params) for params in params_list))
+
+    async def predict(self, name: str) -> Union[NationalizeResponse, ErrorResponse]:
+        """
+        Predicts the nationality of a single name.
+        """
+        response = await self.get(params={"name": name})
+        return parse_nationalize_response(response)
+
+    async def predict_batch(
+        self, names: List[str]
+    ) -> Union[List[NationalizeResponse], ErrorResponse]:
+        """
+        Predicts the nationalities of a batch of names with a single name[] request.
+        """
+        response = await self.get(params={"name[]": names})
+        return parse_nationalize_response(response)
+
+    async def stream_batch(self, names: List[str]) -> AsyncIterator[NationalizeResponse]:
+        """
+        Sends a name[] request and yields its predictions while the body is
+        still being received, see aiter_nationalize_batch().
+
+        Raises NationalizeApiError for error responses.
+        """
+        async with self._semaphore:
+            async with self._client.stream(
+                "GET", self.base_url, params={"name[]": names}, extensions={"stream": True}
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise error_from_body(response.status_code, response.content)
+                async for prediction in aiter_nationalize_batch(response.aiter_bytes()):
+                    yield prediction
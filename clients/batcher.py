@@ -0,0 +1,211 @@
+import time
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from api_response_models.decoders import PredictionIndex
+from api_response_models.nationalize_api_models import ErrorResponse
+from clients.api_client import http_api_client
+from clients.exceptions import NationalizeApiError
+from clients.key_pool import ApiKeyPool
+from clients.rate_limiter import RateLimitScheduler
+from helpers.names import normalize_name
+from settings import url, max_batch_size, batch_linger_seconds
+
+
+class NameBatcher:
+    """
+    Coalesces single-name lookups into name[] requests.
+
+    A batch is sent as soon as it holds `batch_size` names, or when the oldest
+    queued name has waited `linger` seconds. The list response is split back
+    out and each submitted future resolves to the NationalizeResponse for its
+    name. With a scheduler, batches shrink to the remaining quota and wait for
+    the reset instead of being rejected with a 429. With a key pool, every
+    batch is sent with the API key that has the most headroom. A batch whose
+    quota cannot be reserved fails its futures with the error raised.
+
+    Names that normalize to a name that is already queued or in flight share
+    its lookup instead of taking another slot; `deduplicated` counts them.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session = http_api_client,
+        batch_size: int = max_batch_size,
+        linger: float = batch_linger_seconds,
+        base_url: str = url,
+        scheduler: Optional[RateLimitScheduler] = None,
+        key_pool: Optional[ApiKeyPool] = None,
+    ):
+        self._session = session
+        self._batch_size = batch_size
+        self._linger = linger
+        self._base_url = base_url
+        self._scheduler = scheduler
+        self._key_pool = key_pool
+        # (key, name, waiters); waiters are the (name, future) pairs sharing the lookup
+        self._pending: List[Tuple[str, str, list]] = []
+        self._waiters: Dict[str, list] = {}
+        self.deduplicated = 0
+        self._oldest_at = 0.0
+        self._closed = False
+        self._closing = threading.Event()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, name: str) -> Future:
+        """
+        Queues a name for lookup and returns a future of its NationalizeResponse.
+        """
+        future = Future()
+        key = normalize_name(name)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("NameBatcher is closed")
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.append((name, future))
+                self.deduplicated += 1
+                return future
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            waiters = self._waiters[key] = [(name, future)]
+            self._pending.append((key, name, waiters))
+            self._condition.notify()
+        return future
+
+    def submit_many(self, names: List[str]) -> List[Future]:
+        """
+        Queues several names and returns their futures in order.
+        """
+        return [self.submit(name) for name in names]
+
+    def close(self) -> None:
+        """
+        Sends everything still queued and stops the background thread.
+
+        Names still waiting for quota are not held until the reset; their
+        futures fail with CancelledError.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._closing.set()
+        if self._key_pool is not None:
+            self._key_pool.wake()
+        if self._scheduler is not None:
+            self._scheduler.wake()
+        self._thread.join()
+
+    def _next_batch(self) -> List[Tuple[str, str, list]]:
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            deadline = self._oldest_at + self._linger
+            while len(self._pending) < self._batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[: self._batch_size]
+            del self._pending[: self._batch_size]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                self._dispatch(batch)
+            except Exception as e:
+                self._fail(batch, e)
+
+    def _dispatch(self, batch: List[Tuple[str, str, list]]) -> None:
+        apikey = None
+        if self._key_pool is not None:
+            apikey, granted = self._key_pool.acquire(len(batch), cancel=self._closing)
+            release = partial(self._key_pool.release, apikey)
+        elif self._scheduler is not None:
+            granted = self._scheduler.acquire(len(batch), cancel=self._closing)
+            release = self._scheduler.release
+        else:
+            self._send(batch)
+            return
+        try:
+            batch = self._requeue_ungranted(batch, granted)
+            self._send(batch, apikey=apikey)
+        finally:
+            release(granted)
+
+    def _fail(self, batch: List[Tuple[str, str, list]], error: Exception) -> None:
+        # names that were requeued or already resolved are not part of the failure
+        with self._condition:
+            failed = []
+            for entry in batch:
+                key, _, waiters = entry
+                if self._waiters.get(key) is waiters and entry not in self._pending:
+                    failed.append(self._waiters.pop(key))
+        for waiters in failed:
+            for _, future in waiters:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _requeue_ungranted(self, batch: List[Tuple[str, str, list]], granted: int) -> List[Tuple[str, str, list]]:
+        if granted < len(batch):
+            with self._condition:
+                self._pending[:0] = batch[granted:]
+        return batch[:granted]
+
+    def _send(self, batch: List[Tuple[str, str, list]], apikey: Optional[str] = None) -> None:
+        names = [name for _, name, _ in batch]
+        params = {"name[]": names}
+        if apikey is not None:
+            params["apikey"] = apikey
+        try:
+            response = self._session.get(url=self._base_url, params=params)
+            if response.status_code != requests.codes.ok:
+                raise NationalizeApiError(
+                    response.status_code,
+                    ErrorResponse.model_validate_json(response.content).error,
+                )
+            index = PredictionIndex.from_json(response.content)
+        except Exception as e:
+            for waiters in self._resolve(batch):
+                for _, future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        # predictions are matched by name, not by position in the response
+        for (_, queued_name, _), waiters in zip(batch, self._resolve(batch)):
+            prediction = index.get(queued_name)
+            for name, future in waiters:
+                if future.done():
+                    continue
+                if prediction is None:
+                    future.set_exception(
+                        NationalizeApiError(response.status_code, f"no prediction for {name!r} in the response")
+                    )
+                elif name != prediction.name:
+                    future.set_result(prediction.model_copy(update={"name": name}))
+                else:
+                    future.set_result(prediction)
+
+    def _resolve(self, batch: List[Tuple[str, str, list]]) -> List[list]:
+        # no more names can join a lookup once its key is gone
+        with self._condition:
+            for key, _, _ in batch:
+                self._waiters.pop(key, None)
+        return [waiters for _, _, waiters in batch]
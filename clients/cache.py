@@ -0,0 +1,267 @@
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from api_response_models.decoders import (
+    decode_nationalize_batch,
+    decode_nationalize_response,
+)
+from api_response_models.nationalize_api_models import (
+    NationalizeResponse,
+    ErrorResponse,
+)
+from clients.api_client import http_api_client
+from clients.exceptions import NationalizeApiError
+from helpers.names import NameIndex, normalize_name
+from settings import (
+    url,
+    max_batch_size,
+    cache_path,
+    cache_ttl_seconds,
+    cache_max_size,
+    cache_memory_size,
+)
+
+
+def cache_key(name: str) -> str:
+    """
+    Normalizes a name into the key its prediction is cached under.
+    """
+    return normalize_name(name)
+
+
+class PredictionCache:
+    """
+    NationalizeResponse cache keyed on the normalized name.
+
+    An in-memory LRU of `memory_size` entries sits in front of a single-file
+    SQLite store capped at `max_size` entries. Entries older than `ttl`
+    seconds are treated as misses. When the store is full, the least recently
+    accessed entries are evicted. Access times of hits are kept in memory and
+    written to disk in batches, before every put and on close(), so lookups
+    never write to SQLite and hot entries are still not evicted first.
+    """
+
+    def __init__(
+        self,
+        path: str = cache_path,
+        ttl: float = cache_ttl_seconds,
+        max_size: int = cache_max_size,
+        memory_size: int = cache_memory_size,
+        clock: Callable[[], float] = time.time,
+    ):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.memory_size = memory_size
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        # key -> access time of hits not yet written to disk
+        self._accessed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, stored_at REAL, accessed_at REAL, payload TEXT)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS predictions_accessed_at ON predictions (accessed_at)"
+        )
+        self._db.commit()
+        # kept in memory, so writes only touch the index when the store is over max_size
+        self._size = self._db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_accessed()
+            self._db.commit()
+            self._db.close()
+
+    def get(self, name: str) -> Optional[NationalizeResponse]:
+        """
+        Returns the cached prediction for a name, or None on a miss.
+        """
+        return self.get_many([name]).get(name)
+
+    def get_many(self, names: List[str]) -> Dict[str, NationalizeResponse]:
+        """
+        Returns the cached predictions for the names that are present and fresh.
+        """
+        now = self._clock()
+        found = {}
+        with self._lock:
+            for name in names:
+                key = cache_key(name)
+                prediction = self._get_from_memory(key, now)
+                if prediction is None:
+                    prediction = self._get_from_disk(key, now)
+                if prediction is None:
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                self._accessed[key] = now
+                found[name] = prediction.model_copy(update={"name": name})
+            if len(self._accessed) >= self.memory_size:
+                self._flush_accessed()
+                self._db.commit()
+        return found
+
+    def put(self, prediction: NationalizeResponse) -> None:
+        self.put_many([prediction])
+
+    def put_many(self, predictions: List[NationalizeResponse]) -> None:
+        """
+        Stores predictions under the normalized form of their name.
+        """
+        now = self._clock()
+        with self._lock:
+            rows = {}
+            for prediction in predictions:
+                key = cache_key(prediction.name)
+                self._put_in_memory(key, now, prediction)
+                rows[key] = (key, now, now, prediction.model_dump_json())
+            self._flush_accessed()
+            self._size += len(rows) - self._count_stored(list(rows))
+            self._db.executemany(
+                "INSERT INTO predictions (key, stored_at, accessed_at, payload) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET stored_at = excluded.stored_at, "
+                "accessed_at = excluded.accessed_at, payload = excluded.payload",
+                rows.values(),
+            )
+            if self._size > self.max_size:
+                self._db.execute(
+                    "DELETE FROM predictions WHERE key IN ("
+                    "SELECT key FROM predictions ORDER BY accessed_at LIMIT ?)",
+                    (self._size - self.max_size,),
+                )
+                self._size = self.max_size
+            self._db.commit()
+
+    def _count_stored(self, keys: List[str]) -> int:
+        stored = 0
+        # stays below SQLITE_MAX_VARIABLE_NUMBER of older SQLite builds
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            stored += self._db.execute(
+                f"SELECT COUNT(*) FROM predictions WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchone()[0]
+        return stored
+
+    def _flush_accessed(self) -> None:
+        if self._accessed:
+            self._db.executemany(
+                "UPDATE predictions SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _get_from_memory(self, key: str, now: float) -> Optional[NationalizeResponse]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        stored_at, prediction = entry
+        if now - stored_at > self.ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return prediction
+
+    def _get_from_disk(self, key: str, now: float) -> Optional[NationalizeResponse]:
+        row = self._db.execute(
+            "SELECT stored_at, payload FROM predictions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        stored_at, payload = row
+        if now - stored_at > self.ttl:
+            self._db.execute("DELETE FROM predictions WHERE key = ?", (key,))
+            self._size -= 1
+            return None
+        prediction = NationalizeResponse.model_validate_json(payload)
+        self._put_in_memory(key, stored_at, prediction)
+        return prediction
+
+    def _put_in_memory(
+        self, key: str, stored_at: float, prediction: NationalizeResponse
+    ) -> None:
+        self._memory[key] = (stored_at, prediction)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+
+class CachedNationalizeClient:
+    """
+    Looks up predictions through a PredictionCache and only sends the names
+    that are missing, in name[] requests of up to `batch_size` names.
+    """
+
+    def __init__(
+        self,
+        cache: PredictionCache,
+        session: requests.Session = http_api_client,
+        base_url: str = url,
+        batch_size: int = max_batch_size,
+    ):
+        self.cache = cache
+        self._session = session
+        self._base_url = base_url
+        self._batch_size = batch_size
+
+    def predict(self, name: str) -> NationalizeResponse:
+        """
+        Returns the prediction for a single name, using a name request on a miss.
+        """
+        prediction = self.cache.get(name)
+        if prediction is None:
+            prediction = decode_nationalize_response(self._get(params={"name": name}))
+            self.cache.put(prediction)
+        return prediction
+
+    def predict_batch(self, names: List[str]) -> List[NationalizeResponse]:
+        """
+        Returns the predictions for all names in order, fetching only the cache misses.
+        Misses that normalize to the same name are fetched once.
+        """
+        found = self.cache.get_many(names)
+        missing = NameIndex(name for name in names if name not in found)
+        fetched = {}
+        for start in range(0, len(missing.unique), self._batch_size):
+            chunk = missing.unique[start : start + self._batch_size]
+            predictions = decode_nationalize_batch(self._get(params={"name[]": chunk}))
+            self.cache.put_many(predictions)
+            fetched.update(zip(chunk, predictions))
+        for name, prediction in zip(missing.names, missing.fan_out(fetched)):
+            found[name] = (
+                prediction if prediction.name == name else prediction.model_copy(update={"name": name})
+            )
+        return [found[name] for name in names]
+
+    def _get(self, params: dict) -> bytes:
+        response = self._session.get(url=self._base_url, params=params)
+        if response.status_code != requests.codes.ok:
+            raise NationalizeApiError(
+                response.status_code,
+                ErrorResponse.model_validate_json(response.content).error,
+            )
+        return response.content
@@ -0,0 +1,26 @@
+import pydantic
+
+from api_response_models.nationalize_api_models import ErrorResponse
+
+
+class NationalizeApiError(Exception):
+    """
+    Raised when the Nationalize API answers a lookup with an error response.
+    """
+
+    def __init__(self, status_code: int, error: str):
+        super().__init__(f"{status_code}: {error}")
+        self.status_code = status_code
+        self.error = error
+
+
+def error_from_body(status_code: int, content: bytes) -> NationalizeApiError:
+    """
+    Builds the NationalizeApiError of an error response. Bodies that are not
+    an ErrorResponse, e.g. the HTML of a proxy, are kept as text.
+    """
+    try:
+        error = ErrorResponse.model_validate_json(content).error
+    except pydantic.ValidationError:
+        error = content.decode("utf-8", "replace").strip() or f"HTTP {status_code}"
+    return NationalizeApiError(status_code, error)
@@ -0,0 +1,117 @@
+import time
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from clients.rate_limiter import RateLimitScheduler
+from settings import api_keys, x_rate_limit_limit_free_tier
+
+
+class ApiKeyPool:
+    """
+    Spreads Nationalize requests over several API keys, each with its own quota.
+
+    Every key has a RateLimitScheduler that learns its x-rate-limit-* headers
+    from the responses sent with it. acquire() reserves quota on the key with
+    the most headroom. Exhausted keys are out of rotation until their reset;
+    when all of them are exhausted, acquire() waits for the earliest reset,
+    which wake() interrupts. `usage` reports the requests, names and 429s of
+    every key.
+    """
+
+    def __init__(
+        self,
+        keys: Optional[List[str]] = None,
+        limit: int = int(x_rate_limit_limit_free_tier),
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], None]] = None,
+    ):
+        keys = list(api_keys if keys is None else keys)
+        if not keys:
+            raise ValueError("ApiKeyPool needs at least one API key, see api_keys in settings.py")
+        self.keys = keys
+        self.schedulers: Dict[str, RateLimitScheduler] = {
+            key: RateLimitScheduler(limit=limit, clock=clock, sleep=sleep) for key in keys
+        }
+        self.requests = Counter()
+        self.names = Counter()
+        self.rejected = Counter()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def usage(self) -> Dict[str, dict]:
+        now = self._clock()
+        return {
+            key: {
+                "requests": self.requests[key],
+                "names": self.names[key],
+                "rejected": self.rejected[key],
+                "remaining": scheduler.remaining,
+                "limit": scheduler.limit,
+                "reset_in": None if scheduler.reset_at is None else max(0.0, scheduler.reset_at - now),
+            }
+            for key, scheduler in self.schedulers.items()
+        }
+
+    def attach(self, session: requests.Session) -> None:
+        """
+        Registers the pool as a response hook so every key learns from its own responses.
+        """
+        session.hooks["response"].append(self.observe)
+
+    def detach(self, session: requests.Session) -> None:
+        session.hooks["response"].remove(self.observe)
+
+    def observe(self, response, *args, **kwargs) -> None:
+        """
+        Hands the response to the scheduler of the key it was sent with and counts it.
+        """
+        params = parse_qs(urlsplit(response.request.url).query)
+        key = params.get("apikey", [None])[0]
+        scheduler = self.schedulers.get(key)
+        if scheduler is None:
+            return
+        scheduler.observe(response)
+        with self._lock:
+            self.requests[key] += 1
+            if response.status_code == requests.codes.ok:
+                self.names[key] += len(params.get("name[]", ())) or 1
+            elif response.status_code == requests.codes.too_many_requests:
+                self.rejected[key] += 1
+
+    def acquire(self, num_of_names: int = 1, cancel: Optional[threading.Event] = None) -> Tuple[str, int]:
+        """
+        Reserves quota for up to num_of_names names on the key with the most
+        headroom and returns the key and how many names were granted.
+
+        Blocks while every key is exhausted, see RateLimitScheduler.acquire()
+        for `cancel`.
+        """
+        with self._lock:
+            # reserve while holding the lock, so concurrent callers never pick
+            # the same headroom and then block on a key that has run out
+            headroom = {key: self.schedulers[key].headroom() for key in self.keys}
+            for key in sorted(self.keys, key=headroom.get, reverse=True):
+                granted = self.schedulers[key].try_acquire(num_of_names)
+                if granted:
+                    return key, granted
+            key = min(self.keys, key=self._reset_at)
+        return key, self.schedulers[key].acquire(num_of_names, cancel=cancel)
+
+    def release(self, key: str, num_of_names: int) -> None:
+        self.schedulers[key].release(num_of_names)
+
+    def wake(self) -> None:
+        """
+        Wakes the callers waiting in acquire() so they can check their `cancel` event.
+        """
+        for scheduler in self.schedulers.values():
+            scheduler.wake()
+
+    def _reset_at(self, key: str) -> float:
+        reset_at = self.schedulers[key].reset_at
+        return self._clock() if reset_at is None else reset_at
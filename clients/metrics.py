@@ -0,0 +1,292 @@
+import time
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from settings import max_batch_size
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536, 262144, 1048576)
+BATCH_SIZE_BUCKETS = tuple(range(1, max_batch_size + 1))
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() is one bisect and three additions.
+
+    counts[i] holds the observations <= buckets[i] and above the previous
+    bucket; the last count holds everything above the largest bucket.
+    """
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a quantile by linear interpolation inside its bucket.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def merge(self, snapshot: dict) -> None:
+        if tuple(snapshot["buckets"]) != self.buckets:
+            raise ValueError("histograms with different buckets can not be merged")
+        self.counts = [a + b for a, b in zip(self.counts, snapshot["counts"])]
+        self.sum += snapshot["sum"]
+        self.count += snapshot["count"]
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class ClientMetrics:
+    """
+    In-process metrics of the Nationalize API clients.
+
+    observe() is a requests response hook and async_observe() an httpx response
+    hook. They record total time, time to first byte, bytes sent and received,
+    status codes, the number of name[] values and the x-rate-limit-remaining
+    headroom. httpx clients instrumented with instrument_async() also record
+    the connect time, which includes the DNS lookup. requests does not expose
+    connection timings.
+    """
+
+    HISTOGRAMS = {
+        "total_seconds": SECONDS_BUCKETS,
+        "ttfb_seconds": SECONDS_BUCKETS,
+        "connect_seconds": SECONDS_BUCKETS,
+        "bytes_sent": BYTES_BUCKETS,
+        "bytes_received": BYTES_BUCKETS,
+        "batch_size": BATCH_SIZE_BUCKETS,
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms: Dict[str, Histogram] = {
+                name: Histogram(buckets) for name, buckets in self.HISTOGRAMS.items()
+            }
+            self.status_codes = Counter()
+            self.rate_limit_remaining: Optional[int] = None
+            self.rate_limit_remaining_min: Optional[int] = None
+
+    @property
+    def requests(self) -> int:
+        return sum(self.status_codes.values())
+
+    def observe(self, response, *args, **kwargs) -> None:
+        """
+        Records a requests response. Register it before the logging hooks, so
+        that the total time includes reading the body.
+        """
+        ttfb = response.elapsed.total_seconds()
+        if kwargs.get("stream"):
+            # streamed bodies are left to the caller
+            received = int(response.headers.get("content-length", 0))
+            total = ttfb
+        else:
+            started = time.perf_counter()
+            content = response.content or b""
+            total = ttfb + time.perf_counter() - started
+            # bytes on the wire, before decompression
+            received = response.raw.tell() if response.raw is not None else len(content)
+        request = response.request
+        self._record(
+            status_code=response.status_code,
+            url=request.url,
+            sent=_request_size(request.method, request.url, request.headers, request.body),
+            received=received,
+            ttfb=ttfb,
+            total=total,
+            connect=None,
+            remaining=response.headers.get("x-rate-limit-remaining"),
+        )
+
+    async def async_observe(self, response) -> None:
+        """
+        Records an httpx response. Bodies of requests with the "stream"
+        extension are left to the caller.
+        """
+        request = response.request
+        if request.extensions.get("stream"):
+            received = int(response.headers.get("content-length", 0))
+        else:
+            await response.aread()
+            # bytes on the wire, before decompression; in-memory transports download nothing
+            received = response.num_bytes_downloaded or len(response.content)
+        timings = request.extensions.get("metrics_timings", {})
+        connect = None
+        if "connect_tcp.started" in timings and "connect_tcp.complete" in timings:
+            connect = timings["connect_tcp.complete"] - timings["connect_tcp.started"]
+        # response.elapsed is only set once the client closes the response, after the hooks
+        total = time.perf_counter() - timings["started"] if timings else 0.0
+        ttfb = total
+        if "send_request_headers.started" in timings and "receive_response_headers.complete" in timings:
+            ttfb = timings["receive_response_headers.complete"] - timings["send_request_headers.started"]
+        self._record(
+            status_code=response.status_code,
+            url=str(request.url),
+            sent=_request_size(request.method, str(request.url), request.headers, request.content),
+            received=received,
+            ttfb=ttfb,
+            total=total,
+            connect=connect,
+            remaining=response.headers.get("x-rate-limit-remaining"),
+        )
+
+    async def async_trace_request(self, request) -> None:
+        """
+        httpx request hook that collects connection timings through the trace extension.
+        """
+        timings = request.extensions["metrics_timings"] = {"started": time.perf_counter()}
+
+        async def trace(event_name: str, info: dict) -> None:
+            # event names look like "connection.connect_tcp.started"
+            timings[event_name.partition(".")[2]] = time.perf_counter()
+
+        request.extensions["trace"] = trace
+
+    def _record(self, status_code, url, sent, received, ttfb, total, connect, remaining) -> None:
+        batch_size = _batch_size(url)
+        with self._lock:
+            histograms = self.histograms
+            histograms["total_seconds"].observe(total)
+            histograms["ttfb_seconds"].observe(ttfb)
+            if connect is not None:
+                histograms["connect_seconds"].observe(connect)
+            histograms["bytes_sent"].observe(sent)
+            histograms["bytes_received"].observe(received)
+            if batch_size:
+                histograms["batch_size"].observe(batch_size)
+            self.status_codes[status_code] += 1
+            if remaining is not None:
+                remaining = int(remaining)
+                self.rate_limit_remaining = remaining
+                if self.rate_limit_remaining_min is None or remaining < self.rate_limit_remaining_min:
+                    self.rate_limit_remaining_min = remaining
+
+    def snapshot(self) -> dict:
+        """
+        Returns all metrics as a json serializable dict, see merge().
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "status_codes": {str(code): count for code, count in self.status_codes.items()},
+                "rate_limit_remaining": self.rate_limit_remaining,
+                "rate_limit_remaining_min": self.rate_limit_remaining_min,
+                "histograms": {name: h.snapshot() for name, h in self.histograms.items()},
+            }
+
+    def merge(self, snapshot: dict) -> None:
+        """
+        Adds the snapshot of another process, e.g. a pytest-xdist worker.
+        """
+        with self._lock:
+            for name, histogram in snapshot["histograms"].items():
+                self.histograms[name].merge(histogram)
+            for code, count in snapshot["status_codes"].items():
+                self.status_codes[int(code)] += count
+            if snapshot["rate_limit_remaining_min"] is not None:
+                self.rate_limit_remaining = snapshot["rate_limit_remaining"]
+                self.rate_limit_remaining_min = min(
+                    snapshot["rate_limit_remaining_min"],
+                    self.rate_limit_remaining_min
+                    if self.rate_limit_remaining_min is not None
+                    else snapshot["rate_limit_remaining_min"],
+                )
+
+    def to_prometheus(self, prefix: str = "nationalize_client") -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines: List[str] = [
+            f"# TYPE {prefix}_requests_total counter",
+            *(
+                f'{prefix}_requests_total{{status="{code}"}} {count}'
+                for code, count in sorted(snapshot["status_codes"].items())
+            ),
+        ]
+        for name, histogram in snapshot["histograms"].items():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bucket, count in zip(histogram["buckets"] + ["+Inf"], histogram["counts"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bucket}"}} {cumulative}')
+            lines.append(f"{metric}_sum {histogram['sum']}")
+            lines.append(f"{metric}_count {histogram['count']}")
+        if snapshot["rate_limit_remaining"] is not None:
+            lines.append(f"# TYPE {prefix}_rate_limit_remaining gauge")
+            lines.append(f"{prefix}_rate_limit_remaining {snapshot['rate_limit_remaining']}")
+            lines.append(f"# TYPE {prefix}_rate_limit_remaining_min gauge")
+            lines.append(f"{prefix}_rate_limit_remaining_min {snapshot['rate_limit_remaining_min']}")
+        return "\n".join(lines) + "\n"
+
+
+def _batch_size(url: str) -> int:
+    """
+    Counts the name[] values in a url without parsing the query.
+    """
+    return url.count("name%5B%5D=") + url.count("name[]=")
+
+
+def _request_size(method, url, headers, body) -> int:
+    """
+    Approximates the bytes of an HTTP/1.1 request on the wire.
+    """
+    size = len(method) + len(url) + 11
+    for key, value in headers.items():
+        size += len(key) + len(value) + 4
+    if body:
+        size += len(body)
+    return size
+
+
+client_metrics = ClientMetrics()
+
+
+def instrument(session, metrics: ClientMetrics = client_metrics) -> None:
+    """
+    Registers metrics as the first response hook of a requests session.
+    """
+    session.hooks["response"].insert(0, metrics.observe)
+
+
+def instrument_async(client, metrics: ClientMetrics = client_metrics) -> None:
+    """
+    Registers metrics as event hooks of an httpx.AsyncClient.
+    """
+    client.event_hooks["request"].append(metrics.async_trace_request)
+    client.event_hooks["response"].insert(0, metrics.async_observe)
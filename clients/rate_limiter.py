@@ -0,0 +1,161 @@
+import time
+import threading
+from concurrent.futures import CancelledError
+from typing import Callable, Optional
+
+import requests
+
+from settings import (
+    x_rate_limit_limit_free_tier,
+    rate_limit_probe_backoff_seconds,
+    rate_limit_probe_backoff_max_seconds,
+)
+
+
+class RateLimitScheduler:
+    """
+    Quota counter that paces Nationalize requests with the x-rate-limit-* headers.
+
+    Every observed response sets the remaining quota to x-rate-limit-remaining
+    and moves the reset time to x-rate-limit-reset seconds from now; there is
+    no refill rate. Names reserved by acquire() count against the quota until
+    they are released. When no quota is left, acquire() waits for in-flight
+    responses or for the reset instead of letting the request fail with a 429.
+    If no reset time is known, it backs off and then lets a single name through
+    to learn the quota from its response.
+
+    `sleep` defaults to a wait that wake() interrupts, so a caller that is
+    shutting down does not wait out a reset window.
+    """
+
+    def __init__(
+        self,
+        limit: int = int(x_rate_limit_limit_free_tier),
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], None]] = None,
+    ):
+        self.limit = limit
+        self.remaining = limit
+        self.reset_at: Optional[float] = None
+        self._in_flight = 0
+        self._probe_backoff = rate_limit_probe_backoff_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._condition = threading.Condition()
+
+    @property
+    def available(self) -> int:
+        return max(0, self.remaining - self._in_flight)
+
+    def headroom(self) -> int:
+        """
+        Returns how many names can be reserved without waiting, with the quota
+        refilled once its reset time has passed.
+        """
+        with self._condition:
+            self._refill_after_reset()
+            return self.available
+
+    def attach(self, session: requests.Session) -> None:
+        """
+        Registers the scheduler as a response hook so it learns from every response.
+        """
+        session.hooks["response"].append(self.observe)
+
+    def detach(self, session: requests.Session) -> None:
+        session.hooks["response"].remove(self.observe)
+
+    def observe(self, response, *args, **kwargs) -> None:
+        """
+        Updates the remaining quota and reset time from the response headers.
+        """
+        headers = response.headers
+        with self._condition:
+            if "x-rate-limit-remaining" in headers:
+                self.remaining = int(headers["x-rate-limit-remaining"])
+                self._probe_backoff = rate_limit_probe_backoff_seconds
+            elif response.status_code == requests.codes.too_many_requests:
+                self.remaining = 0
+            if "x-rate-limit-limit" in headers:
+                self.limit = int(headers["x-rate-limit-limit"])
+            if "x-rate-limit-reset" in headers:
+                self.reset_at = self._clock() + int(headers["x-rate-limit-reset"])
+            self._condition.notify_all()
+
+    def acquire(self, num_of_names: int = 1, cancel: Optional[threading.Event] = None) -> int:
+        """
+        Reserves quota for up to num_of_names names and returns how many were granted.
+
+        Blocks while no quota is left. Raises CancelledError once `cancel` is
+        set and wake() has been called.
+        """
+        with self._condition:
+            while self.available == 0:
+                if cancel is not None and cancel.is_set():
+                    raise CancelledError()
+                if self._in_flight:
+                    self._condition.wait()
+                else:
+                    self._wait_for_reset()
+            return self._reserve(num_of_names)
+
+    def try_acquire(self, num_of_names: int = 1) -> int:
+        """
+        Reserves quota for up to num_of_names names without waiting and returns
+        how many were granted, which may be 0.
+        """
+        with self._condition:
+            self._refill_after_reset()
+            return self._reserve(num_of_names)
+
+    def release(self, num_of_names: int) -> None:
+        """
+        Returns a reservation once its response has been observed.
+        """
+        with self._condition:
+            self._in_flight -= num_of_names
+            self._condition.notify_all()
+
+    def wake(self) -> None:
+        """
+        Wakes the callers waiting in acquire() so they can check their `cancel` event.
+        """
+        with self._condition:
+            self._condition.notify_all()
+
+    def _reserve(self, num_of_names: int) -> int:
+        granted = min(num_of_names, self.available)
+        self._in_flight += granted
+        return granted
+
+    def _refill_after_reset(self) -> None:
+        if self.reset_at is not None and self._clock() >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = None
+
+    def _wait_for_reset(self) -> None:
+        reset_at = self.reset_at
+        if reset_at is None:
+            # without a reset time a refill would go straight into a 429, so back
+            # off and then probe with a single name to learn the quota
+            backoff = self._probe_backoff
+            self._probe_backoff = min(backoff * 2, rate_limit_probe_backoff_max_seconds)
+            if self._wait(backoff) and self.reset_at is None and self.remaining == 0 and not self._in_flight:
+                self.remaining = 1
+            return
+        if self._wait(max(0.0, reset_at - self._clock())) and self.reset_at == reset_at:
+            self.remaining = self.limit
+            self.reset_at = None
+
+    def _wait(self, seconds: float) -> bool:
+        """
+        Waits with the lock released and returns False if woken up early.
+        """
+        if self._sleep is None:
+            return not self._condition.wait(seconds)
+        self._condition.release()
+        try:
+            self._sleep(seconds)
+        finally:
+            self._condition.acquire()
+        return True
@@ -0,0 +1,159 @@
+import time
+import random
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+import requests
+
+from clients.metrics import client_metrics
+from constants.error_constants import ERROR_REQUEST_LIMIT_LOW
+from helpers.utils import log_request, log_response
+from settings import (
+    retry_max_attempts,
+    retry_backoff_base_seconds,
+    retry_backoff_max_seconds,
+    retry_max_reset_wait_seconds,
+    hedge_after_seconds,
+)
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+RETRY_STATUS_CODES = frozenset((500, 502, 503, 504))
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class ResilientSession(requests.Session):
+    """
+    Session that retries idempotent requests and can hedge slow ones.
+
+    Connection errors, timeouts and 5xx responses are retried with exponential
+    backoff and full jitter. A 429 "Request limit reached" waits for
+    x-rate-limit-reset when that is at most `max_reset_wait` seconds, while
+    "Request limit too low to process request" is returned as is, because the
+    same batch would be rejected again. With `hedge_after`, a second copy of a
+    request is sent when the first has not answered within that many seconds,
+    and the first response wins.
+
+    `retries` and `hedges` count the extra requests that were sent.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = retry_max_attempts,
+        backoff_base: float = retry_backoff_base_seconds,
+        backoff_max: float = retry_backoff_max_seconds,
+        max_reset_wait: float = retry_max_reset_wait_seconds,
+        hedge_after: Optional[float] = hedge_after_seconds,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random,
+    ):
+        super().__init__()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_reset_wait = max_reset_wait
+        self.hedge_after = hedge_after
+        self.retries = 0
+        self.hedges = 0
+        self._sleep = sleep
+        self._jitter = jitter
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="hedge") if hedge_after is not None else None
+
+    @property
+    def stats(self) -> dict:
+        return {"retries": self.retries, "hedges": self.hedges}
+
+    def request(self, method, url, *args, **kwargs):
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return super().request(method, url, *args, **kwargs)
+
+        attempt = 0
+        while True:
+            try:
+                response = self._send(method, url, *args, **kwargs)
+            except RETRY_EXCEPTIONS:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+            else:
+                delay = self.retry_delay(response, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    return response
+                response.close()
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            self._sleep(delay)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns the full-jitter exponential backoff before retry number attempt + 1.
+        """
+        return self._jitter() * min(self.backoff_max, self.backoff_base * 2**attempt)
+
+    def retry_delay(self, response: requests.Response, attempt: int) -> Optional[float]:
+        """
+        Returns how long to wait before retrying response, or None if it is final.
+        """
+        if response.status_code in RETRY_STATUS_CODES:
+            return self.backoff(attempt)
+        if response.status_code != requests.codes.too_many_requests:
+            return None
+        try:
+            error = response.json().get("error")
+        except ValueError:
+            error = None
+        if error == ERROR_REQUEST_LIMIT_LOW:
+            return None
+        if "x-rate-limit-reset" not in response.headers:
+            return self.backoff(attempt)
+        reset = float(response.headers["x-rate-limit-reset"])
+        return reset if reset <= self.max_reset_wait else None
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        super().close()
+
+    def _send(self, method, url, *args, **kwargs) -> requests.Response:
+        send = super().request
+        if self._executor is None:
+            return send(method, url, *args, **kwargs)
+
+        primary = self._submit(send, method, url, *args, **kwargs)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.hedges += 1
+        pending = {primary, self._submit(send, method, url, *args, **kwargs)}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            succeeded = [future for future in done if future.exception() is None]
+            if succeeded or not pending:
+                winner = (succeeded or list(done))[0]
+                for loser in (done | pending) - {winner}:
+                    loser.add_done_callback(_close_response)
+                return winner.result()
+
+    def _submit(self, fn, *args, **kwargs) -> Future:
+        # every attempt runs in a copy of the caller's context, so values bound
+        # with logger.contextualize() reach the hooks on the executor threads
+        return self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _close_response(future) -> None:
+    if future.exception() is None:
+        future.result().close()
+
+
+def create_resilient_client(**options) -> ResilientSession:
+    """
+    Creates a ResilientSession with the same logging hooks as http_api_client.
+    """
+    session = ResilientSession(**options)
+    session.hooks["response"] = [client_metrics.observe, log_request, log_response]
+    return session
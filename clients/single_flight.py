@@ -0,0 +1,158 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, TypeVar
+
+import requests
+
+from api_response_models.decoders import decode_nationalize_response
+from api_response_models.nationalize_api_models import (
+    NationalizeResponse,
+    ErrorResponse,
+)
+from clients.api_client import http_api_client
+from clients.async_api_client import AsyncNationalizeClient
+from clients.exceptions import NationalizeApiError
+from helpers.names import normalize_name
+from settings import url
+
+T = TypeVar("T")
+
+
+class _SingleFlightStats:
+
+    def __init__(self):
+        self.calls = 0
+        self.saved = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "saved": self.saved,
+            "saved_rate": self.saved / self.calls if self.calls else 0.0,
+        }
+
+
+class SingleFlight(_SingleFlightStats):
+    """
+    Runs at most one call per key at a time across threads.
+
+    A caller that arrives while a call for its key is in flight waits for that
+    call and gets its result, or its exception, instead of making its own;
+    `saved` counts those callers. Once the call is done, the next caller for
+    the key starts a new one, so nothing is served after the fact.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.saved += 1
+                leader = False
+            else:
+                future = self._in_flight[key] = Future()
+                leader = True
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+
+class AsyncSingleFlight(_SingleFlightStats):
+    """
+    asyncio version of SingleFlight, for tasks of one event loop.
+
+    The call runs in its own task, so a waiter that is cancelled, the first
+    one included, does not cancel the call for the others.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None and not task.done():
+            self.saved += 1
+        else:
+            task = self._in_flight[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+
+def _parse(status_code: int, content: bytes) -> NationalizeResponse:
+    if status_code != requests.codes.ok:
+        raise NationalizeApiError(status_code, ErrorResponse.model_validate_json(content).error)
+    return decode_nationalize_response(content)
+
+
+def _with_name(prediction: NationalizeResponse, name: str) -> NationalizeResponse:
+    return prediction if prediction.name == name else prediction.model_copy(update={"name": name})
+
+
+class SingleFlightNationalizeClient:
+    """
+    Looks up single names so that concurrent lookups of the same normalized
+    name, from any thread, share one name request and one unit of quota.
+
+    Every caller gets the parsed NationalizeResponse with its own spelling of
+    the name, or the NationalizeApiError of the shared request.
+    """
+
+    def __init__(self, session: requests.Session = http_api_client, base_url: str = url):
+        self.single_flight = SingleFlight()
+        self._session = session
+        self._base_url = base_url
+
+    @property
+    def stats(self) -> dict:
+        return self.single_flight.stats
+
+    def predict(self, name: str) -> NationalizeResponse:
+        prediction = self.single_flight.do(normalize_name(name), lambda: self._fetch(name))
+        return _with_name(prediction, name)
+
+    def _fetch(self, name: str) -> NationalizeResponse:
+        response = self._session.get(url=self._base_url, params={"name": name})
+        return _parse(response.status_code, response.content)
+
+
+class AsyncSingleFlightNationalizeClient:
+    """
+    SingleFlightNationalizeClient for asyncio tasks, on top of an AsyncNationalizeClient.
+    """
+
+    def __init__(self, client: AsyncNationalizeClient):
+        self.single_flight = AsyncSingleFlight()
+        self._client = client
+
+    @property
+    def stats(self) -> dict:
+        return self.single_flight.stats
+
+    async def predict(self, name: str) -> NationalizeResponse:
+        prediction = await self.single_flight.do(normalize_name(name), lambda: self._fetch(name))
+        return _with_name(prediction, name)
+
+    async def _fetch(self, name: str) -> NationalizeResponse:
+        response = await self._client.get(params={"name": name})
+        return _parse(response.status_code, response.content)
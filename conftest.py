@@ -1,19 +1,157 @@
 import pytest
+import json
 import logging
 import os
-import responses
 from functools import partial
 from pathlib import Path
 from loguru import logger
-from responses import RequestsMock
 from _pytest.logging import caplog as _caplog
 
-from settings import url
-from mocks.mocks import generate_nationalize_api_mock_responses
+from helpers.log_sink import PerTestLogSink, add_per_test_log_sink
+from helpers.quota_budget import QuotaBudget
+from helpers.utils import LOG_MODES, log_config
+from settings import url, cassette_path, benchmark_output, benchmark_regression_threshold
+from clients.api_client import http_api_client
+from clients.metrics import client_metrics
+from test_data.test_data import reset_fake_data_pool
+
+# the mock machinery (responses, Faker, numpy payloads) is imported by the
+# fixtures and options that use it, so collection and startup stay fast
+
+pytest_plugins = ["pytester"]
+
+test_log_sink = PerTestLogSink()
 
 
 def pytest_addoption(parser):
     parser.addoption("--use-real-api", action="store_true", help="Use real API instead of mock responses")
+    parser.addoption("--real-api-quota-budget", type=int, default=None, help="Names the whole run may spend on the real API, split evenly between xdist workers")
+    parser.addoption("--cassette-mode", default=None, choices=("record", "replay"), help="Record real API responses into a cassette or replay them instead of mock responses")
+    parser.addoption("--cassette-path", default=cassette_path, help="Cassette to record to or replay from")
+    parser.addoption("--mock-quota-file", default=None, help="Share the mock rate limit quotas between processes through this file")
+    parser.addoption("--mock-quota-per-worker", action="store_true", help="Keep the mock rate limit quotas of every xdist worker apart in --mock-quota-file")
+    parser.addoption("--test-data-seed", type=int, default=None, help="Seed the fake test data so that a run can be reproduced")
+    parser.addoption("--api-log-mode", default=None, choices=LOG_MODES, help="Log all, only error, only slow or no API requests")
+    parser.addoption("--api-log-sample-rate", type=float, default=None, help="Share of API requests that are logged")
+    parser.addoption("--api-log-json", action="store_true", help="Write API request logs as json lines")
+    parser.addoption("--client-metrics-output", default=None, help="Write the API client metrics to this file, as json if it ends with .json and in the Prometheus text format otherwise")
+    parser.addoption("--benchmark-output", default=benchmark_output, help="Write benchmark results to this json file")
+    parser.addoption("--benchmark-baseline", default=None, help="Compare benchmark results against this json file")
+    parser.addoption("--benchmark-threshold", type=float, default=benchmark_regression_threshold, help="Allowed relative slowdown against the baseline")
+
+
+def pytest_configure(config):
+    if config.option.collectonly:
+        # nothing runs, so there is nothing to put in the html report
+        config.option.htmlpath = None
+
+    # one long-lived sink per process instead of a new file sink per test
+    logger.remove()
+    config.test_log_handler = add_per_test_log_sink(test_log_sink)
+    logger.enable("my_package")
+
+    if config.getoption("--test-data-seed") is not None:
+        reset_fake_data_pool(seed=config.getoption("--test-data-seed"))
+    if config.getoption("--api-log-mode"):
+        log_config.configure(mode=config.getoption("--api-log-mode"))
+    if config.getoption("--api-log-sample-rate") is not None:
+        log_config.configure(sample_rate=config.getoption("--api-log-sample-rate"))
+    if config.getoption("--api-log-json"):
+        log_config.configure(json_lines=True)
+    mock_quota_file = config.getoption("--mock-quota-file")
+    if mock_quota_file:
+        from mocks.mocks import set_mock_quota_store
+        from mocks.quota_store import FileQuotaStore
+
+        # in-memory quotas are per process already, so only the file is partitioned
+        partition = os.environ.get("PYTEST_XDIST_WORKER") if config.getoption("--mock-quota-per-worker") else None
+        set_mock_quota_store(FileQuotaStore(mock_quota_file, partition=partition))
+
+    # rate limit tests are kept on one worker, see pytest_collection_modifyitems
+    if getattr(config.option, "dist", "no") == "load":
+        config.option.dist = "loadgroup"
+    if getattr(config, "workerinput", {}).get("loadgroup"):
+        config.option.loadgroup = True
+
+    config.quota_budget = None
+    if config.getoption("--use-real-api") and config.getoption("--real-api-quota-budget") is not None:
+        config.quota_budget = QuotaBudget(config.getoption("--real-api-quota-budget"))
+        http_api_client.hooks["response"].append(config.quota_budget.charge)
+
+    config.cassette = None
+    if config.getoption("--cassette-mode") == "record":
+        from mocks.cassette import CassetteRecorder
+
+        config.cassette = CassetteRecorder(config.getoption("--cassette-path"))
+        http_api_client.hooks["response"].append(config.cassette.record)
+    elif config.getoption("--cassette-mode") == "replay":
+        from mocks.cassette import Cassette
+
+        config.cassette = Cassette(config.getoption("--cassette-path"))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    # workers parse the original command line, so tell them the distribution mode
+    node.workerinput["loadgroup"] = node.config.option.dist == "loadgroup"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        if item.get_closest_marker("rate_limit"):
+            item.add_marker(pytest.mark.xdist_group("rate_limit"))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    snapshot = getattr(node, "workeroutput", {}).get("client_metrics")
+    if snapshot:
+        client_metrics.merge(snapshot)
+
+
+def pytest_sessionfinish(session):
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        # xdist workers hand their metrics to the controller, see pytest_testnodedown
+        workeroutput["client_metrics"] = client_metrics.snapshot()
+        return
+    output = session.config.getoption("--client-metrics-output")
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        if output.endswith(".json"):
+            Path(output).write_text(json.dumps(client_metrics.snapshot(), indent=2))
+        else:
+            Path(output).write_text(client_metrics.to_prometheus())
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not client_metrics.requests:
+        return
+    snapshot = client_metrics.snapshot()
+    histograms = snapshot["histograms"]
+    terminalreporter.section("api client metrics")
+    terminalreporter.write_line(
+        f"requests: {snapshot['requests']}  status codes: "
+        + ", ".join(f"{code}={count}" for code, count in sorted(snapshot["status_codes"].items()))
+    )
+    terminalreporter.write_line(f"{'metric':16} {'count':>7} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for name, histogram in histograms.items():
+        if histogram["count"]:
+            terminalreporter.write_line(
+                f"{name:16} {histogram['count']:7} {histogram['p50']:10.4g} "
+                f"{histogram['p95']:10.4g} {histogram['p99']:10.4g}"
+            )
+    if snapshot["rate_limit_remaining_min"] is not None:
+        terminalreporter.write_line(f"lowest x-rate-limit-remaining: {snapshot['rate_limit_remaining_min']}")
+
+
+def pytest_unconfigure(config):
+    test_log_sink.close()
+    logger.remove(config.test_log_handler)
+    if getattr(config, "cassette", None):
+        config.cassette.close()
+
 
 @pytest.fixture
 def caplog(_caplog):
@@ -47,12 +185,13 @@ def write_logs(request):
     log_path.mkdir(parents=True, exist_ok=True)
 
     # append last part of the name
-    log_path /= name
+    log_path = str(log_path / name)
 
-    # enable the logger
-    logger.remove()
-    logger.configure(handlers=[{"sink": log_path, "level": "TRACE", "mode": "w"}])
-    logger.enable("my_package")
+    # route the records of this test to its own file, see pytest_configure
+    test_log_sink.start(log_path)
+    with logger.contextualize(test_log_path=log_path):
+        yield
+    test_log_sink.finish(log_path)
 
 @pytest.fixture(scope="function")
 def mock_responses(request):
@@ -65,19 +204,89 @@ def mock_responses(request):
   except ValueError:
     pass
 
-  if not use_real_api:  
+  cassette_mode = request.config.getoption("--cassette-mode")
+
+  import responses
+  import mocks.mocks
+  from responses import RequestsMock
+
+  if cassette_mode == "replay":
+    with RequestsMock() as m:
+      m.add_callback(
+          method=responses.GET,
+          url=url,
+          callback=request.config.cassette.replay,
+          content_type="application/json",
+      )
+      yield m
+  elif not use_real_api and cassette_mode != "record":  
+    mocks.mocks.mock_quota_store.reset(request.node.name)
     with RequestsMock() as m:
       m.add_callback(
           method=responses.GET,
           url=url,  
           callback=partial(
-              generate_nationalize_api_mock_responses,
+              mocks.mocks.generate_nationalize_api_mock_responses,
               test_name=request.node.name
           ),
           content_type="application/json",
       )
       yield m
   else:  
+    budget = request.config.quota_budget
+    if budget is not None and budget.left == 0:
+      pytest.skip("the real API quota budget of this worker is used up")
     yield None  
 
 
+@pytest.fixture(scope="function")
+def async_mock_transport(request):
+  """
+  Creates an in-process httpx transport with mock responses (if enabled) for the async client.
+  """
+  use_real_api = None
+  try:
+    use_real_api = request.config.getoption("--use-real-api")
+  except ValueError:
+    pass
+
+  if not use_real_api:
+    import mocks.mocks
+
+    mocks.mocks.mock_quota_store.reset(request.node.name)
+    yield mocks.mocks.generate_nationalize_api_mock_transport(test_name=request.node.name)
+  else:
+    yield None
+
+
+@pytest.fixture(scope="session")
+def mock_server():
+  """
+  Starts a local mock Nationalize API server on a free port for the test session.
+  """
+  from mocks.server import MockNationalizeServer
+
+  server = MockNationalizeServer(port=0)
+  server.start_in_thread()
+  yield server
+  server.stop()
+
+
+@pytest.fixture(scope="function")
+def local_mock_server(request):
+  """
+  Starts a local mock Nationalize API server with its own quota for one test.
+  The latency and quota limit can be set with an indirect param, e.g. {"latency": 0.2, "limit": 25}.
+  """
+  from mocks.quota_store import QuotaStore
+  from mocks.server import MockNationalizeServer
+
+  options = getattr(request, "param", {})
+  server = MockNationalizeServer(
+      port=0,
+      latency=options.get("latency", 0),
+      quota_store=QuotaStore(limit=options.get("limit", 10**9)),
+  )
+  server.start_in_thread()
+  yield server
+  server.stop()
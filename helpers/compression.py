@@ -0,0 +1,85 @@
+import gzip
+import zlib
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Dict, Optional, Tuple
+
+from settings import compression_level
+
+
+@lru_cache(maxsize=None)
+def available_encodings() -> Tuple[str, ...]:
+    """
+    Returns the content codings this process can encode and decode, best first.
+
+    br and zstd need the optional brotli and zstandard packages, which are the
+    ones requests (through urllib3) and httpx decode them with.
+    """
+    optional = [
+        encoding
+        for encoding, module in (("zstd", "zstandard"), ("br", "brotli"))
+        if find_spec(module) is not None
+    ]
+    return (*optional, "gzip", "deflate")
+
+
+def accept_encoding_header() -> str:
+    return ", ".join(available_encodings())
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Returns the q-value of every coding in an Accept-Encoding header.
+    """
+    qualities = {}
+    for item in header.split(","):
+        coding, *parameters = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def negotiate_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    Returns the available coding the Accept-Encoding header prefers, or None
+    for the identity coding. Ties go to the better compression.
+    """
+    if not header:
+        return None
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get("*", 0.0)
+    candidates = [
+        (qualities.get(encoding, wildcard), -rank, encoding)
+        for rank, encoding in enumerate(available_encodings())
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+def encode_body(body: bytes, encoding: str) -> bytes:
+    """
+    Compresses a body with one of the available_encodings().
+    """
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=compression_level, mtime=0)
+    if encoding == "deflate":
+        # HTTP deflate is the zlib format, not a raw deflate stream
+        return zlib.compress(body, compression_level)
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(body)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress(body)
+    raise ValueError(f"unsupported content coding: {encoding}")
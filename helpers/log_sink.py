@@ -0,0 +1,98 @@
+import os
+import gzip
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from helpers.utils import log_config
+from settings import test_log_flush_records, test_log_compress
+
+TEXT_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}\n{exception}"
+JSON_LINES_FORMAT = "{message}\n{exception}"
+
+
+def log_format(record) -> str:
+    """
+    Picks the format per record, so that log_config.json_lines can change between tests.
+    """
+    return JSON_LINES_FORMAT if log_config.json_lines else TEXT_FORMAT
+
+
+class PerTestLogSink:
+    """
+    loguru sink that writes every record to the log file of the test it belongs to.
+
+    The file is taken from the `test_log_path` bound with logger.contextualize(),
+    falling back to the test started last for records of threads that do not
+    share the test's context. Files are buffered and flushed every
+    `flush_every` records. Finished files are gzipped in a background thread.
+
+    Register write() once per process with enqueue=True, so that the files are
+    written by loguru's worker thread instead of the test.
+    """
+
+    def __init__(
+        self,
+        flush_every: int = test_log_flush_records,
+        compress: bool = test_log_compress,
+    ):
+        self.flush_every = flush_every
+        self.compress = compress
+        self.current: Optional[str] = None
+        self._files: Dict[str, List] = {}
+        self._lock = threading.Lock()
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+
+    def start(self, path: str) -> None:
+        self.current = path
+
+    def write(self, message) -> None:
+        path = message.record["extra"].get("test_log_path", self.current)
+        if path is None:
+            return
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None:
+                entry = self._files[path] = [open(path, "w", encoding="utf-8", buffering=1 << 16), 0]
+            entry[0].write(message)
+            entry[1] += 1
+            if entry[1] >= self.flush_every:
+                entry[0].flush()
+                entry[1] = 0
+
+    def finish(self, path: str) -> None:
+        """
+        Closes the file of a finished test once its queued records are written.
+        """
+        logger.complete()
+        with self._lock:
+            entry = self._files.pop(path, None)
+        if self.current == path:
+            self.current = None
+        if entry is None:
+            return
+        entry[0].close()
+        if self.compress:
+            self._compressor.submit(_compress, path)
+
+    def close(self) -> None:
+        logger.complete()
+        for path in list(self._files):
+            self.finish(path)
+        self._compressor.shutdown(wait=True)
+
+
+def _compress(path: str) -> None:
+    with open(path, "rb") as source, gzip.open(path + ".gz", "wb", compresslevel=6) as target:
+        shutil.copyfileobj(source, target)
+    os.remove(path)
+
+
+def add_per_test_log_sink(sink: PerTestLogSink, level: str = "TRACE") -> int:
+    """
+    Registers sink with loguru behind a queue and returns the handler id.
+    """
+    return logger.add(sink.write, level=level, format=log_format, enqueue=True)
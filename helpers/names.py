@@ -0,0 +1,62 @@
+import unicodedata
+from typing import Dict, Iterable, List, Mapping, TypeVar
+
+T = TypeVar("T")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a name with Unicode NFKC, case folding and whitespace collapsing,
+    so that "Smith", "smith " and "ＳＭＩＴＨ" share one key.
+    """
+    if not name.isascii():
+        # case folding can undo NFKC, e.g. for "ǰ", so normalize on both sides of it
+        name = unicodedata.normalize("NFKC", unicodedata.normalize("NFKC", name).casefold())
+    return " ".join(name.split()).casefold()
+
+
+class NameIndex:
+    """
+    Hash index that collapses names with the same normalized key.
+
+    `unique` holds the first spelling of every key in input order, which is
+    what gets sent. fan_out() maps the results for the unique names back onto
+    every original input.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self.unique: List[str] = []
+        self.keys: List[str] = []
+        self._first: Dict[str, str] = {}
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> str:
+        """
+        Adds an input and returns its key.
+        """
+        key = normalize_name(name)
+        self.names.append(name)
+        self.keys.append(key)
+        if key not in self._first:
+            self._first[key] = name
+            self.unique.append(name)
+        return key
+
+    def __len__(self) -> int:
+        return len(self.unique)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self._first
+
+    @property
+    def duplicates(self) -> int:
+        return len(self.names) - len(self.unique)
+
+    def fan_out(self, results: Mapping[str, T]) -> List[T]:
+        """
+        Returns the result of every input in order, from results keyed by unique name or by key.
+        """
+        by_key = {normalize_name(name): result for name, result in results.items()}
+        return [by_key[key] for key in self.keys]
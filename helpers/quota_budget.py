@@ -0,0 +1,35 @@
+import os
+import threading
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+
+class QuotaBudget:
+    """
+    Share of a global real API quota budget that this pytest-xdist worker may spend.
+
+    The budget is split evenly between the workers. Use charge() as a response
+    hook: every successful response spends one name per requested name.
+    """
+
+    def __init__(self, total: int, workers: Optional[int] = None):
+        if workers is None:
+            workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", 1))
+        self.total = total
+        self.share = total // workers
+        self.used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def left(self) -> int:
+        return max(0, self.share - self.used)
+
+    def charge(self, response, *args, **kwargs) -> None:
+        if response.status_code != requests.codes.ok:
+            return
+        params = parse_qs(urlsplit(response.request.url).query)
+        num_of_names = len(params.get("name[]", [])) or len(params.get("name", []))
+        with self._lock:
+            self.used += num_of_names
@@ -6,6 +6,10 @@ from api_response_models.nationalize_api_models import (
     NationalizeResponse,
     ErrorResponse,
 )
+from api_response_models.decoders import (
+    PredictionIndex,
+    decode_nationalize_response,
+)
 from settings import url, x_rate_limit_limit_free_tier
 from clients.api_client import http_api_client
 from test_data.test_data import generate_fake_last_names
@@ -93,16 +97,17 @@ def assert_common_success_batch_usage_response_json(data: NationalizeResponse):
     assert len(data.country) > 0, f"country list does not have any data for {data.name}"
 
 
-def assert_all_names_are_in_response(response: Response, names):
+def assert_all_names_are_in_response(response: Response | PredictionIndex, names):
     """
-    Asserts the names are present in success batch response.
+    Asserts the names are present in success batch response, spelled exactly as requested.
+    Accepts a response or an already decoded PredictionIndex.
 
     """
 
-    for name in names:
-        assert any(
-            item["name"] == name for item in response.json()
-        ), f"Name '{name}' not found in response"
+    index = response if isinstance(response, PredictionIndex) else PredictionIndex.from_json(response.content)
+    response_names = {prediction.name for prediction in index}
+    missing = [name for name in names if name not in response_names]
+    assert not missing, f"Names {missing} not found in response"
 
 
 def assert_common_success_response(response, params):
@@ -115,7 +120,7 @@ def assert_common_success_response(response, params):
     assert_common_headers(response=response, expected_rate_limit_headers=True)
 
     try:
-        data = NationalizeResponse(**response.json())
+        data = decode_nationalize_response(response.content)
         assert_common_success_response_json(data=data, name=params["name"])
     except ValidationError as e:
         assert False, f"Pydantic validation failed: {e}"
@@ -148,3 +153,20 @@ def send_n_number_of_batch_requests(count, num_of_names):
 
         response = http_api_client.get(url=url, params=params)
         assert response.status_code == requests.codes.ok
+
+
+class FakeClock:
+    """
+    Clock and sleep for schedulers under test: sleeping advances the time at once and is recorded.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
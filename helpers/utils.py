@@ -1,13 +1,159 @@
+import json
+import random
+import re
+from typing import Optional
+
 from loguru import logger
 
+from settings import (
+    log_mode,
+    log_sample_rate,
+    log_body_max_bytes,
+    log_slow_threshold_seconds,
+    log_json,
+)
+
+LOG_MODES = ("all", "errors", "slow", "off")
+
+_APIKEY_PARAM = re.compile(r"([?&]apikey=)[^&#]*")
+
+
+class LogConfig:
+    """
+    Settings of the request/response logging hooks, initialized from settings.py.
+
+    mode is one of "all", "errors" (status >= 400), "slow" (elapsed above
+    slow_threshold) or "off". sample_rate is the share of the remaining
+    exchanges that are logged. Bodies are cut to body_max_bytes.
+    """
+
+    def __init__(
+        self,
+        mode: str = log_mode,
+        sample_rate: float = log_sample_rate,
+        body_max_bytes: int = log_body_max_bytes,
+        slow_threshold: float = log_slow_threshold_seconds,
+        json_lines: bool = log_json,
+    ):
+        self.configure(
+            mode=mode,
+            sample_rate=sample_rate,
+            body_max_bytes=body_max_bytes,
+            slow_threshold=slow_threshold,
+            json_lines=json_lines,
+        )
+
+    def configure(self, **options) -> None:
+        if options.get("mode", LOG_MODES[0]) not in LOG_MODES:
+            raise ValueError(f"log mode should be one of {LOG_MODES}")
+        for key, value in options.items():
+            setattr(self, key, value)
+
+
+log_config = LogConfig()
+
+
+def should_log(response) -> bool:
+    """
+    Decides once per response whether its request and response are logged.
+    """
+    decision = getattr(response, "_should_log", None)
+    if decision is None:
+        decision = _should_log(response)
+        response._should_log = decision
+    return decision
+
+
+def _should_log(response) -> bool:
+    if log_config.mode == "off":
+        return False
+    if log_config.mode == "errors" and response.status_code < 400:
+        return False
+    if log_config.mode == "slow":
+        elapsed = _elapsed_seconds(response)
+        if elapsed is None or elapsed < log_config.slow_threshold:
+            return False
+    return log_config.sample_rate >= 1 or random.random() < log_config.sample_rate
+
+
+def _elapsed_seconds(response) -> Optional[float]:
+    try:
+        return response.elapsed.total_seconds()
+    except RuntimeError:
+        # httpx only sets elapsed once a streamed response is closed, after the hooks
+        return None
+
+
+def truncate_body(body) -> str:
+    """
+    Decodes at most body_max_bytes of a body, without charset detection.
+    """
+    if body is None:
+        return ""
+    if isinstance(body, str):
+        body = body.encode()
+    text = body[: log_config.body_max_bytes].decode("utf-8", "replace")
+    if len(body) > log_config.body_max_bytes:
+        text += f"... ({len(body)} bytes)"
+    return text
+
+
+def redact_url(url) -> str:
+    """
+    Masks the apikey query parameter of a url, so keys do not end up in logs.
+    """
+    return _APIKEY_PARAM.sub(r"\1***", str(url))
+
+
+def _log_request(response, body) -> None:
+    request = response.request
+    if log_config.json_lines:
+        logger.opt(lazy=True).debug(
+            "{}",
+            lambda: json.dumps(
+                {
+                    "type": "request",
+                    "method": request.method,
+                    "url": redact_url(request.url),
+                    "headers": dict(request.headers),
+                    "body": truncate_body(body),
+                }
+            ),
+        )
+        return
+    logger.opt(lazy=True).debug("Request: {} {}", lambda: request.method, lambda: redact_url(request.url))
+    logger.opt(lazy=True).debug("Headers: {}", lambda: request.headers)
+    logger.opt(lazy=True).debug("Body: {}", lambda: truncate_body(body))
+
+
+def _log_response(response, streamed: bool = False) -> None:
+    body = (lambda: "(streamed)") if streamed else (lambda: truncate_body(response.content))
+    if log_config.json_lines:
+        logger.opt(lazy=True).debug(
+            "{}",
+            lambda: json.dumps(
+                {
+                    "type": "response",
+                    "status_code": response.status_code,
+                    "elapsed": _elapsed_seconds(response),
+                    "headers": dict(response.headers),
+                    "body": body(),
+                }
+            ),
+        )
+        return
+    logger.opt(lazy=True).debug("Response Status Code: {}", lambda: response.status_code)
+    logger.opt(lazy=True).debug("Response Headers: {}", lambda: response.headers)
+    logger.opt(lazy=True).debug("Response Body: {}", body)
+
+
 def log_request(response, *args, **kwargs):
     """
     logs the request url, headers, body
 
     """
-    logger.debug(f"Request: {response.request.method} {response.request.url}")
-    logger.debug(f"Headers: {response.request.headers}")
-    logger.debug(f"Body: {response.request.body}")
+    if should_log(response):
+        _log_request(response, response.request.body)
 
 
 def log_response(response, *args, **kwargs):
@@ -15,6 +161,30 @@ def log_response(response, *args, **kwargs):
     logs the response status code, headers, body
 
     """
-    logger.debug(f"Response Status Code: {response.status_code}")
-    logger.debug(f"Response Headers: {response.headers}")
-    logger.debug(f"Response Body: {response.text}")
\ No newline at end of file
+    if should_log(response):
+        _log_response(response, streamed=kwargs.get("stream", False))
+
+
+async def async_log_request(response):
+    """
+    logs the request url, headers, body of an httpx response
+
+    """
+    streamed = response.request.extensions.get("stream", False)
+    if log_config.mode == "slow" and not streamed:
+        # elapsed is only known once the body has been read
+        await response.aread()
+    if should_log(response):
+        _log_request(response, response.request.content)
+
+
+async def async_log_response(response):
+    """
+    logs the response status code, headers, body of an httpx response
+
+    """
+    streamed = response.request.extensions.get("stream", False)
+    if should_log(response):
+        if not streamed:
+            await response.aread()
+        _log_response(response, streamed=streamed)
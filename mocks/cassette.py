@@ -0,0 +1,229 @@
+import os
+import mmap
+import struct
+import hashlib
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import orjson
+import requests
+
+from mocks.mocks import parse_request_params
+
+INDEX_MAGIC = b"NCAS"
+INDEX_VERSION = 2
+# magic, version, capacity, entries, size of the data file the index covers
+INDEX_HEADER = struct.Struct("<4sIQQQ")
+INDEX_SLOT = struct.Struct("<QQI")
+IGNORED_PARAMS = ("apikey",)
+# the body is stored decoded, so transport headers of the original response would be wrong on replay
+DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection")
+
+
+def cassette_key(params: dict, occurrence: int = 0) -> Tuple[bytes, int]:
+    """
+    Returns the canonical key of a request and its 64-bit hash.
+
+    Keys are built from the sorted params without the api key. `occurrence`
+    tells repeated identical requests apart.
+    """
+    canonical = sorted(
+        (key, value if isinstance(value, list) else [value])
+        for key, value in params.items()
+        if key not in IGNORED_PARAMS
+    )
+    key = orjson.dumps([canonical, occurrence])
+    return key, _key_hash(key)
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+def request_params(request) -> dict:
+    return parse_request_params(urlsplit(request.url).query)
+
+
+def _paths(path: str) -> Tuple[str, str]:
+    return path + ".data", path + ".index"
+
+
+def _read_records(data_path: str) -> Tuple[Dict[int, Tuple[int, int]], int]:
+    """
+    Scans a data file and returns the hash -> (offset, length) entries of its
+    records, later records of a key replacing earlier ones, and the size of
+    the data file. A record cut short by a crash is skipped.
+    """
+    entries = {}
+    offset = 0
+    if not os.path.exists(data_path):
+        return entries, offset
+    with open(data_path, "rb") as f:
+        for line in f:
+            record = line.rstrip(b"\n")
+            try:
+                key = orjson.loads(record)["key"].encode()
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                key = None
+            if key is not None:
+                entries[_key_hash(key)] = (offset, len(record))
+            offset += len(line)
+    return entries, offset
+
+
+def _index_is_current(index_path: str, data_path: str) -> bool:
+    try:
+        with open(index_path, "rb") as f:
+            header = f.read(INDEX_HEADER.size)
+    except FileNotFoundError:
+        return False
+    if len(header) < INDEX_HEADER.size:
+        return False
+    magic, version, _, _, data_size = INDEX_HEADER.unpack(header)
+    return magic == INDEX_MAGIC and version == INDEX_VERSION and data_size == os.path.getsize(data_path)
+
+
+class CassetteRecorder:
+    """
+    Records real responses into a cassette: an append-only data file of json
+    records, one per line, plus an open-addressing hash index that is written
+    on close().
+
+    Opening a cassette rebuilds its entries from the data file, so a record
+    run that crashed before close() loses nothing but its last, partly
+    written record. Recording into an existing cassette appends to it:
+    occurrences count from 0 again, so a request recorded again replaces its
+    earlier recording in order, and entries that are not recorded again are
+    kept.
+
+    Use record() as a requests response hook.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        data_path, _ = _paths(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._entries, size = _read_records(data_path)
+        self._data = open(data_path, "ab")
+        if size and not _ends_with_newline(data_path):
+            # ends a record cut short by a crash, so it stays a line of its own
+            self._data.write(b"\n")
+        self._occurrences = Counter()
+
+    def record(self, response, *args, **kwargs) -> None:
+        params = request_params(response.request)
+        base_key, _ = cassette_key(params)
+        occurrence = self._occurrences[base_key]
+        self._occurrences[base_key] += 1
+        key, key_hash = cassette_key(params, occurrence)
+
+        record = orjson.dumps(
+            {
+                "key": key.decode(),
+                "status": response.status_code,
+                "headers": {
+                    key: value
+                    for key, value in response.headers.items()
+                    if key.lower() not in DROPPED_HEADERS
+                },
+                "body": response.content.decode("utf-8"),
+            }
+        )
+        offset = self._data.tell()
+        self._data.write(record + b"\n")
+        # a crashed run keeps every record it wrote
+        self._data.flush()
+        self._entries[key_hash] = (offset, len(record))
+
+    def close(self) -> None:
+        data_size = self._data.tell()
+        self._data.close()
+        capacity = 1
+        while capacity < len(self._entries) * 2:
+            capacity *= 2
+        index = bytearray(INDEX_HEADER.size + capacity * INDEX_SLOT.size)
+        INDEX_HEADER.pack_into(index, 0, INDEX_MAGIC, INDEX_VERSION, capacity, len(self._entries), data_size)
+        for key_hash, (offset, length) in self._entries.items():
+            slot = key_hash & (capacity - 1)
+            while INDEX_SLOT.unpack_from(index, INDEX_HEADER.size + slot * INDEX_SLOT.size)[0]:
+                slot = (slot + 1) & (capacity - 1)
+            INDEX_SLOT.pack_into(index, INDEX_HEADER.size + slot * INDEX_SLOT.size, key_hash, offset, length)
+
+        _, index_path = _paths(self.path)
+        with open(index_path + ".tmp", "wb") as f:
+            f.write(index)
+        os.replace(index_path + ".tmp", index_path)
+
+
+def _ends_with_newline(data_path: str) -> bool:
+    with open(data_path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class Cassette:
+    """
+    Replays a recorded cassette. Both files are memory-mapped, so opening is
+    O(1) no matter how many entries there are, and every lookup is one
+    expected O(1) probe of the hash index.
+
+    An index that is missing or does not cover the whole data file, e.g.
+    after a record run that crashed, is rebuilt from the data file first.
+    """
+
+    def __init__(self, path: str):
+        data_path, index_path = _paths(path)
+        if not os.path.exists(data_path):
+            raise FileNotFoundError(f"no cassette recorded at {path}")
+        if not _index_is_current(index_path, data_path):
+            CassetteRecorder(path).close()
+        with open(index_path, "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, self._capacity, self.size, _ = INDEX_HEADER.unpack_from(self._index, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{index_path} is not a cassette index")
+        with open(data_path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._occurrences = Counter()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def close(self) -> None:
+        self._index.close()
+        if self.size:
+            self._data.close()
+
+    def lookup(self, params: dict, occurrence: int = 0) -> Optional[dict]:
+        key, key_hash = cassette_key(params, occurrence)
+        slot = key_hash & (self._capacity - 1)
+        while True:
+            slot_hash, offset, length = INDEX_SLOT.unpack_from(
+                self._index, INDEX_HEADER.size + slot * INDEX_SLOT.size
+            )
+            if not slot_hash:
+                return None
+            if slot_hash == key_hash:
+                record = orjson.loads(self._data[offset : offset + length])
+                if record["key"] == key.decode():
+                    return record
+            slot = (slot + 1) & (self._capacity - 1)
+
+    def replay(self, request) -> tuple:
+        """
+        responses callback that serves the recorded response of a request.
+
+        Repeated identical requests are served in recorded order, and the
+        first recording is reused once they run out.
+        """
+        params = request_params(request)
+        base_key, _ = cassette_key(params)
+        occurrence = self._occurrences[base_key]
+        self._occurrences[base_key] += 1
+        record = self.lookup(params, occurrence) or self.lookup(params)
+        if record is None:
+            raise requests.exceptions.ConnectionError(
+                f"No cassette entry for {request.url}", request=request
+            )
+        return record["status"], record["headers"], record["body"]
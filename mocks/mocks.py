@@ -1,48 +1,40 @@
-import os
-import random
-import json
-from faker import Faker
-from settings import x_rate_limit_limit_free_tier
+import asyncio
+from itertools import groupby
+from types import SimpleNamespace
+from typing import Optional
+from urllib.parse import parse_qsl
+
+import httpx
+import orjson
+from constants.error_constants import ERROR_MISSING_NAME, ERROR_INVALID_NAME
+from helpers.compression import encode_body, negotiate_encoding
+from mocks.payloads import generate_batch_payload, generate_single_payload
+from mocks.quota_store import Quota, QuotaStore
+from settings import max_batch_size, mock_compress_min_bytes
 from test_data.test_data import (
-    generate_random_number,
+    get_fake_data_pool,
     get_current_date_header,
     generate_random_request_id,
 )
 
-DEFAULT_INITIAL_LIMIT = x_rate_limit_limit_free_tier
-PREFIX = "rate_limit_remaining"
+mock_quota_store = QuotaStore()
 
 
-def get_remaining_requests(
-    os_var_name_rate_limit_count: str, initial_limit: int = 100, num_of_names: int = 1
-) -> int:
+def set_mock_quota_store(quota_store: QuotaStore) -> None:
     """
-    Returns the remaining requests after deduction.
+    Replaces the quota store used by the mock, e.g. with a FileQuotaStore shared between processes.
     """
-    remaining = int(os.environ.get(os_var_name_rate_limit_count, initial_limit))
-    remaining -= num_of_names
-    os.environ[os_var_name_rate_limit_count] = str(remaining)
-    return max(0, remaining)
+    global mock_quota_store
+    mock_quota_store = quota_store
 
 
-def generate_mock_headers(
-    os_var_name_rate_limit_count: str,
-    initial_limit: str = DEFAULT_INITIAL_LIMIT,
-    num_of_names: int = 1,
-    is_error: bool = False,
-) -> dict:
+def generate_mock_headers(quota: Quota, is_error: bool = False) -> dict:
     """
     Generates mock headers for both successful and error responses.
     """
     if is_error:
-        remaining_requests = os.environ.get(
-            os_var_name_rate_limit_count, DEFAULT_INITIAL_LIMIT
-        )
         content_type = "application/json"
     else:
-        remaining_requests = get_remaining_requests(
-            os_var_name_rate_limit_count, initial_limit, num_of_names
-        )
         content_type = "application/json; charset=utf-8"
     return {
         "Server": "mock-server",
@@ -53,9 +45,22 @@ def generate_mock_headers(
         "access-control-allow-origin": "*",
         "access-control-expose-headers": "x-rate-limit-limit,x-rate-limit-remaining,x-rate-limit-reset",
         "cache-control": "max-age=0, private, must-revalidate",
-        "x-rate-limit-limit": str(initial_limit),
-        "x-rate-limit-remaining": str(remaining_requests),
-        "x-rate-limit-reset": "44716",
+        "x-rate-limit-limit": str(quota.limit),
+        "x-rate-limit-remaining": str(quota.remaining),
+        "x-rate-limit-reset": str(quota.reset),
+        "x-request-id": generate_random_request_id(),
+    }
+
+
+def generate_mock_validation_error_headers() -> dict:
+    """
+    Generates mock headers for validation error responses, which carry no rate limit headers.
+    """
+    return {
+        "Server": "mock-server",
+        "Content-Type": "application/json",
+        "Date": get_current_date_header(),
+        "Connection": "keep-alive",
         "x-request-id": generate_random_request_id(),
     }
 
@@ -66,81 +71,102 @@ def generate_random_country_probabilities(
     """
     Generates random country probabilities.
     """
-    faker = Faker()
+    pool = get_fake_data_pool()
     country_codes_with_probability = [
         {
-            "country_id": faker.country_code(),
-            "probability": round(random.uniform(0, 1.0), decimal_places),
+            "country_id": pool.country_code(),
+            "probability": round(pool.random.uniform(0, 1.0), decimal_places),
         }
         for _ in range(num_countries)
     ]
     return country_codes_with_probability
 
 
-def generate_success_response_json(params: dict) -> dict:
+def generate_nationalize_api_mock_responses(
+    request, test_name: str, quota_store: Optional[QuotaStore] = None
+) -> tuple:
     """
-    Generates success response JSON.
+    Generates mock responses for the Nationalize API.
+
+    Quotas are kept per `apikey` param, and per test_name for requests without one.
+    Bodies are compressed as negotiated by the Accept-Encoding request header,
+    see compress_mock_body().
     """
-    if "name" in params:
-        return {
-            "count": generate_random_number(lower_limit=100),
-            "name": params["name"],
-            "country": generate_random_country_probabilities(num_countries=3),
-        }
-    if "name[]" in params:
-        return [
-            {
-                "count": generate_random_number(lower_limit=100),
-                "name": name,
-                "country": generate_random_country_probabilities(num_countries=3),
-            }
-            for name in params["name[]"]
-        ]
+    params = dict(request.params)
+    quota_key = params.pop("apikey", test_name)
+    if isinstance(params.get("name[]"), str):
+        # a single name[] value is parsed as a plain string
+        params["name[]"] = [params["name[]"]]
+    is_batch = "name[]" in params
+    num_of_names = len(params["name[]"]) if is_batch else 1
+
+    if not is_batch and "name" not in params:
+        error = ERROR_MISSING_NAME
+    elif num_of_names > max_batch_size:
+        error = ERROR_INVALID_NAME
+    else:
+        error = None
+    if error:
+        headers = generate_mock_validation_error_headers()
+        body = compress_mock_body(request, headers, orjson.dumps({"error": error}))
+        return (422, headers, body)
+
+    quota = (quota_store or mock_quota_store).consume(
+        quota_key, num_of_names=num_of_names, is_batch=is_batch
+    )
+
+    if quota.error:
+        body = orjson.dumps({"error": quota.error})
+    elif "name" in params:
+        body = generate_single_payload(params["name"])
+    else:
+        body = generate_batch_payload(params["name[]"])
+
+    headers = generate_mock_headers(quota, is_error=quota.error is not None)
+    body = compress_mock_body(request, headers, body)
+
+    return (quota.status_code, headers, body)
 
 
-def generate_nationalize_api_mock_responses(request, test_name: str) -> tuple:
+def compress_mock_body(request, headers: dict, body: bytes) -> bytes:
     """
-    Generates mock responses for the Nationalize API.
+    Compresses a body of at least mock_compress_min_bytes with the coding the
+    request's Accept-Encoding header prefers and sets the matching headers.
     """
-    status_code = 200
-    num_of_names = 1
-    os_var_name_rate_limit_count = test_name + PREFIX
-    if os_var_name_rate_limit_count not in os.environ:
-        os.environ[os_var_name_rate_limit_count] = str(DEFAULT_INITIAL_LIMIT)
-
-    if int(os.environ.get(os_var_name_rate_limit_count, DEFAULT_INITIAL_LIMIT)) == 0:
-        status_code = 429
-        response = {"error": "Request limit reached"}
-
-    if "name[]" in request.params and len(request.params.get("name[]", [])) > int(
-        os.environ.get(os_var_name_rate_limit_count, DEFAULT_INITIAL_LIMIT)
-    ):
-        status_code = 429
-        response = {"error": "Request limit too low to process request"}
-
-    if "name" in request.params and status_code < 400:
-        response = {
-            "count": generate_random_number(lower_limit=100),
-            "name": request.params["name"],
-            "country": generate_random_country_probabilities(num_countries=3),
-        }
+    headers["Vary"] = "Accept-Encoding"
+    accept_encoding = getattr(request, "headers", {}).get("accept-encoding")
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None or len(body) < mock_compress_min_bytes:
+        return body
+    headers["Content-Encoding"] = encoding
+    return encode_body(body, encoding)
 
-    if "name[]" in request.params and status_code < 400:
-        num_of_names = len(request.params.get("name[]", []))
-        response = [
-            {
-                "count": generate_random_number(lower_limit=100),
-                "name": name,
-                "country": generate_random_country_probabilities(num_countries=3),
-            }
-            for name in request.params.get("name[]", [])
-        ]
-
-    if status_code < 400:
-        headers = generate_mock_headers(
-            os_var_name_rate_limit_count, num_of_names=num_of_names
+
+def parse_request_params(query: str) -> dict:
+    """
+    Parses a query string the same way responses does for request.params.
+    """
+    params = {}
+    for key, values in groupby(parse_qsl(query, keep_blank_values=True), lambda kv: kv[0]):
+        values = [value for _, value in values]
+        params[key] = values[0] if len(values) == 1 else values
+    return params
+
+
+def generate_nationalize_api_mock_transport(
+    test_name: str, latency: float = 0
+) -> httpx.MockTransport:
+    """
+    Generates an in-process httpx transport that serves the Nationalize API mock responses.
+    """
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        params = parse_request_params(request.url.query.decode())
+        status_code, headers, body = generate_nationalize_api_mock_responses(
+            SimpleNamespace(params=params, headers=request.headers), test_name=test_name
         )
-    else:
-        headers = generate_mock_headers(os_var_name_rate_limit_count, is_error=True)
+        return httpx.Response(status_code, headers=headers, content=body)
 
-    return (status_code, headers, json.dumps(response))
+    return httpx.MockTransport(handler)
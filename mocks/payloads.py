@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+import orjson
+
+from test_data.test_data import get_country_codes, get_fake_data_pool
+
+_rng: Optional[np.random.Generator] = None
+
+
+@lru_cache(maxsize=None)
+def get_country_code_table() -> np.ndarray:
+    return np.array(get_country_codes())
+
+
+def get_numpy_rng() -> np.random.Generator:
+    """
+    Returns the generator of this process, seeded from the fake data pool so seeded runs are reproducible.
+    """
+    global _rng
+    if _rng is None:
+        _rng = np.random.default_rng(get_fake_data_pool().random.getrandbits(64))
+    return _rng
+
+
+def generate_predictions(
+    names: List[str],
+    num_countries: int = 3,
+    rng: Optional[np.random.Generator] = None,
+) -> List[dict]:
+    """
+    Generates NationalizeResponse shaped predictions for all names in one vectorized step.
+
+    Every name gets `num_countries` distinct countries from the code table.
+    Their probabilities are sorted in descending order and add up to less than one.
+    """
+    rng = rng or get_numpy_rng()
+    country_code_table = get_country_code_table()
+    num_names = len(names)
+    counts = rng.integers(100, 1001, size=num_names)
+    country_ids = np.argpartition(
+        rng.random((num_names, len(country_code_table))), num_countries, axis=1
+    )[:, :num_countries]
+    weights = -np.sort(-rng.random((num_names, num_countries)), axis=1)
+    probabilities = (
+        weights / weights.sum(axis=1, keepdims=True) * rng.uniform(0.3, 1.0, size=(num_names, 1))
+    )
+
+    codes = country_code_table[country_ids].tolist()
+    probabilities = probabilities.tolist()
+    return [
+        {
+            "count": count,
+            "name": name,
+            "country": [
+                {"country_id": code, "probability": probability}
+                for code, probability in zip(name_codes, name_probabilities)
+            ],
+        }
+        for count, name, name_codes, name_probabilities in zip(
+            counts.tolist(), names, codes, probabilities
+        )
+    ]
+
+
+def generate_batch_payload(names: List[str], num_countries: int = 3) -> bytes:
+    """
+    Generates a serialized name[] response body.
+    """
+    return orjson.dumps(generate_predictions(names, num_countries=num_countries))
+
+
+def generate_single_payload(name: str, num_countries: int = 3) -> bytes:
+    """
+    Generates a serialized name response body.
+    """
+    return orjson.dumps(generate_predictions([name], num_countries=num_countries)[0])
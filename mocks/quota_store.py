@@ -0,0 +1,142 @@
+import math
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from constants.error_constants import (
+    ERROR_REQUEST_LIMIT_REACHED,
+    ERROR_REQUEST_LIMIT_LOW,
+)
+from settings import x_rate_limit_limit_free_tier, mock_rate_limit_window_seconds
+
+
+class Quota(NamedTuple):
+    status_code: int
+    error: Optional[str]
+    limit: int
+    remaining: int
+    reset: int
+
+
+class QuotaStore:
+    """
+    Thread-safe in-memory request quota of the mock, kept per key.
+
+    Each key starts with `limit` requests. The quota is refilled once its
+    window of `window` seconds has passed, and the seconds left in the window
+    are reported as x-rate-limit-reset.
+
+    With a `partition`, e.g. the pytest-xdist worker id, keys are kept apart
+    from those of stores with another partition, even in a shared FileQuotaStore.
+    """
+
+    def __init__(
+        self,
+        limit: int = int(x_rate_limit_limit_free_tier),
+        window: float = mock_rate_limit_window_seconds,
+        clock: Callable[[], float] = time.time,
+        partition: Optional[str] = None,
+    ):
+        self.limit = limit
+        self.window = window
+        self.partition = partition
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._quotas = {}
+
+    def consume(self, key: str, num_of_names: int = 1, is_batch: bool = False) -> Quota:
+        """
+        Atomically deducts num_of_names from the quota of key if enough is left.
+        """
+        key = self._partition_key(key)
+        with self._transaction():
+            now = self._clock()
+            remaining, reset_at = self._load(key, now)
+            status_code, error = 200, None
+            if remaining == 0:
+                status_code, error = 429, ERROR_REQUEST_LIMIT_REACHED
+            if is_batch and num_of_names > remaining:
+                status_code, error = 429, ERROR_REQUEST_LIMIT_LOW
+            if status_code == 200:
+                remaining -= num_of_names
+            self._save(key, remaining, reset_at)
+        return Quota(status_code, error, self.limit, remaining, math.ceil(reset_at - now))
+
+    def remaining(self, key: str) -> int:
+        with self._transaction():
+            return self._load(self._partition_key(key), self._clock())[0]
+
+    def reset(self, key: str) -> None:
+        """
+        Starts a fresh window with the full quota for key.
+        """
+        with self._transaction():
+            self._delete(self._partition_key(key))
+
+    def _partition_key(self, key: str) -> str:
+        return f"{self.partition}:{key}" if self.partition else key
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            yield
+
+    def _load(self, key: str, now: float) -> Tuple[int, float]:
+        quota = self._quotas.get(key)
+        if quota is None or now >= quota[1]:
+            return self.limit, now + self.window
+        return quota
+
+    def _save(self, key: str, remaining: int, reset_at: float) -> None:
+        self._quotas[key] = (remaining, reset_at)
+
+    def _delete(self, key: str) -> None:
+        self._quotas.pop(key, None)
+
+
+class FileQuotaStore(QuotaStore):
+    """
+    QuotaStore kept in a SQLite file so that several processes, e.g. pytest-xdist
+    workers, share the same quotas. Every consume() runs in an exclusive transaction.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self._db = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS quotas (key TEXT PRIMARY KEY, remaining INTEGER, reset_at REAL)"
+        )
+
+    def close(self) -> None:
+        self._db.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _load(self, key: str, now: float) -> Tuple[int, float]:
+        quota = self._db.execute(
+            "SELECT remaining, reset_at FROM quotas WHERE key = ?", (key,)
+        ).fetchone()
+        if quota is None or now >= quota[1]:
+            return self.limit, now + self.window
+        return quota
+
+    def _save(self, key: str, remaining: int, reset_at: float) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO quotas VALUES (?, ?, ?)", (key, remaining, reset_at)
+        )
+
+    def _delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM quotas WHERE key = ?", (key,))
@@ -0,0 +1,175 @@
+import json
+import random
+import asyncio
+import argparse
+import threading
+from http import HTTPStatus
+from types import SimpleNamespace
+from typing import Optional
+from urllib.parse import urlsplit
+
+from mocks.mocks import (
+    generate_nationalize_api_mock_responses,
+    generate_mock_validation_error_headers,
+    parse_request_params,
+)
+from mocks.quota_store import QuotaStore
+from settings import mock_server_host, mock_server_port
+
+DEFAULT_QUOTA_KEY = "default"
+
+
+class MockNationalizeServer:
+    """
+    Local HTTP/1.1 server that serves the Nationalize API mock responses.
+
+    Connections are kept alive between requests. Quotas are kept per `apikey`
+    query parameter, and bodies are compressed as the Accept-Encoding header
+    asks. `latency` delays every response, and `error_rate` is the share of
+    requests answered with `error_status` instead.
+    """
+
+    def __init__(
+        self,
+        host: str = mock_server_host,
+        port: int = mock_server_port,
+        latency: float = 0,
+        error_rate: float = 0,
+        error_status: int = HTTPStatus.SERVICE_UNAVAILABLE,
+        quota_store: Optional[QuotaStore] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.quota_store = quota_store or QuotaStore()
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+        self._handlers = set()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        self._server.close()
+        for handler in list(self._handlers):
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def start_in_thread(self) -> str:
+        """
+        Runs the server on its own event loop in a daemon thread and returns its url.
+        """
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.url
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _handle_connection(self, reader, writer) -> None:
+        self.connections += 1
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    if line:
+                        key, _, value = line.partition(":")
+                        headers[key.strip().lower()] = value.strip()
+                if "content-length" in headers:
+                    await reader.readexactly(int(headers["content-length"]))
+
+                _, target, _ = request_line.split(" ", 2)
+                status_code, response_headers, body = await self._respond(target, headers)
+                writer.write(self._serialize(status_code, response_headers, body))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def _respond(self, target: str, headers: dict) -> tuple:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            error = HTTPStatus(self.error_status).phrase
+            return (
+                self.error_status,
+                generate_mock_validation_error_headers(),
+                json.dumps({"error": error}),
+            )
+        params = parse_request_params(urlsplit(target).query)
+        quota_key = params.pop("apikey", DEFAULT_QUOTA_KEY)
+        return generate_nationalize_api_mock_responses(
+            SimpleNamespace(params=params, headers=headers),
+            test_name=quota_key,
+            quota_store=self.quota_store,
+        )
+
+    @staticmethod
+    def _serialize(status_code: int, headers: dict, body) -> bytes:
+        payload = body if isinstance(body, bytes) else body.encode()
+        lines = [f"HTTP/1.1 {status_code} {HTTPStatus(status_code).phrase}"]
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        lines.append(f"Content-Length: {len(payload)}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local mock Nationalize API server")
+    parser.add_argument("--host", default=mock_server_host)
+    parser.add_argument("--port", type=int, default=mock_server_port)
+    parser.add_argument("--latency", type=float, default=0, help="seconds to delay each response")
+    parser.add_argument("--error-rate", type=float, default=0, help="share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=HTTPStatus.SERVICE_UNAVAILABLE)
+    args = parser.parse_args()
+
+    server = MockNationalizeServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    print(f"Serving mock Nationalize API on {server.url}", flush=True)
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
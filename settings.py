@@ -1,3 +1,44 @@
+import os
+
 url = "https://api.nationalize.io/"
 x_rate_limit_limit_free_tier = "100"
+# comma separated API keys, each with its own quota, see clients.key_pool
+api_keys = [key for key in os.environ.get("NATIONALIZE_API_KEYS", "").split(",") if key]
 max_batch_size = 10
+max_concurrency = 10
+max_connections = 20
+max_keepalive_connections = 10
+request_timeout = 10.0
+# bytes read at a time by the streaming batch decoders
+stream_chunk_size = 1024
+compression_level = 6
+batch_linger_seconds = 0.05
+# back-off of RateLimitScheduler while the quota is used up and no reset time is known
+rate_limit_probe_backoff_seconds = 1.0
+rate_limit_probe_backoff_max_seconds = 60.0
+cache_path = "cache/predictions.sqlite3"
+cache_ttl_seconds = 7 * 24 * 60 * 60
+cache_max_size = 1_000_000
+cache_memory_size = 10_000
+mock_rate_limit_window_seconds = 24 * 60 * 60
+mock_server_host = "127.0.0.1"
+mock_server_port = 8080
+# the mock only compresses bodies that are at least this large
+mock_compress_min_bytes = 512
+benchmark_output = "reports/benchmarks.json"
+benchmark_regression_threshold = 0.2
+log_mode = "all"
+log_sample_rate = 1.0
+log_body_max_bytes = 2048
+log_slow_threshold_seconds = 1.0
+log_json = False
+test_data_seed = None
+test_data_pool_size = 2000
+cassette_path = "cassettes/nationalize"
+retry_max_attempts = 3
+retry_backoff_base_seconds = 0.1
+retry_backoff_max_seconds = 5.0
+retry_max_reset_wait_seconds = 60
+hedge_after_seconds = None
+test_log_flush_records = 64
+test_log_compress = True
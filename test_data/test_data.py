@@ -1,16 +1,96 @@
+import os
 import random
 import string
 import datetime
-from faker import Faker
+from functools import lru_cache
+from typing import Optional
+
+from helpers.names import normalize_name
+from settings import test_data_seed, test_data_pool_size
+
+
+@lru_cache(maxsize=None)
+def get_country_codes() -> tuple:
+    """
+    Returns the ISO alpha-2 country codes of Faker. Faker takes a few hundred
+    ms to import, so it is only imported once fake data is needed.
+    """
+    from faker.providers.address import Provider as AddressProvider
+
+    return tuple(AddressProvider.alpha_2_country_codes)
+
+
+class FakeDataPool:
+    """
+    Pools of fake last names and full names generated once per process from
+    a seeded Faker, handed out with O(1) random draws.
+
+    The seed is offset by the pytest-xdist worker number, so every worker
+    draws its own reproducible sequence.
+    """
+
+    def __init__(self, seed: Optional[int] = None, pool_size: int = test_data_pool_size):
+        from faker import Faker
+
+        self.seed = seed
+        if seed is not None:
+            seed += int(os.environ.get("PYTEST_XDIST_WORKER", "gw0")[2:] or 0)
+        self.random = random.Random(seed)
+        self.country_codes = get_country_codes()
+        faker = Faker()
+        faker.seed_instance(seed)
+        self.last_names = tuple(faker.last_name() for _ in range(pool_size))
+        # Faker repeats surnames, and lookups collapse names that normalize alike
+        self.distinct_last_names = tuple(
+            {normalize_name(name): name for name in self.last_names}.values()
+        )
+        self.names = tuple(faker.name() for _ in range(pool_size))
+
+    def last_name(self) -> str:
+        return self.last_names[int(self.random.random() * len(self.last_names))]
+
+    def name(self) -> str:
+        return self.names[int(self.random.random() * len(self.names))]
+
+    def country_code(self) -> str:
+        return self.country_codes[int(self.random.random() * len(self.country_codes))]
+
+
+_fake_data_pool: Optional[FakeDataPool] = None
+
+
+def get_fake_data_pool() -> FakeDataPool:
+    """
+    Returns the pool of this process, creating it on first use.
+    """
+    global _fake_data_pool
+    if _fake_data_pool is None:
+        seed = os.environ.get("TEST_DATA_SEED", test_data_seed)
+        _fake_data_pool = FakeDataPool(seed=None if seed is None else int(seed))
+    return _fake_data_pool
+
+
+def reset_fake_data_pool(seed: Optional[int] = None) -> FakeDataPool:
+    """
+    Replaces the pool of this process with one created from seed.
+    """
+    global _fake_data_pool
+    _fake_data_pool = FakeDataPool(seed=seed)
+    return _fake_data_pool
+
 
 def generate_fake_last_names(num_last_names: int) -> list:
     """
-    generate n number of fake last names
+    generate n number of fake last names that stay distinct after normalization,
+    as long as n is at most the number of distinct names in the pool
     """
 
-    fake = Faker()
-    last_names = [fake.last_name() for _ in range(num_last_names)]
-    return last_names
+    pool = get_fake_data_pool()
+    names = []
+    while len(names) < num_last_names:
+        count = min(num_last_names - len(names), len(pool.distinct_last_names))
+        names.extend(pool.random.sample(pool.distinct_last_names, count))
+    return names
 
 
 def generate_fake_last_name() -> str:
@@ -18,22 +98,20 @@ def generate_fake_last_name() -> str:
     generate fake last name
     """
 
-    fake = Faker()
-    return fake.last_name()
+    return get_fake_data_pool().last_name()
 
 
 def generate_fake_name() -> str:
     """
     generate fake name
     """
-    fake = Faker()
-    return fake.name()
+    return get_fake_data_pool().name()
 
 def generate_random_number(lower_limit: int, upper_limit=1000) -> int:
     """
     Generates a random integer between lower_limit and upper_limit.
     """
-    return random.randint(lower_limit, upper_limit)
+    return get_fake_data_pool().random.randint(lower_limit, upper_limit)
 
 
 def generate_random_request_id(length: int = 16) -> str:
@@ -41,7 +119,7 @@ def generate_random_request_id(length: int = 16) -> str:
     Generates a random string of specified length for the request ID.
     """
     letters_and_digits = string.ascii_letters + string.digits
-    return "".join(random.choice(letters_and_digits) for _ in range(length))
+    return "".join(get_fake_data_pool().random.choices(letters_and_digits, k=length))
 
 
 def get_current_date_header() -> str:
@@ -0,0 +1,112 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from analytics.aggregator import CountryAggregator
+from analytics.prediction_store import PredictionStore
+from clients.api_client import http_api_client
+from mocks.payloads import generate_predictions
+from settings import url, max_batch_size
+from test_data.test_data import generate_fake_last_names
+
+PREDICTIONS = [
+    {"count": 10, "name": "Smith", "country": [
+        {"country_id": "GB", "probability": 0.2},
+        {"country_id": "US", "probability": 0.6},
+        {"country_id": "IE", "probability": 0.2},
+    ]},
+    {"count": 5, "name": "Müller", "country": [{"country_id": "DE", "probability": 0.7}]},
+    {"count": 0, "name": "Zzz", "country": []},
+]
+
+
+class TestCountryAggregator:
+
+    def test_totals_top_countries_and_histograms(self):
+        """
+        Verifies the expected country mix, the top country counts and the confidence and entropy histograms.
+        """
+        aggregator = CountryAggregator(bins=10)
+
+        for prediction in PREDICTIONS:
+            aggregator.add(prediction)
+
+        snapshot = aggregator.snapshot()
+        assert snapshot["names"] == 3 and snapshot["unknown_weight"] == 1
+        assert aggregator.mix() == pytest.approx({"DE": 0.7 / 3, "US": 0.6 / 3, "GB": 0.2 / 3, "IE": 0.2 / 3})
+        assert [code for code, _ in aggregator.top_countries(k=2)] == ["DE", "US"]
+        assert snapshot["top_totals"] == {"US": 1, "DE": 1}
+        assert snapshot["confidence_histogram"]["counts"] == [0, 0, 0, 0, 0, 0, 1, 1, 0, 0]
+        smith_entropy = -(0.6 * math.log2(0.6) + 2 * 0.2 * math.log2(0.2))
+        entropy_counts = np.histogram([0.0, smith_entropy], bins=snapshot["entropy_histogram"]["edges"])[0]
+        assert snapshot["entropy_histogram"]["counts"] == entropy_counts.tolist()
+
+    def test_weights_scale_the_mix(self):
+        """
+        Verifies that per-name weights count people instead of names.
+        """
+        aggregator = CountryAggregator()
+
+        aggregator.extend(PREDICTIONS[:2], weights=[1, 3])
+
+        assert aggregator.mix()["DE"] == pytest.approx(0.7 * 3 / 4)
+        assert aggregator.snapshot()["top_totals"] == {"DE": 3, "US": 1}
+
+    @pytest.mark.smoke
+    def test_api_responses_are_aggregated_as_they_arrive(self, mock_responses):
+        """
+        Verifies that raw response bodies are aggregated without building models.
+        """
+        aggregator = CountryAggregator()
+        for _ in range(3):
+            response = http_api_client.get(
+                url=url, params={"name[]": generate_fake_last_names(num_last_names=max_batch_size)}
+            )
+            aggregator.extend_json(response.content)
+
+        snapshot = aggregator.snapshot()
+        assert snapshot["names"] == 3 * max_batch_size
+        assert sum(snapshot["top_totals"].values()) == 3 * max_batch_size
+        assert sum(snapshot["confidence_histogram"]["counts"]) == 3 * max_batch_size
+
+    def test_merged_partials_match_one_pass(self):
+        """
+        Verifies that merging the json snapshots of parallel partial aggregates gives the one-pass result.
+        """
+        predictions = generate_predictions(generate_fake_last_names(num_last_names=2000))
+        whole = CountryAggregator()
+        whole.extend(predictions)
+
+        merged = CountryAggregator()
+        for start in range(0, len(predictions), 500):
+            partial = CountryAggregator()
+            partial.extend(predictions[start : start + 500])
+            merged.merge(json.loads(json.dumps(partial.snapshot())))
+
+        expected, actual = whole.snapshot(), merged.snapshot()
+        assert actual["names"] == expected["names"]
+        assert actual["totals"] == pytest.approx(expected["totals"])
+        assert actual["top_totals"] == expected["top_totals"]
+        assert actual["confidence_histogram"] == expected["confidence_histogram"]
+        assert actual["entropy_histogram"] == expected["entropy_histogram"]
+        with pytest.raises(ValueError):
+            CountryAggregator(bins=5).merge(expected)
+
+    def test_store_columns_match_models_in_fixed_memory(self):
+        """
+        Verifies that a PredictionStore is aggregated from its columns, and that
+        the aggregates only grow with the number of countries.
+        """
+        predictions = generate_predictions(generate_fake_last_names(num_last_names=5000))
+        from_models = CountryAggregator()
+        from_store = CountryAggregator()
+
+        from_models.extend(predictions)
+        from_store.extend_store(PredictionStore.from_predictions(predictions))
+
+        assert from_store.snapshot()["totals"] == pytest.approx(from_models.snapshot()["totals"])
+        assert from_store.snapshot()["top_totals"] == from_models.snapshot()["top_totals"]
+        assert len(from_store.country_codes) == len({c["country_id"] for p in predictions for c in p["country"]})
+        assert from_store._totals.shape == (len(from_store.country_codes),)
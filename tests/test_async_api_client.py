@@ -0,0 +1,98 @@
+import time
+import asyncio
+
+import pytest
+import requests
+
+from clients.async_api_client import AsyncNationalizeClient
+from helpers.test_helpers import (
+    assert_common_headers,
+    assert_common_success_response_json,
+    assert_common_success_batch_usage_response_json,
+)
+from mocks.mocks import generate_nationalize_api_mock_transport
+from api_response_models.nationalize_api_models import ErrorResponse
+from constants.error_constants import ERROR_REQUEST_LIMIT_LOW
+from settings import max_batch_size
+from test_data.test_data import generate_fake_last_name, generate_fake_last_names
+
+
+class TestAsyncNationalizeClient:
+
+    @pytest.mark.smoke
+    def test_async_successful_name_prediction(self, async_mock_transport):
+        """
+        Verifies that the async client returns a parsed prediction for a valid last name.
+        """
+        name = generate_fake_last_name()
+
+        async def run():
+            async with AsyncNationalizeClient(transport=async_mock_transport) as client:
+                response = await client.get(params={"name": name})
+                return response, await client.predict(name)
+
+        response, data = asyncio.run(run())
+
+        assert response.status_code == requests.codes.ok
+        assert_common_headers(response=response, expected_rate_limit_headers=True)
+        assert_common_success_response_json(data=data, name=name)
+
+    def test_async_batch_usage_successful_name_prediction(self, async_mock_transport):
+        """
+        Verifies that the async client parses every item of a batch response.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+
+        async def run():
+            async with AsyncNationalizeClient(transport=async_mock_transport) as client:
+                return await client.predict_batch(names)
+
+        predictions = asyncio.run(run())
+
+        assert [data.name for data in predictions] == names
+        for data in predictions:
+            assert_common_success_batch_usage_response_json(data=data)
+
+    @pytest.mark.rate_limit
+    def test_async_rate_limit_too_low_is_parsed_as_error(self, async_mock_transport):
+        """
+        Verifies that the async client parses a 429 into an ErrorResponse.
+        """
+        params_list = [
+            {"name[]": generate_fake_last_names(num_last_names=max_batch_size)}
+            for _ in range(11)
+        ]
+
+        async def run():
+            async with AsyncNationalizeClient(
+                transport=async_mock_transport, concurrency=1
+            ) as client:
+                responses = await client.gather(params_list[:-1])
+                return responses, await client.predict_batch(params_list[-1]["name[]"])
+
+        responses, error = asyncio.run(run())
+
+        assert all(r.status_code == requests.codes.ok for r in responses)
+        assert isinstance(error, ErrorResponse)
+        assert error.error == ERROR_REQUEST_LIMIT_LOW
+
+    def test_async_requests_run_concurrently(self, request):
+        """
+        Verifies that N requests finish in roughly the time of the slowest one.
+        """
+        latency = 0.2
+        transport = generate_nationalize_api_mock_transport(
+            test_name=request.node.name, latency=latency
+        )
+        params_list = [{"name": generate_fake_last_name()} for _ in range(10)]
+
+        async def run():
+            async with AsyncNationalizeClient(transport=transport) as client:
+                return await client.gather(params_list)
+
+        started = time.perf_counter()
+        responses = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+
+        assert all(r.status_code == requests.codes.ok for r in responses)
+        assert elapsed < latency * len(params_list) / 2
@@ -0,0 +1,119 @@
+import pytest
+import requests
+import responses
+from responses import RequestsMock
+
+from api_response_models.decoders import decode_nationalize_batch
+from mocks.cassette import Cassette, CassetteRecorder
+from settings import url, max_batch_size
+from test_data.test_data import generate_fake_last_name, generate_fake_last_names
+
+
+def record(path, params_list):
+    recorder = CassetteRecorder(str(path))
+    session = requests.Session()
+    session.hooks["response"].append(recorder.record)
+    responses_ = [session.get(url, params=params) for params in params_list]
+    recorder.close()
+    return responses_
+
+
+def replay(path, params_list):
+    cassette = Cassette(str(path))
+    session = requests.Session()
+    with RequestsMock() as m:
+        m.add_callback(method=responses.GET, url=url, callback=cassette.replay, content_type="application/json")
+        responses_ = [session.get(url, params=params) for params in params_list]
+    cassette.close()
+    return responses_
+
+
+class TestCassette:
+
+    @pytest.mark.smoke
+    def test_replay_serves_recorded_responses(self, mock_responses, tmp_path):
+        """
+        Verifies that replayed responses have the recorded status, headers and body.
+        """
+        params_list = [
+            {"name": generate_fake_last_name()},
+            {"name[]": generate_fake_last_names(num_last_names=max_batch_size)},
+            {},
+        ]
+        recorded = record(tmp_path / "cassette", params_list)
+
+        replayed = replay(tmp_path / "cassette", params_list)
+
+        for original, replayed_response in zip(recorded, replayed):
+            assert replayed_response.status_code == original.status_code
+            assert replayed_response.content == original.content
+            assert replayed_response.headers.get("x-rate-limit-remaining") == original.headers.get(
+                "x-rate-limit-remaining"
+            )
+
+    def test_repeated_requests_are_replayed_in_recorded_order(self, mock_responses, tmp_path):
+        """
+        Verifies that identical requests replay their own recordings, ignoring the api key.
+        """
+        name = generate_fake_last_name()
+        recorded = record(tmp_path / "cassette", [{"name": name, "apikey": "a"}] * 3)
+
+        replayed = replay(tmp_path / "cassette", [{"name": name, "apikey": "b"}] * 3)
+
+        assert [r.headers["x-rate-limit-remaining"] for r in replayed] == [
+            r.headers["x-rate-limit-remaining"] for r in recorded
+        ]
+
+    def test_unrecorded_request_raises_connection_error(self, mock_responses, tmp_path):
+        """
+        Verifies that a request missing from the cassette fails instead of reaching the network.
+        """
+        record(tmp_path / "cassette", [{"name": generate_fake_last_name()}])
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            replay(tmp_path / "cassette", [{"name": "not-recorded"}])
+
+    def test_large_cassette_lookups(self, tmp_path):
+        """
+        Verifies that every entry of a cassette with tens of thousands of entries is found.
+        """
+        path = str(tmp_path / "cassette")
+        names = [f"name{i}" for i in range(20_000)]
+        recorder = CassetteRecorder(path)
+        for name in names:
+            request = requests.Request("GET", url, params={"name[]": [name]}).prepare()
+            response = requests.Response()
+            response.request, response.status_code = request, 200
+            response._content = f'[{{"count":1,"name":"{name}","country":[]}}]'.encode()
+            recorder.record(response)
+        recorder.close()
+
+        cassette = Cassette(path)
+        assert len(cassette) == len(names)
+        for name in names[::97]:
+            entry = cassette.lookup({"name[]": [name]})
+            assert decode_nationalize_batch(entry["body"].encode())[0].name == name
+        assert cassette.lookup({"name[]": ["missing"]}) is None
+        cassette.close()
+
+    def test_crashed_record_run_can_be_replayed(self, mock_responses, tmp_path):
+        """
+        Verifies that a cassette whose recorder never closed is indexed from its data file,
+        skipping a record cut short, and that recording into it again keeps it readable.
+        """
+        path = tmp_path / "cassette"
+        names = generate_fake_last_names(num_last_names=3)
+        recorded = record(path, [{"name": name} for name in names[:2]])
+        recorder = CassetteRecorder(str(path))
+        session = requests.Session()
+        session.hooks["response"].append(recorder.record)
+        recorded.append(session.get(url, params={"name": names[2]}))
+        recorder._data.write(b'{"key": "cut sh')
+        recorder._data.flush()
+
+        replayed = replay(path, [{"name": name} for name in names])
+        recorder._data.close()
+
+        assert [r.content for r in replayed] == [r.content for r in recorded]
+        recorded = record(path, [{"name": names[0]}])
+        assert replay(path, [{"name": names[0]}])[0].content == recorded[0].content
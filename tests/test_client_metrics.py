@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+import requests
+
+from clients.async_api_client import AsyncNationalizeClient
+from clients.metrics import ClientMetrics, Histogram, instrument
+from helpers.utils import log_request, log_response
+from settings import url, max_batch_size
+from test_data.test_data import generate_fake_last_name, generate_fake_last_names
+
+
+@pytest.fixture
+def instrumented_session():
+    metrics = ClientMetrics()
+    session = requests.Session()
+    session.hooks["response"] = [log_request, log_response]
+    instrument(session, metrics)
+    yield session, metrics
+    session.close()
+
+
+class TestClientMetrics:
+
+    def test_histogram_quantiles_and_prometheus_buckets(self):
+        """
+        Verifies that quantiles are estimated inside their bucket and exported buckets are cumulative.
+        """
+        histogram = Histogram(buckets=(1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3, 10):
+            histogram.observe(value)
+
+        assert histogram.counts == [1, 2, 1, 1]
+        assert histogram.quantile(0.5) == pytest.approx(1.75)
+        assert histogram.quantile(1.0) == 4
+
+        metrics = ClientMetrics()
+        metrics.histograms["total_seconds"].observe(0.02)
+        text = metrics.to_prometheus()
+        assert 'nationalize_client_total_seconds_bucket{le="0.01"} 0' in text
+        assert 'nationalize_client_total_seconds_bucket{le="+Inf"} 1' in text
+        assert "nationalize_client_total_seconds_count 1" in text
+
+    @pytest.mark.smoke
+    def test_session_responses_are_recorded(self, mock_responses, instrumented_session):
+        """
+        Verifies that status codes, batch sizes, bytes and rate limit headroom are recorded per response.
+        """
+        session, metrics = instrumented_session
+
+        session.get(url=url, params={"name": generate_fake_last_name()})
+        response = session.get(url=url, params={"name[]": generate_fake_last_names(num_last_names=max_batch_size)})
+        session.get(url=url)
+
+        snapshot = metrics.snapshot()
+        assert snapshot["status_codes"] == {"200": 2, "422": 1}
+        assert snapshot["histograms"]["batch_size"]["count"] == 1
+        assert snapshot["histograms"]["batch_size"]["sum"] == max_batch_size
+        assert snapshot["histograms"]["bytes_received"]["count"] == 3
+        assert snapshot["histograms"]["total_seconds"]["count"] == 3
+        assert snapshot["rate_limit_remaining"] == int(response.headers["x-rate-limit-remaining"])
+
+    def test_async_client_records_connect_time(self, mock_server, monkeypatch):
+        """
+        Verifies that the async client records the connect time over a real connection.
+        """
+        metrics = ClientMetrics()
+        monkeypatch.setattr("clients.async_api_client.client_metrics", metrics)
+
+        async def run():
+            async with AsyncNationalizeClient(base_url=mock_server.url) as client:
+                await client.gather([{"name": name} for name in generate_fake_last_names(num_last_names=5)])
+
+        asyncio.run(run())
+
+        histograms = metrics.snapshot()["histograms"]
+        assert histograms["total_seconds"]["count"] == 5
+        assert 1 <= histograms["connect_seconds"]["count"] <= 5
+        assert histograms["ttfb_seconds"]["sum"] <= histograms["total_seconds"]["sum"]
+
+    def test_worker_snapshots_are_merged(self, mock_responses, instrumented_session):
+        """
+        Verifies that the snapshot of another process is added to the metrics.
+        """
+        session, metrics = instrumented_session
+        session.get(url=url, params={"name": generate_fake_last_name()})
+
+        merged = ClientMetrics()
+        merged.merge(metrics.snapshot())
+        merged.merge(metrics.snapshot())
+
+        assert merged.requests == 2
+        assert merged.histograms["total_seconds"].count == 2
+        assert merged.rate_limit_remaining_min == metrics.rate_limit_remaining_min
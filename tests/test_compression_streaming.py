@@ -0,0 +1,226 @@
+import asyncio
+import gzip
+import zlib
+
+import httpx
+import pytest
+import requests
+import responses
+
+from api_response_models.decoders import (
+    NationalizeBatchStreamDecoder,
+    decode_nationalize_batch,
+    iter_nationalize_batch,
+)
+from clients.api_client import http_api_client, stream_nationalize_batch
+from clients.async_api_client import AsyncNationalizeClient
+from clients.exceptions import NationalizeApiError
+from constants.error_constants import ERROR_INVALID_NAME
+from helpers.compression import available_encodings, encode_body, negotiate_encoding
+from helpers.test_helpers import assert_common_success_batch_usage_response_json
+from mocks.payloads import generate_batch_payload, generate_single_payload
+from settings import max_batch_size, url
+from test_data.test_data import generate_fake_last_names
+
+
+class TestContentNegotiation:
+
+    @pytest.mark.parametrize(
+        "header, encoding",
+        [
+            (None, None),
+            ("identity", None),
+            ("gzip", "gzip"),
+            ("deflate", "deflate"),
+            ("gzip;q=0.5, deflate", "deflate"),
+            ("gzip;q=0, deflate;q=0", None),
+            ("*", available_encodings()[0]),
+            ("*, gzip;q=0", next(e for e in available_encodings() if e != "gzip")),
+        ],
+    )
+    def test_negotiate_encoding(self, header, encoding):
+        """
+        Verifies that the coding with the highest q-value wins and q=0 excludes a coding.
+        """
+        assert negotiate_encoding(header) == encoding
+
+    def test_encoded_bodies_decompress(self):
+        """
+        Verifies that gzip and HTTP deflate bodies decompress to the original body.
+        """
+        body = generate_batch_payload(generate_fake_last_names(num_last_names=max_batch_size))
+
+        assert gzip.decompress(encode_body(body, "gzip")) == body
+        assert zlib.decompress(encode_body(body, "deflate")) == body
+
+
+class TestCompressedTransport:
+
+    def test_mock_compresses_large_batches(self, mock_responses):
+        """
+        Verifies that the mock gzips a name[] body when asked, and that the client reads it decompressed.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+
+        response = http_api_client.get(url=url, params={"name[]": names}, headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == requests.codes.ok
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert [data.name for data in decode_nationalize_batch(response.content)] == names
+
+    def test_mock_sends_identity_when_not_asked(self, local_mock_server):
+        """
+        Verifies that the mock sends plain bodies for Accept-Encoding: identity and for small bodies.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+
+        plain = requests.get(local_mock_server.url, params={"name[]": names}, headers={"Accept-Encoding": "identity"})
+        small = http_api_client.get(url=local_mock_server.url, params={"name": names[0]})
+
+        assert "Content-Encoding" not in plain.headers
+        assert int(plain.headers["Content-Length"]) == len(plain.content)
+        assert "Content-Encoding" not in small.headers
+
+    def test_compression_lowers_bytes_on_the_wire(self, local_mock_server):
+        """
+        Verifies that a compressed name[] response is several times smaller on the wire than the body.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+
+        response = http_api_client.get(url=local_mock_server.url, params={"name[]": names})
+
+        assert response.headers["Content-Encoding"] in available_encodings()
+        assert int(response.headers["Content-Length"]) * 2 < len(response.content)
+        assert response.raw.tell() == int(response.headers["Content-Length"])
+
+
+class TestStreamDecoder:
+
+    def test_decodes_one_byte_chunks(self):
+        """
+        Verifies that items split at every byte, with escaped quotes and brackets in names, decode as a whole body does.
+        """
+        names = ['O"Brien', "back\\slash", "[bracket]", "{brace}", "Müller"]
+        body = generate_batch_payload(names)
+        decoder = NationalizeBatchStreamDecoder()
+
+        items = []
+        for i in range(len(body)):
+            items.extend(decoder.feed(body[i : i + 1]))
+        decoder.close()
+
+        assert items == decode_nationalize_batch(body)
+        assert decoder.items == len(names)
+
+    def test_yields_items_before_the_body_ends(self):
+        """
+        Verifies that an item is returned by the chunk that closes it and only the item in progress is buffered.
+        """
+        body = generate_batch_payload(["first", "second"])
+        second = body.index(b']},{"count"') + 3
+        decoder = NationalizeBatchStreamDecoder()
+
+        items = decoder.feed(body[: second + 3])
+
+        assert [data.name for data in items] == ["first"]
+        assert len(decoder._buffer) == 3
+        assert [data.name for data in decoder.feed(body[second + 3 :])] == ["second"]
+
+    def test_single_name_body_is_one_item(self):
+        """
+        Verifies that a single name body decodes to one item.
+        """
+        body = generate_single_payload("Smith")
+
+        assert [data.name for data in iter_nationalize_batch([body[:10], body[10:]])] == ["Smith"]
+
+    def test_incomplete_body_raises(self):
+        """
+        Verifies that a truncated body raises instead of silently losing its last items.
+        """
+        body = generate_batch_payload(["first", "second"])
+
+        with pytest.raises(ValueError):
+            list(iter_nationalize_batch([body[:-5]]))
+
+
+class TestStreamingClients:
+
+    def test_stream_nationalize_batch(self, mock_responses):
+        """
+        Verifies that the sync client streams every prediction of a batch in order.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+
+        predictions = list(stream_nationalize_batch(names))
+
+        assert [data.name for data in predictions] == names
+        for data in predictions:
+            assert_common_success_batch_usage_response_json(data=data)
+
+    def test_stream_nationalize_batch_over_the_wire(self, local_mock_server):
+        """
+        Verifies that the sync client streams a compressed body from the mock server.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+
+        assert [data.name for data in stream_nationalize_batch(names, base_url=local_mock_server.url)] == names
+
+    def test_stream_nationalize_batch_error(self, mock_responses):
+        """
+        Verifies that an error response raises NationalizeApiError before any item is yielded.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size + 1)
+
+        with pytest.raises(NationalizeApiError) as e:
+            list(stream_nationalize_batch(names))
+
+        assert e.value.error == ERROR_INVALID_NAME
+
+    def test_async_stream_batch(self, local_mock_server):
+        """
+        Verifies that the async client streams every prediction of a compressed batch in order.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+
+        async def run():
+            async with AsyncNationalizeClient(base_url=local_mock_server.url) as client:
+                return [data async for data in client.stream_batch(names)]
+
+        assert [data.name for data in asyncio.run(run())] == names
+
+    def test_async_stream_batch_error(self, async_mock_transport):
+        """
+        Verifies that the async client raises NationalizeApiError for an error response.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size + 1)
+
+        async def run():
+            async with AsyncNationalizeClient(transport=async_mock_transport) as client:
+                return [data async for data in client.stream_batch(names)]
+
+        with pytest.raises(NationalizeApiError) as e:
+            asyncio.run(run())
+
+        assert e.value.error == ERROR_INVALID_NAME
+
+    def test_non_json_error_bodies_raise_api_errors(self, mock_responses):
+        """
+        Verifies that both streaming clients raise NationalizeApiError for an error body that is not json.
+        """
+        names = generate_fake_last_names(num_last_names=2)
+        mock_responses.replace(responses.GET, url, body="<html>Bad Gateway</html>", status=502)
+
+        async def run():
+            transport = httpx.MockTransport(lambda request: httpx.Response(502, text=""))
+            async with AsyncNationalizeClient(transport=transport) as client:
+                return [data async for data in client.stream_batch(names)]
+
+        with pytest.raises(NationalizeApiError) as sync_error:
+            list(stream_nationalize_batch(names))
+        with pytest.raises(NationalizeApiError) as async_error:
+            asyncio.run(run())
+
+        assert (sync_error.value.status_code, sync_error.value.error) == (502, "<html>Bad Gateway</html>")
+        assert (async_error.value.status_code, async_error.value.error) == (502, "HTTP 502")
@@ -0,0 +1,88 @@
+import io
+import json
+import asyncio
+
+import pytest
+
+from cli.enrich import (
+    batch_names,
+    dedupe_window,
+    enrich,
+    main,
+    read_checkpoint,
+    read_names,
+    write_checkpoint,
+)
+from clients.async_api_client import AsyncNationalizeClient
+from mocks.server import DEFAULT_QUOTA_KEY
+from settings import max_batch_size
+from test_data.test_data import generate_fake_last_names
+
+
+def unique_names(count):
+    return [f"{name}{i}" for i, name in enumerate(generate_fake_last_names(num_last_names=count))]
+
+
+class TestEnrichCli:
+
+    @pytest.mark.smoke
+    def test_names_are_deduped_batched_and_written_in_order(self, tmp_path, async_mock_transport):
+        """
+        Verifies that duplicate names are looked up once and predictions are written in input order.
+        """
+        names = unique_names(25)
+        rows = "name\n" + "\n".join(names + names[:5]) + "\n"
+        checkpoint = str(tmp_path / "checkpoint")
+        output = io.StringIO()
+
+        async def run():
+            async with AsyncNationalizeClient(transport=async_mock_transport) as client:
+                batches = batch_names(
+                    dedupe_window(read_names(io.StringIO(rows), "csv"), window=100),
+                    max_batch_size,
+                )
+                return await enrich(batches, output, client, checkpoint, concurrency=2)
+
+        written = asyncio.run(run())
+
+        predictions = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert written == 25
+        assert [prediction["name"] for prediction in predictions] == names
+        assert read_checkpoint(checkpoint) == 25
+
+    @pytest.mark.rate_limit
+    def test_enrichment_stops_on_429_and_resumes_from_checkpoint(self, tmp_path, mock_server):
+        """
+        Verifies that a 429 stops the run with a checkpoint and --resume finishes the remaining names.
+        """
+        mock_server.quota_store.reset(DEFAULT_QUOTA_KEY)
+        names = unique_names(130)
+        source = tmp_path / "names.jsonl"
+        source.write_text("".join(json.dumps({"name": name}) + "\n" for name in names))
+        output = tmp_path / "predictions.jsonl"
+        args = [str(source), "-o", str(output), "--url", mock_server.url, "--concurrency", "1"]
+
+        assert main(args) == 2
+        assert read_checkpoint(str(output) + ".checkpoint") == 100
+
+        mock_server.quota_store.reset(DEFAULT_QUOTA_KEY)
+        assert main(args + ["--resume"]) == 0
+
+        predictions = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [prediction["name"] for prediction in predictions] == names
+
+    def test_resume_dedupes_names_written_before_the_checkpoint(self, tmp_path, local_mock_server):
+        """
+        Verifies that a resumed run skips names already written by the run it continues.
+        """
+        names = unique_names(12)
+        source = tmp_path / "names.txt"
+        source.write_text("\n".join(names[:10] + names[:3] + names[10:]) + "\n")
+        output = tmp_path / "predictions.jsonl"
+        output.write_text("".join(json.dumps({"name": name, "count": 1, "country": []}) + "\n" for name in names[:10]))
+        write_checkpoint(str(output) + ".checkpoint", 10)
+
+        assert main([str(source), "-o", str(output), "--url", local_mock_server.url, "--resume"]) == 0
+
+        predictions = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [prediction["name"] for prediction in predictions] == names
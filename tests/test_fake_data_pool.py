@@ -0,0 +1,27 @@
+from test_data.test_data import FakeDataPool, get_country_codes
+
+
+class TestFakeDataPool:
+
+    def test_same_seed_draws_the_same_data(self):
+        """
+        Verifies that pools created from the same seed draw reproducible names and country codes.
+        """
+        first, second = FakeDataPool(seed=7, pool_size=50), FakeDataPool(seed=7, pool_size=50)
+
+        for pool in (first, second):
+            pool.draws = [(pool.last_name(), pool.name(), pool.country_code()) for _ in range(20)]
+
+        assert first.draws == second.draws
+        assert all(code in get_country_codes() for _, _, code in first.draws)
+
+    def test_xdist_workers_draw_different_data(self, monkeypatch):
+        """
+        Verifies that each xdist worker gets its own sequence for the same seed.
+        """
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw0")
+        first = FakeDataPool(seed=7, pool_size=50)
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw1")
+        second = FakeDataPool(seed=7, pool_size=50)
+
+        assert [first.last_name() for _ in range(20)] != [second.last_name() for _ in range(20)]
@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+import requests
+
+from clients.batcher import NameBatcher
+from clients.key_pool import ApiKeyPool
+from helpers.test_helpers import FakeClock
+from helpers.utils import log_request, log_response
+from settings import url, max_batch_size, x_rate_limit_limit_free_tier
+from test_data.test_data import generate_fake_last_names
+
+LIMIT = int(x_rate_limit_limit_free_tier)
+
+
+@pytest.fixture
+def keys(request):
+    # the mock keeps quotas per apikey, so every test gets keys of its own
+    return [f"{request.node.name}-{i}" for i in range(3)]
+
+
+@pytest.fixture
+def key_pool_session():
+    session = requests.Session()
+    session.hooks["response"] = [log_request, log_response]
+    yield session
+    session.close()
+
+
+def spend(session: requests.Session, key: str, batches: int) -> None:
+    for _ in range(batches):
+        session.get(
+            url=url,
+            params={"name[]": generate_fake_last_names(num_last_names=max_batch_size), "apikey": key},
+        )
+
+
+class TestApiKeyPool:
+
+    def test_mock_keeps_quotas_per_api_key(self, mock_responses, keys, key_pool_session):
+        """
+        Verifies that the mock counts the quota of every apikey separately.
+        """
+        spend(key_pool_session, keys[0], batches=3)
+        response = key_pool_session.get(url=url, params={"name": "Smith", "apikey": keys[1]})
+
+        assert response.headers["x-rate-limit-remaining"] == str(LIMIT - 1)
+
+    @pytest.mark.smoke
+    def test_batches_are_spread_over_keys_without_429(self, mock_responses, keys, key_pool_session):
+        """
+        Verifies that more names than one key's quota are looked up without a 429,
+        with every batch sent to the key with the most headroom.
+        """
+        pool = ApiKeyPool(keys)
+        pool.attach(key_pool_session)
+        # distinct names, so the batcher does not collapse any of them
+        names = [f"{name}{i}" for i, name in enumerate(generate_fake_last_names(num_last_names=LIMIT * 2 + 50))]
+
+        with NameBatcher(session=key_pool_session, linger=0.01, key_pool=pool) as batcher:
+            predictions = [future.result(timeout=10) for future in batcher.submit_many(names)]
+
+        assert [prediction.name for prediction in predictions] == names
+        assert all(call.response.status_code == requests.codes.ok for call in mock_responses.calls)
+        usage = pool.usage
+        assert sum(usage[key]["names"] for key in keys) == len(names)
+        assert all(usage[key]["names"] <= LIMIT and usage[key]["rejected"] == 0 for key in keys)
+        assert max(usage[key]["names"] for key in keys) - min(usage[key]["names"] for key in keys) <= max_batch_size
+
+    def test_exhausted_key_is_out_of_rotation_until_reset(self, mock_responses, keys, key_pool_session):
+        """
+        Verifies that a key without quota is skipped until its reset time has passed.
+        """
+        clock = FakeClock()
+        pool = ApiKeyPool(keys[:2], clock=clock.time, sleep=clock.sleep)
+        pool.attach(key_pool_session)
+        spend(key_pool_session, keys[0], batches=LIMIT // max_batch_size)
+
+        key, granted = pool.acquire(max_batch_size)
+        pool.release(key, granted)
+        assert (key, granted) == (keys[1], max_batch_size)
+        assert pool.usage[keys[0]]["remaining"] == 0
+
+        clock.now += pool.usage[keys[0]]["reset_in"]
+        spend(key_pool_session, keys[1], batches=1)
+
+        assert pool.acquire(max_batch_size) == (keys[0], max_batch_size)
+
+    def test_all_keys_exhausted_waits_for_earliest_reset(self, mock_responses, keys, key_pool_session):
+        """
+        Verifies that with every key exhausted, acquire waits for the key that resets first.
+        """
+        clock = FakeClock()
+        pool = ApiKeyPool(keys[:2], clock=clock.time, sleep=clock.sleep)
+        pool.attach(key_pool_session)
+        spend(key_pool_session, keys[0], batches=LIMIT // max_batch_size)
+        clock.now += 10
+        spend(key_pool_session, keys[1], batches=LIMIT // max_batch_size + 1)
+
+        key, granted = pool.acquire(max_batch_size)
+
+        assert (key, granted) == (keys[0], max_batch_size)
+        assert len(clock.sleeps) == 1
+        assert pool.usage[keys[1]]["rejected"] == 1
+
+    def test_concurrent_acquires_take_different_keys(self, keys):
+        """
+        Verifies that callers racing for the last headroom of a key get the other
+        key instead of waiting for a reset.
+        """
+        clock = FakeClock()
+        pool = ApiKeyPool(keys[:2], limit=max_batch_size, clock=clock.time, sleep=clock.sleep)
+
+        for _ in range(20):
+            barrier = threading.Barrier(2)
+            grants = []
+
+            def acquire():
+                barrier.wait()
+                grants.append(pool.acquire(max_batch_size))
+
+            threads = [threading.Thread(target=acquire) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+
+            assert sorted(grants) == [(keys[0], max_batch_size), (keys[1], max_batch_size)]
+            for key, granted in grants:
+                pool.release(key, granted)
+        assert clock.sleeps == []
+
+    def test_pool_needs_a_key(self):
+        """
+        Verifies that a pool without keys is rejected up front.
+        """
+        with pytest.raises(ValueError):
+            ApiKeyPool([])
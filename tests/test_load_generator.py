@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+from cli.load import CLIENT_SATURATED, Scenario, arrival_times, load_scenario, main, run_scenario
+from helpers.utils import log_config
+
+
+@pytest.fixture
+def restore_log_config():
+    defaults = dict(vars(log_config))
+    yield
+    log_config.configure(**defaults)
+
+
+class TestLoadGenerator:
+
+    def test_arrivals_follow_the_ramp(self):
+        """
+        Verifies that arrivals ramp up linearly and then hold the target rate until the end of the run.
+        """
+        arrivals = list(arrival_times(Scenario(target_rps=100, ramp_up_seconds=2, duration_seconds=3)))
+
+        assert len(arrivals) == 200
+        assert arrivals == sorted(arrivals)
+        assert sum(t <= 1 for t in arrivals) == 25
+        assert sum(1 < t <= 2 for t in arrivals) == 75
+        assert sum(t > 2 for t in arrivals) == 100
+        assert arrivals[-1] <= 3
+
+    def test_scenario_file_rejects_unknown_keys(self, tmp_path):
+        """
+        Verifies that a misspelled scenario key is reported instead of silently falling back to its default.
+        """
+        path = tmp_path / "scenario.json"
+        path.write_text(json.dumps({"target_rps": 10, "duration_seconds": 1, "rampup_seconds": 1}))
+
+        with pytest.raises(ValueError, match="rampup_seconds"):
+            load_scenario(str(path))
+
+    @pytest.mark.smoke
+    def test_load_against_mock_server(self, local_mock_server):
+        """
+        Verifies that every scheduled request is sent and reported with throughput and latency percentiles.
+        """
+        scenario = Scenario(target_rps=100, duration_seconds=1, batch_ratio=0.5)
+
+        report = asyncio.run(run_scenario(scenario, local_mock_server.url))
+
+        assert report["scheduled"] == report["sent"] == report["ok"] == 100
+        assert local_mock_server.requests == 100
+        assert report["errors"] == {}
+        assert report["names_per_second"] > report["ok_per_second"]
+        latency = report["latency_ms"]
+        assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+
+    @pytest.mark.parametrize("local_mock_server", [{"limit": 25}], indirect=True)
+    def test_errors_are_broken_down_by_error_constant(self, local_mock_server):
+        """
+        Verifies that rejected requests are counted under the name of their ERROR_* constant.
+        """
+        scenario = Scenario(target_rps=50, duration_seconds=1, batch_ratio=0.5)
+
+        report = asyncio.run(run_scenario(scenario, local_mock_server.url))
+
+        assert report["ok"] < report["sent"] == 50
+        assert set(report["errors"]) <= {"ERROR_REQUEST_LIMIT_REACHED", "ERROR_REQUEST_LIMIT_LOW"}
+        assert report["ok"] + sum(report["errors"].values()) == 50
+
+    @pytest.mark.parametrize("local_mock_server", [{"latency": 0.2}], indirect=True)
+    def test_open_loop_latency_includes_queueing(self, local_mock_server):
+        """
+        Verifies that requests are sent on schedule while earlier ones are still pending,
+        and that requests over the concurrency limit are reported as client saturation.
+        """
+        scenario = Scenario(target_rps=50, duration_seconds=0.5, concurrency=5)
+
+        report = asyncio.run(run_scenario(scenario, local_mock_server.url))
+
+        assert report["scheduled"] == 25
+        assert report["errors"][CLIENT_SATURATED] == report["scheduled"] - report["sent"] > 0
+        assert report["latency_ms"]["p50"] >= 200
+        assert report["elapsed_seconds"] < 1
+
+    def test_cli_writes_json_report(self, tmp_path, capsys, restore_log_config):
+        """
+        Verifies that the CLI runs a scenario against its own mock server and writes the report.
+        """
+        scenario = tmp_path / "scenario.json"
+        scenario.write_text(json.dumps({"url": "mock", "target_rps": 20, "duration_seconds": 0.5}))
+        output = tmp_path / "report.json"
+
+        assert main([str(scenario), "-o", str(output)]) == 0
+
+        report = json.loads(output.read_text())
+        assert report["ok"] == 10
+        assert "latency ms" in capsys.readouterr().err
@@ -0,0 +1,73 @@
+import gzip
+import threading
+
+import pytest
+from loguru import logger
+
+from helpers.log_sink import PerTestLogSink, add_per_test_log_sink
+
+
+@pytest.fixture
+def log_sink():
+    sink = PerTestLogSink(flush_every=1000, compress=False)
+    handler_id = add_per_test_log_sink(sink)
+    yield sink
+    logger.remove(handler_id)
+    sink.close()
+
+
+class TestPerTestLogSink:
+
+    def test_records_are_routed_by_context(self, log_sink, tmp_path):
+        """
+        Verifies that records go to the file bound in their context, and records of other threads to the current test.
+        """
+        first, second = str(tmp_path / "first.log"), str(tmp_path / "second.log")
+
+        log_sink.start(first)
+        with logger.contextualize(test_log_path=first):
+            logger.debug("first record")
+            thread = threading.Thread(target=lambda: logger.debug("thread record"))
+            thread.start()
+            thread.join()
+        with logger.contextualize(test_log_path=second):
+            logger.debug("second record")
+        log_sink.finish(first)
+        log_sink.finish(second)
+
+        first_log = open(first).read()
+        assert "first record" in first_log and "thread record" in first_log
+        assert "second record" not in first_log
+        assert "second record" in open(second).read()
+
+    def test_writes_are_buffered_until_the_test_finishes(self, log_sink, tmp_path):
+        """
+        Verifies that records are flushed in batches and all of them are on disk once the test finishes.
+        """
+        path = str(tmp_path / "buffered.log")
+
+        with logger.contextualize(test_log_path=path):
+            for i in range(10):
+                logger.debug(f"record {i}")
+        logger.complete()
+        assert open(path).read() == ""
+
+        log_sink.finish(path)
+        assert len(open(path).read().splitlines()) == 10
+
+    def test_finished_logs_are_compressed(self, tmp_path):
+        """
+        Verifies that finished logs are replaced by gzip files.
+        """
+        sink = PerTestLogSink(compress=True)
+        handler_id = add_per_test_log_sink(sink)
+        path = tmp_path / "compressed.log"
+
+        with logger.contextualize(test_log_path=str(path)):
+            logger.debug("compressed record")
+        sink.finish(str(path))
+        logger.remove(handler_id)
+        sink.close()
+
+        assert not path.exists()
+        assert "compressed record" in gzip.open(f"{path}.gz", "rt").read()
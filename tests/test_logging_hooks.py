@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from loguru import logger
+
+from clients.api_client import http_api_client
+from helpers.test_helpers import send_n_number_of_batch_requests
+from helpers.utils import log_config
+from settings import url, max_batch_size
+from test_data.test_data import generate_fake_last_name
+
+
+@pytest.fixture
+def log_messages():
+    messages = []
+    handler_id = logger.add(messages.append, level="DEBUG", format="{message}")
+    defaults = dict(vars(log_config))
+    yield messages
+    logger.remove(handler_id)
+    log_config.configure(**defaults)
+
+
+class TestLoggingHooks:
+
+    def test_bodies_are_truncated(self, mock_responses, log_messages):
+        """
+        Verifies that logged response bodies are cut to body_max_bytes.
+        """
+        log_config.configure(body_max_bytes=16)
+
+        response = http_api_client.get(url=url, params={"name": generate_fake_last_name()})
+
+        body = next(m for m in log_messages if m.startswith("Response Body: "))
+        assert body.strip() == f"Response Body: {response.text[:16]}... ({len(response.content)} bytes)"
+
+    def test_sampling_and_off_mode_skip_logging(self, mock_responses, log_messages):
+        """
+        Verifies that nothing is logged with a zero sample rate or when logging is off.
+        """
+        log_config.configure(sample_rate=0)
+        http_api_client.get(url=url, params={"name": generate_fake_last_name()})
+        log_config.configure(sample_rate=1, mode="off")
+        http_api_client.get(url=url, params={"name": generate_fake_last_name()})
+
+        assert log_messages == []
+
+    @pytest.mark.rate_limit
+    def test_errors_mode_logs_only_errors_as_json_lines(self, mock_responses, log_messages):
+        """
+        Verifies that errors mode only logs failed exchanges and json mode writes one json object per line.
+        """
+        log_config.configure(mode="errors", json_lines=True)
+
+        send_n_number_of_batch_requests(count=10, num_of_names=max_batch_size)
+        http_api_client.get(url=url, params={"name": generate_fake_last_name()})
+
+        records = [json.loads(message) for message in log_messages]
+        assert [record["type"] for record in records] == ["request", "response"]
+        assert records[1]["status_code"] == 429
+
+    @pytest.mark.parametrize("json_lines", [False, True])
+    def test_api_key_is_redacted(self, mock_responses, log_messages, json_lines):
+        """
+        Verifies that the apikey query parameter is masked in logged request urls.
+        """
+        log_config.configure(json_lines=json_lines)
+
+        http_api_client.get(url=url, params={"name": generate_fake_last_name(), "apikey": "secret-key"})
+
+        assert log_messages
+        assert not any("secret-key" in message for message in log_messages)
+        assert any("apikey=***" in message for message in log_messages)
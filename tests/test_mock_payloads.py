@@ -0,0 +1,42 @@
+import numpy as np
+
+from api_response_models.decoders import decode_nationalize_batch, decode_nationalize_response
+from mocks.payloads import (
+    generate_batch_payload,
+    generate_predictions,
+    generate_single_payload,
+    get_country_code_table,
+)
+from test_data.test_data import generate_fake_last_names
+
+
+class TestMockPayloads:
+
+    def test_batch_payload_matches_nationalize_response_schema(self):
+        """
+        Verifies that a large generated batch validates as NationalizeResponse items
+        with distinct countries and descending probabilities that add up to less than one.
+        """
+        names = generate_fake_last_names(num_last_names=1000)
+
+        predictions = decode_nationalize_batch(generate_batch_payload(names))
+
+        assert [prediction.name for prediction in predictions] == names
+        for prediction in predictions:
+            codes = [country.country_id for country in prediction.country]
+            probabilities = [country.probability for country in prediction.country]
+            assert 100 <= prediction.count <= 1000
+            assert len(set(codes)) == 3 and set(codes) <= set(get_country_code_table().tolist())
+            assert probabilities == sorted(probabilities, reverse=True)
+            assert 0 < sum(probabilities) <= 1
+
+    def test_single_payload_and_seeded_generation(self):
+        """
+        Verifies the single name body and that the same seed generates the same predictions.
+        """
+        prediction = decode_nationalize_response(generate_single_payload("Smith"))
+
+        assert prediction.name == "Smith"
+        assert generate_predictions(["a", "b"], rng=np.random.default_rng(1)) == generate_predictions(
+            ["a", "b"], rng=np.random.default_rng(1)
+        )
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from constants.error_constants import (
+    ERROR_REQUEST_LIMIT_REACHED,
+    ERROR_REQUEST_LIMIT_LOW,
+)
+from mocks.quota_store import FileQuotaStore, QuotaStore
+
+
+class TestMockQuotaStore:
+
+    @pytest.mark.rate_limit
+    def test_concurrent_consumers_never_exceed_the_limit(self):
+        """
+        Verifies that concurrent decrements are atomic and stop exactly at the limit.
+        """
+        store = QuotaStore(limit=100)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            quotas = list(executor.map(lambda _: store.consume("key"), range(150)))
+
+        assert sum(quota.status_code == 200 for quota in quotas) == 100
+        assert all(quota.error == ERROR_REQUEST_LIMIT_REACHED for quota in quotas if quota.status_code == 429)
+        assert store.remaining("key") == 0
+
+    @pytest.mark.rate_limit
+    def test_quota_is_refilled_after_the_reset_window(self):
+        """
+        Verifies that x-rate-limit-reset counts down and the quota is refilled once it passes.
+        """
+        now = [0.0]
+        store = QuotaStore(limit=10, window=60, clock=lambda: now[0])
+
+        assert store.consume("key", num_of_names=8, is_batch=True).reset == 60
+        now[0] += 45
+        quota = store.consume("key", num_of_names=3, is_batch=True)
+        assert (quota.status_code, quota.error, quota.remaining, quota.reset) == (
+            429,
+            ERROR_REQUEST_LIMIT_LOW,
+            2,
+            15,
+        )
+        now[0] += 15
+        assert store.consume("key", num_of_names=3, is_batch=True).remaining == 7
+
+    @pytest.mark.rate_limit
+    def test_file_quota_store_is_shared_between_instances(self, tmp_path):
+        """
+        Verifies that FileQuotaStore instances on the same file see each other's deductions.
+        """
+        path = str(tmp_path / "quotas.sqlite3")
+        first, second = FileQuotaStore(path, limit=10), FileQuotaStore(path, limit=10)
+
+        first.consume("key", num_of_names=4, is_batch=True)
+        second.consume("key", num_of_names=4, is_batch=True)
+
+        assert first.remaining("key") == 2
+        assert second.consume("key", num_of_names=3, is_batch=True).error == ERROR_REQUEST_LIMIT_LOW
+        first.close()
+        second.close()
+
+    @pytest.mark.rate_limit
+    def test_partitions_keep_quotas_apart(self, tmp_path):
+        """
+        Verifies that stores with different partitions keep separate quotas in the same file,
+        while stores without one share them.
+        """
+        path = str(tmp_path / "quotas.sqlite3")
+        gw0 = FileQuotaStore(path, limit=10, partition="gw0")
+        gw1 = FileQuotaStore(path, limit=10, partition="gw1")
+        shared = FileQuotaStore(path, limit=10)
+
+        gw0.consume("key", num_of_names=8, is_batch=True)
+        shared.consume("key", num_of_names=3, is_batch=True)
+
+        assert gw1.remaining("key") == 10
+        assert gw1.consume("key", num_of_names=8, is_batch=True).status_code == 200
+        assert gw0.remaining("key") == 2
+        assert shared.remaining("key") == 7
+        for store in (gw0, gw1, shared):
+            store.close()
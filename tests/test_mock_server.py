@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+import requests
+
+from clients.api_client import http_api_client
+from clients.async_api_client import AsyncNationalizeClient
+from helpers.test_helpers import (
+    assert_common_success_response,
+    assert_common_error_response,
+)
+from constants.error_constants import ERROR_MISSING_NAME, ERROR_INVALID_NAME
+from mocks.server import MockNationalizeServer
+from settings import max_batch_size
+from test_data.test_data import generate_fake_last_name, generate_fake_last_names
+
+
+class TestMockServer:
+
+    @pytest.mark.smoke
+    def test_mock_server_successful_name_prediction(self, mock_server):
+        """
+        Verifies that the mock server answers like the Nationalize API for a valid last name.
+        """
+        params = {"name": generate_fake_last_name(), "apikey": "successful_name_prediction"}
+
+        response = http_api_client.get(url=mock_server.url, params=params)
+
+        assert_common_success_response(response=response, params=params)
+
+    @pytest.mark.parametrize(
+        "num_of_names, error",
+        [
+            (0, ERROR_MISSING_NAME),
+            (max_batch_size + 1, ERROR_INVALID_NAME),
+        ],
+    )
+    def test_mock_server_validation_errors(self, mock_server, num_of_names, error):
+        """
+        Verifies that the mock server rejects a missing name and too many names with a 422.
+        """
+        params = {"name[]": generate_fake_last_names(num_last_names=num_of_names)} if num_of_names else {}
+
+        response = http_api_client.get(url=mock_server.url, params=params)
+
+        assert_common_error_response(
+            status_code=requests.codes.unprocessable_entity,
+            response=response,
+            error=error,
+        )
+
+    def test_mock_server_keeps_connections_alive(self, mock_server):
+        """
+        Verifies that concurrent async requests are served over a small pool of kept-alive connections.
+        """
+        connections = mock_server.connections
+        params_list = [{"name": generate_fake_last_name(), "apikey": "keep_alive"} for _ in range(50)]
+
+        async def run():
+            async with AsyncNationalizeClient(base_url=mock_server.url, concurrency=5) as client:
+                return await client.gather(params_list)
+
+        responses = asyncio.run(run())
+
+        assert all(r.status_code == requests.codes.ok for r in responses)
+        assert mock_server.connections - connections <= 5
+
+    def test_mock_server_injects_errors(self):
+        """
+        Verifies that the configured error rate is answered with the error status.
+        """
+        server = MockNationalizeServer(port=0, error_rate=1, error_status=503)
+        server.start_in_thread()
+        try:
+            response = requests.get(server.url, params={"name": generate_fake_last_name()})
+        finally:
+            server.stop()
+
+        assert response.status_code == requests.codes.service_unavailable
@@ -0,0 +1,120 @@
+import time
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+
+import pytest
+import requests
+import responses
+
+from clients.batcher import NameBatcher
+from clients.exceptions import NationalizeApiError
+from clients.rate_limiter import RateLimitScheduler
+from helpers.test_helpers import (
+    assert_common_success_response_json,
+    send_n_number_of_batch_requests,
+)
+from constants.error_constants import ERROR_REQUEST_LIMIT_LOW
+from mocks.payloads import generate_batch_payload
+from settings import max_batch_size, url
+from test_data.test_data import generate_fake_last_name, generate_fake_last_names
+
+
+class TestNameBatcher:
+
+    @pytest.mark.smoke
+    def test_single_name_lookup_is_resolved(self, mock_responses):
+        """
+        Verifies that a single submitted name is sent once the linger timeout expires.
+        """
+        name = generate_fake_last_name()
+
+        with NameBatcher() as batcher:
+            data = batcher.submit(name).result(timeout=5)
+
+        assert_common_success_response_json(data=data, name=name)
+
+    def test_names_are_packed_into_max_batch_size_requests(self, mock_responses):
+        """
+        Verifies that submitted names are coalesced into name[] requests
+        of up to max_batch_size names and split back out per name.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size * 2 + 5)
+
+        with NameBatcher(linger=1) as batcher:
+            futures = batcher.submit_many(names)
+            predictions = [future.result(timeout=5) for future in futures]
+
+        assert [data.name for data in predictions] == names
+        assert len(mock_responses.calls) == 3
+
+    @pytest.mark.rate_limit
+    def test_error_response_is_set_on_every_future(self, mock_responses):
+        """
+        Verifies that an error response fails every lookup of the batch.
+        """
+        send_n_number_of_batch_requests(count=9, num_of_names=max_batch_size)
+        send_n_number_of_batch_requests(count=1, num_of_names=max_batch_size - 1)
+
+        with NameBatcher(linger=1) as batcher:
+            futures = batcher.submit_many(generate_fake_last_names(num_last_names=2))
+
+        for future in futures:
+            with pytest.raises(NationalizeApiError) as e:
+                future.result(timeout=5)
+            assert e.value.error == ERROR_REQUEST_LIMIT_LOW
+
+    def test_failing_quota_reservation_fails_the_batch(self, mock_responses):
+        """
+        Verifies that an error while reserving quota fails the batch and the batcher keeps sending later batches.
+        """
+        class FailingOnceScheduler(RateLimitScheduler):
+            failed = False
+
+            def acquire(self, num_of_names=1, cancel=None):
+                if not self.failed:
+                    self.failed = True
+                    raise RuntimeError("quota store unavailable")
+                return super().acquire(num_of_names, cancel=cancel)
+
+        name = generate_fake_last_name()
+
+        with NameBatcher(scheduler=FailingOnceScheduler()) as batcher:
+            with pytest.raises(RuntimeError):
+                batcher.submit(name).result(timeout=5)
+            data = batcher.submit(name).result(timeout=5)
+
+        assert_common_success_response_json(data=data, name=name)
+
+    def test_close_cancels_a_wait_for_the_reset(self):
+        """
+        Verifies that close() does not wait out the reset for names that have no quota.
+        """
+        scheduler = RateLimitScheduler()
+        scheduler.observe(
+            SimpleNamespace(status_code=requests.codes.ok, headers={"x-rate-limit-remaining": "0", "x-rate-limit-reset": "3600"})
+        )
+        batcher = NameBatcher(linger=0, scheduler=scheduler)
+        future = batcher.submit(generate_fake_last_name())
+
+        started = time.monotonic()
+        batcher.close()
+
+        assert time.monotonic() - started < 5
+        with pytest.raises(CancelledError):
+            future.result(timeout=5)
+
+    def test_predictions_are_matched_by_name(self, mock_responses):
+        """
+        Verifies that predictions are resolved by name when the response reorders them,
+        and that a name missing from the response fails only its own future.
+        """
+        names = generate_fake_last_names(num_last_names=3)
+        body = generate_batch_payload([names[1], names[0]])
+        mock_responses.replace(responses.GET, url, body=body, content_type="application/json")
+
+        with NameBatcher(linger=1) as batcher:
+            futures = batcher.submit_many(names)
+
+        assert [future.result(timeout=5).name for future in futures[:2]] == names[:2]
+        with pytest.raises(NationalizeApiError):
+            futures[2].result(timeout=5)
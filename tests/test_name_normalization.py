@@ -0,0 +1,80 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from api_response_models.decoders import PredictionIndex
+from clients.api_client import http_api_client
+from clients.batcher import NameBatcher
+from clients.cache import CachedNationalizeClient, PredictionCache
+from helpers.names import NameIndex, normalize_name
+from settings import url
+from test_data.test_data import generate_fake_last_names
+
+
+def sent_names(call) -> list:
+    return parse_qs(urlsplit(call.request.url).query)["name[]"]
+
+
+class TestNameNormalization:
+
+    @pytest.mark.smoke
+    def test_spellings_of_a_name_share_one_key(self):
+        """
+        Verifies that case, surrounding and repeated whitespace and compatibility forms normalize to one key.
+        """
+        assert {normalize_name(name) for name in ("Smith", "smith ", " SMITH", "ＳＭＩＴＨ", "Smith\t")} == {"smith"}
+        assert normalize_name("Mary   Ann") == normalize_name("mary ann")
+        assert normalize_name("Strauß") == normalize_name("STRAUSS")
+        assert normalize_name("Smith") != normalize_name("Smyth")
+
+    def test_index_collapses_duplicates_and_fans_out(self):
+        """
+        Verifies that duplicates are collapsed to their first spelling and results reach every input.
+        """
+        index = NameIndex(["Smith", "Jones", "smith ", "SMITH", "jones"])
+
+        assert index.unique == ["Smith", "Jones"]
+        assert index.duplicates == 3
+        assert "ＪＯＮＥＳ" in index
+        assert index.fan_out({"Smith": 1, "Jones": 2}) == [1, 2, 1, 1, 2]
+
+    def test_batcher_sends_each_normalized_name_once(self, mock_responses):
+        """
+        Verifies that the batcher sends duplicate spellings once and resolves every future with its own spelling.
+        """
+        names = ["Smith", "smith ", "SMITH", "Jones", "jones"]
+
+        with NameBatcher(linger=1) as batcher:
+            futures = batcher.submit_many(names)
+            predictions = [future.result(timeout=5) for future in futures]
+
+        assert [prediction.name for prediction in predictions] == names
+        assert predictions[0].country == predictions[2].country
+        assert batcher.deduplicated == 3
+        assert [sent_names(call) for call in mock_responses.calls] == [["Smith", "Jones"]]
+
+    def test_cached_client_fetches_each_normalized_miss_once(self, mock_responses, tmp_path):
+        """
+        Verifies that cache misses with the same normalized name are requested once.
+        """
+        cache = PredictionCache(path=str(tmp_path / "predictions.sqlite3"))
+        name, other = "Smith", "Jones"
+
+        predictions = CachedNationalizeClient(cache=cache).predict_batch([name, other, name.upper(), f" {name} "])
+
+        assert [prediction.name for prediction in predictions] == [name, other, name.upper(), f" {name} "]
+        assert len(mock_responses.calls) == 1
+        assert sent_names(mock_responses.calls[0]) == [name, other]
+        cache.close()
+
+    def test_response_items_are_matched_on_normalized_names(self, mock_responses):
+        """
+        Verifies that response items match request names that differ only in spelling.
+        """
+        names = generate_fake_last_names(num_last_names=3)
+        response = http_api_client.get(url=url, params={"name[]": names})
+
+        index = PredictionIndex.from_json(response.content)
+
+        assert index.missing([f" {name.upper()}" for name in names]) == []
+        assert [index[f" {name.upper()}"].name for name in names] == names
@@ -1,13 +1,24 @@
 import pytest
+import requests
 from pydantic import ValidationError
 
-from helpers.test_helpers import *
-from constants.error_constants import *
+from helpers.test_helpers import (
+    assert_all_names_are_in_response,
+    assert_common_error_response,
+    assert_common_headers,
+    assert_common_success_batch_usage_response_json,
+    assert_common_success_response,
+    send_n_number_of_batch_requests,
+)
+from constants.error_constants import (
+    ERROR_INVALID_NAME,
+    ERROR_MISSING_NAME,
+    ERROR_REQUEST_LIMIT_LOW,
+    ERROR_REQUEST_LIMIT_REACHED,
+)
 from clients.api_client import http_api_client
 from settings import url, max_batch_size
-from api_response_models.nationalize_api_models import (
-    NationalizeResponse,
-)
+from api_response_models.decoders import PredictionIndex
 from test_data.test_data import (
     generate_fake_last_name,
     generate_fake_last_names,
@@ -72,14 +83,15 @@ class TestNationalizeApi:
 
         assert_common_headers(response=response)
 
-        for item in response.json():
-            try:
-                data = NationalizeResponse(**item)
-                assert_common_success_batch_usage_response_json(data=data)
-            except ValidationError as e:
-                assert False, f"Pydantic validation failed: {e}"
+        try:
+            index = PredictionIndex.from_json(response.content)
+        except ValidationError as e:
+            assert False, f"Pydantic validation failed: {e}"
+
+        for data in index:
+            assert_common_success_batch_usage_response_json(data=data)
 
-        assert_all_names_are_in_response(response=response, names=names)
+        assert_all_names_are_in_response(response=index, names=names)
 
 
     def test_batch_usage_with_more_than_ten_names(self):
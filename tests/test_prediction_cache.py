@@ -0,0 +1,106 @@
+import pytest
+
+from api_response_models.nationalize_api_models import NationalizeResponse
+from clients.cache import CachedNationalizeClient, PredictionCache
+from helpers.test_helpers import assert_common_success_response_json
+from settings import max_batch_size
+from test_data.test_data import generate_fake_last_name, generate_fake_last_names
+
+
+@pytest.fixture
+def prediction_cache(tmp_path):
+    cache = PredictionCache(path=str(tmp_path / "predictions.sqlite3"))
+    yield cache
+    cache.close()
+
+
+class TestPredictionCache:
+
+    @pytest.mark.smoke
+    def test_single_name_is_served_from_cache(self, mock_responses, prediction_cache):
+        """
+        Verifies that a repeated lookup of a normalized name is a cache hit.
+        """
+        client = CachedNationalizeClient(cache=prediction_cache)
+        name = generate_fake_last_name()
+
+        first = client.predict(name)
+        second = client.predict(f"  {name.upper()} ")
+
+        assert_common_success_response_json(data=second, name=f"  {name.upper()} ")
+        assert second.country == first.country
+        assert len(mock_responses.calls) == 1
+        assert prediction_cache.stats["hits"] == 1
+
+    def test_batch_fetches_only_missing_names(self, mock_responses, prediction_cache):
+        """
+        Verifies that a batch lookup only requests cache misses and merges the results in order.
+        """
+        client = CachedNationalizeClient(cache=prediction_cache)
+        cached = generate_fake_last_names(num_last_names=max_batch_size)
+        client.predict_batch(cached)
+        missing = [name + "x" for name in cached[:3]]
+
+        predictions = client.predict_batch(cached[:5] + missing)
+
+        assert [data.name for data in predictions] == cached[:5] + missing
+        assert mock_responses.calls[-1].request.params["name[]"] == missing
+        assert len(mock_responses.calls) == 2
+
+    def test_entries_persist_expire_and_are_evicted(self, tmp_path):
+        """
+        Verifies that entries are read back from disk, expire after the TTL
+        and are evicted once the store exceeds its size cap.
+        """
+        now = [0.0]
+        path = str(tmp_path / "predictions.sqlite3")
+        cache = PredictionCache(path=path, ttl=60, max_size=2, clock=lambda: now[0])
+        for name in ["a", "b", "c"]:
+            now[0] += 1
+            cache.put(NationalizeResponse(count=1, name=name, country=[]))
+        cache.close()
+
+        cache = PredictionCache(path=path, ttl=60, max_size=2, clock=lambda: now[0])
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.get("c").name == "c"
+
+        now[0] += 61
+        assert cache.get("c") is None
+        assert cache.stats == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+        cache.close()
+
+    def test_memory_hits_keep_entries_from_eviction(self, tmp_path):
+        """
+        Verifies that an entry read from memory counts as recently accessed on disk and survives eviction.
+        """
+        now = [0.0]
+        path = str(tmp_path / "predictions.sqlite3")
+        cache = PredictionCache(path=path, max_size=2, clock=lambda: now[0])
+        for name in ["hot", "cold"]:
+            now[0] += 1
+            cache.put(NationalizeResponse(count=1, name=name, country=[]))
+        now[0] += 1
+        assert cache.get("hot").name == "hot"
+        now[0] += 1
+        cache.put(NationalizeResponse(count=1, name="new", country=[]))
+        cache.close()
+
+        cache = PredictionCache(path=path, max_size=2, clock=lambda: now[0])
+        assert len(cache) == 2
+        assert cache.get("cold") is None
+        assert cache.get("hot").name == "hot"
+        cache.close()
+
+    def test_hits_do_not_write_to_disk(self, prediction_cache):
+        """
+        Verifies that lookups only record access times in memory until the next put.
+        """
+        prediction_cache.put(NationalizeResponse(count=1, name="hot", country=[]))
+        changes = prediction_cache._db.total_changes
+
+        for _ in range(3):
+            assert prediction_cache.get("hot").name == "hot"
+
+        assert prediction_cache._db.total_changes == changes
+        assert not prediction_cache._db.in_transaction
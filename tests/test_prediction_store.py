@@ -0,0 +1,128 @@
+import io
+import csv
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from analytics.prediction_store import PredictionStore
+from api_response_models.decoders import decode_nationalize_batch
+from clients.api_client import http_api_client
+from mocks.payloads import generate_batch_payload
+from settings import url, max_batch_size
+from test_data.test_data import generate_fake_last_names
+
+PREDICTIONS = [
+    {"count": 10, "name": "Smith", "country": [
+        {"country_id": "GB", "probability": 0.2},
+        {"country_id": "US", "probability": 0.5},
+        {"country_id": "IE", "probability": 0.1},
+    ]},
+    {"count": 5, "name": "Müller", "country": [{"country_id": "DE", "probability": 0.7}]},
+    {"count": 0, "name": "Zzz", "country": []},
+]
+
+
+class TestPredictionStore:
+
+    @pytest.mark.smoke
+    def test_api_responses_round_trip(self, mock_responses):
+        """
+        Verifies that predictions appended from a raw response body read back as the same models.
+        """
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+        response = http_api_client.get(url=url, params={"name[]": names})
+        store = PredictionStore()
+
+        store.extend_json(response.content)
+
+        expected = decode_nationalize_batch(response.content)
+        assert len(store) == max_batch_size
+        assert store.names == names
+        for row, prediction in enumerate(expected):
+            restored = store.to_prediction(row)
+            assert restored.name == prediction.name and restored.count == prediction.count
+            assert [c.country_id for c in restored.country] == [c.country_id for c in prediction.country]
+            assert [c.probability for c in restored.country] == pytest.approx(
+                [c.probability for c in prediction.country], rel=1e-6
+            )
+
+    def test_top_k_and_filter(self):
+        """
+        Verifies that top_k sorts countries per name and filter drops countries and names below the threshold.
+        """
+        store = PredictionStore.from_predictions(PREDICTIONS)
+
+        codes, probabilities = store.top_k(k=2)
+        assert codes.tolist() == [["US", "GB"], ["DE", ""], ["", ""]]
+        assert probabilities[0].tolist() == pytest.approx([0.5, 0.2])
+        assert np.isnan(probabilities[1, 1])
+
+        filtered = store.filter(min_probability=0.2)
+        assert filtered.names == ["Smith", "Müller"]
+        assert filtered.countries(0) == [("GB", pytest.approx(0.2)), ("US", pytest.approx(0.5))]
+        assert filtered.counts.tolist() == [10, 5]
+
+    @pytest.mark.parametrize(
+        "invalid",
+        [
+            {"count": 1, "name": "Bad"},
+            {"count": None, "name": "Bad", "country": []},
+        ],
+    )
+    def test_invalid_prediction_appends_nothing(self, invalid):
+        """
+        Verifies that a batch with an invalid prediction leaves the store as it was.
+        """
+        store = PredictionStore.from_predictions(PREDICTIONS[:1])
+
+        with pytest.raises((KeyError, TypeError)):
+            store.extend([PREDICTIONS[1], invalid])
+        store.extend(PREDICTIONS[2:])
+
+        assert store.names == ["Smith", "Zzz"]
+        assert store.countries(1) == []
+
+    def test_csv_export(self):
+        """
+        Verifies that the csv export has one row per name and country.
+        """
+        output = io.StringIO()
+        PredictionStore.from_predictions(PREDICTIONS).to_csv(output)
+
+        rows = list(csv.reader(io.StringIO(output.getvalue())))
+        assert rows[0] == ["name", "count", "country_id", "probability"]
+        assert [row[:3] for row in rows[1:]] == [
+            ["Smith", "10", "GB"], ["Smith", "10", "US"], ["Smith", "10", "IE"], ["Müller", "5", "DE"], ["Zzz", "0", ""]
+        ]
+
+    def test_parquet_export(self, tmp_path):
+        """
+        Verifies that the Parquet export reads back with the same rows.
+        """
+        pq = pytest.importorskip("pyarrow.parquet")
+        path = str(tmp_path / "predictions.parquet")
+
+        PredictionStore.from_predictions(PREDICTIONS).to_parquet(path)
+
+        table = pq.read_table(path)
+        assert table.column("name").to_pylist() == ["Smith", "Smith", "Smith", "Müller"]
+        assert table.column("country_id").to_pylist() == ["GB", "US", "IE", "DE"]
+
+    def test_memory_per_name_is_an_order_of_magnitude_smaller(self):
+        """
+        Verifies that the store uses at least ten times less memory than a list of models.
+        """
+        names = generate_fake_last_names(num_last_names=20_000)
+        payload = generate_batch_payload(names)
+
+        tracemalloc.start()
+        models = decode_nationalize_batch(payload)
+        models_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del models
+
+        store = PredictionStore(capacity=len(names))
+        store.extend_json(payload)
+
+        assert store.nbytes * 10 < models_bytes
@@ -0,0 +1,116 @@
+import time
+import threading
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from clients.batcher import NameBatcher
+from clients.rate_limiter import RateLimitScheduler
+from helpers.test_helpers import FakeClock
+from helpers.utils import log_request, log_response
+import mocks.mocks
+from settings import url, max_batch_size
+from test_data.test_data import generate_fake_last_names
+
+
+@pytest.fixture
+def rate_limited_session():
+    session = requests.Session()
+    session.hooks["response"] = [log_request, log_response]
+    yield session
+    session.close()
+
+
+class TestRateLimitScheduler:
+
+    @pytest.mark.rate_limit
+    def test_scheduler_learns_remaining_quota_from_headers(
+        self, mock_responses, rate_limited_session
+    ):
+        """
+        Verifies that the scheduler learns the remaining quota from each response
+        and only grants as many names as are left.
+        """
+        scheduler = RateLimitScheduler()
+        scheduler.attach(rate_limited_session)
+
+        for _ in range(9):
+            response = rate_limited_session.get(
+                url=url,
+                params={"name[]": generate_fake_last_names(num_last_names=max_batch_size)},
+            )
+            assert response.status_code == requests.codes.ok
+
+        assert scheduler.remaining == int(response.headers["x-rate-limit-remaining"])
+        assert scheduler.acquire(max_batch_size + 1) == scheduler.remaining
+
+    @pytest.mark.rate_limit
+    def test_batches_shrink_and_wait_for_reset_without_429(
+        self, request, mock_responses, rate_limited_session
+    ):
+        """
+        Verifies that batches shrink to the remaining quota and the rest are held
+        until the reset instead of failing with a 429.
+        """
+        waits = []
+
+        def reset_quota(seconds):
+            waits.append(seconds)
+            mocks.mocks.mock_quota_store.reset(request.node.name)
+
+        scheduler = RateLimitScheduler(sleep=reset_quota)
+        scheduler.attach(rate_limited_session)
+        rate_limited_session.get(
+            url=url, params={"name[]": generate_fake_last_names(num_last_names=5)}
+        )
+        for _ in range(9):
+            rate_limited_session.get(
+                url=url,
+                params={"name[]": generate_fake_last_names(num_last_names=max_batch_size)},
+            )
+
+        names = generate_fake_last_names(num_last_names=max_batch_size)
+        with NameBatcher(
+            session=rate_limited_session, linger=1, scheduler=scheduler
+        ) as batcher:
+            predictions = [f.result(timeout=5) for f in batcher.submit_many(names)]
+
+        assert [data.name for data in predictions] == names
+        assert len(waits) == 1
+        assert all(
+            call.response.status_code == requests.codes.ok
+            for call in mock_responses.calls
+        )
+        assert [len(call.request.params["name[]"]) for call in mock_responses.calls[-2:]] == [5, 5]
+
+    def test_unknown_reset_backs_off_and_probes_with_one_name(self):
+        """
+        Verifies that a 429 without rate limit headers is followed by a back-off and a single name probe, not a full refill.
+        """
+        clock = FakeClock()
+        scheduler = RateLimitScheduler(clock=clock.time, sleep=clock.sleep)
+        scheduler.observe(SimpleNamespace(status_code=requests.codes.too_many_requests, headers={}))
+
+        assert scheduler.acquire(max_batch_size) == 1
+        scheduler.release(1)
+        scheduler.observe(SimpleNamespace(status_code=requests.codes.too_many_requests, headers={}))
+        assert scheduler.acquire(max_batch_size) == 1
+        assert clock.sleeps == [1.0, 2.0]
+
+    def test_wake_cancels_a_wait_for_the_reset(self):
+        """
+        Verifies that a caller waiting for the reset gives up once its cancel event is set and the scheduler is woken.
+        """
+        scheduler = RateLimitScheduler()
+        scheduler.observe(
+            SimpleNamespace(status_code=requests.codes.ok, headers={"x-rate-limit-remaining": "0", "x-rate-limit-reset": "3600"})
+        )
+        cancel = threading.Event()
+        threading.Timer(0.1, lambda: (cancel.set(), scheduler.wake())).start()
+
+        started = time.monotonic()
+        with pytest.raises(CancelledError):
+            scheduler.acquire(1, cancel=cancel)
+        assert time.monotonic() - started < 5
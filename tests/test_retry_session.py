@@ -0,0 +1,195 @@
+import time
+from functools import partial
+
+import pytest
+import requests
+import responses
+from loguru import logger
+from responses import RequestsMock
+
+import mocks.mocks
+from clients.retry import create_resilient_client
+from constants.error_constants import ERROR_REQUEST_LIMIT_REACHED, ERROR_REQUEST_LIMIT_LOW
+from helpers.test_helpers import FakeClock, assert_common_success_response
+from mocks.mocks import generate_nationalize_api_mock_responses, set_mock_quota_store
+from mocks.quota_store import QuotaStore
+from settings import url, max_batch_size
+from test_data.test_data import generate_fake_last_name, generate_fake_last_names
+
+
+@pytest.fixture
+def flaky_api(request):
+    """
+    Mock API that answers with the failures added to it first and then with mock responses.
+    """
+    mocks.mocks.mock_quota_store.reset(request.node.name)
+    with RequestsMock() as m:
+        def serve_mock():
+            m.add_callback(
+                method=responses.GET,
+                url=url,
+                callback=partial(generate_nationalize_api_mock_responses, test_name=request.node.name),
+                content_type="application/json",
+            )
+        m.serve_mock = serve_mock
+        yield m
+
+
+@pytest.fixture
+def use_quota_store():
+    """
+    Swaps the mock quota store for the test and restores the original one afterwards.
+    """
+    original = mocks.mocks.mock_quota_store
+    yield set_mock_quota_store
+    set_mock_quota_store(original)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestResilientSession:
+
+    @pytest.mark.smoke
+    def test_connection_errors_are_retried_with_backoff(self, flaky_api, clock):
+        """
+        Verifies that connection errors are retried with exponential backoff until a response arrives.
+        """
+        flaky_api.add(responses.GET, url, body=requests.exceptions.ConnectionError("reset"))
+        flaky_api.add(responses.GET, url, body=requests.exceptions.ConnectionError("reset"))
+        flaky_api.serve_mock()
+        session = create_resilient_client(sleep=clock.sleep, jitter=lambda: 1.0)
+        name = generate_fake_last_name()
+
+        response = session.get(url=url, params={"name": name})
+
+        assert_common_success_response(response=response, params={"name": name})
+        assert session.stats == {"retries": 2, "hedges": 0}
+        assert clock.sleeps == [0.1, 0.2]
+
+    def test_server_errors_are_retried(self, flaky_api, clock):
+        """
+        Verifies that 5xx responses are retried.
+        """
+        flaky_api.add(responses.GET, url, status=503, json={"error": "Service Unavailable"})
+        flaky_api.serve_mock()
+        session = create_resilient_client(sleep=clock.sleep, jitter=lambda: 0.5)
+
+        response = session.get(url=url, params={"name": generate_fake_last_name()})
+
+        assert response.status_code == requests.codes.ok
+        assert session.retries == 1
+        assert clock.sleeps == [0.05]
+
+    def test_retries_give_up_after_max_retries(self, flaky_api, clock):
+        """
+        Verifies that the last error is raised once the retries are used up.
+        """
+        for _ in range(3):
+            flaky_api.add(responses.GET, url, body=requests.exceptions.ConnectionError("reset"))
+        session = create_resilient_client(max_retries=2, sleep=clock.sleep)
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.get(url=url, params={"name": generate_fake_last_name()})
+        assert session.retries == 2
+
+    @pytest.mark.rate_limit
+    def test_request_limit_reached_waits_for_reset(self, flaky_api, clock, use_quota_store):
+        """
+        Verifies that a "Request limit reached" 429 waits x-rate-limit-reset seconds and then succeeds.
+        """
+        use_quota_store(QuotaStore(limit=1, window=5, clock=clock.time))
+        flaky_api.serve_mock()
+        session = create_resilient_client(sleep=clock.sleep)
+
+        session.get(url=url, params={"name": generate_fake_last_name()})
+        response = session.get(url=url, params={"name": generate_fake_last_name()})
+
+        assert response.status_code == requests.codes.ok
+        assert flaky_api.calls[1].response.json()["error"] == ERROR_REQUEST_LIMIT_REACHED
+        assert clock.sleeps == [5]
+        assert session.retries == 1
+
+    @pytest.mark.rate_limit
+    def test_reset_above_max_wait_is_not_retried(self, flaky_api, clock):
+        """
+        Verifies that a 429 whose reset is further away than max_reset_wait is returned.
+        """
+        flaky_api.add(
+            responses.GET,
+            url,
+            status=429,
+            json={"error": ERROR_REQUEST_LIMIT_REACHED},
+            headers={"x-rate-limit-reset": "3600"},
+        )
+        session = create_resilient_client(max_reset_wait=60, sleep=clock.sleep)
+
+        response = session.get(url=url, params={"name": generate_fake_last_name()})
+
+        assert response.status_code == requests.codes.too_many_requests
+        assert session.retries == 0
+
+    @pytest.mark.rate_limit
+    def test_request_limit_too_low_is_not_retried(self, flaky_api, clock, use_quota_store):
+        """
+        Verifies that a "Request limit too low" 429 is returned without a retry.
+        """
+        use_quota_store(QuotaStore(limit=max_batch_size - 1))
+        flaky_api.serve_mock()
+        session = create_resilient_client(sleep=clock.sleep)
+
+        response = session.get(
+            url=url, params={"name[]": generate_fake_last_names(num_last_names=max_batch_size)}
+        )
+
+        assert response.status_code == requests.codes.too_many_requests
+        assert response.json()["error"] == ERROR_REQUEST_LIMIT_LOW
+        assert session.retries == 0
+        assert clock.sleeps == []
+
+    def test_slow_request_is_hedged(self, request):
+        """
+        Verifies that a second copy of a slow request is sent and the faster response wins.
+        """
+        calls = []
+
+        def slow_first_call(mock_request):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                time.sleep(0.5)
+            return generate_nationalize_api_mock_responses(mock_request, test_name=request.node.name)
+
+        mocks.mocks.mock_quota_store.reset(request.node.name)
+        session = create_resilient_client(hedge_after=0.05)
+        name = generate_fake_last_name()
+        with RequestsMock(assert_all_requests_are_fired=False) as m:
+            m.add_callback(responses.GET, url, callback=slow_first_call, content_type="application/json")
+            started = time.monotonic()
+            response = session.get(url=url, params={"name": name})
+            elapsed = time.monotonic() - started
+            time.sleep(0.5)
+        session.close()
+
+        assert_common_success_response(response=response, params={"name": name})
+        assert elapsed < 0.5
+        assert len(calls) == 2
+        assert session.stats == {"retries": 0, "hedges": 1}
+
+    def test_hedged_requests_keep_the_logging_context(self, mock_responses):
+        """
+        Verifies that values bound with logger.contextualize() reach the logging hooks on the executor threads.
+        """
+        extras = []
+        handler_id = logger.add(lambda message: extras.append(message.record["extra"]), level="DEBUG")
+        session = create_resilient_client(hedge_after=5)
+        try:
+            with logger.contextualize(run_id="enrich-1"):
+                session.get(url=url, params={"name": generate_fake_last_name()})
+        finally:
+            logger.remove(handler_id)
+            session.close()
+
+        assert extras
+        assert all(extra.get("run_id") == "enrich-1" for extra in extras)
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from clients.async_api_client import AsyncNationalizeClient
+from clients.exceptions import NationalizeApiError
+from clients.single_flight import (
+    AsyncSingleFlight,
+    AsyncSingleFlightNationalizeClient,
+    SingleFlight,
+    SingleFlightNationalizeClient,
+)
+from constants.error_constants import ERROR_REQUEST_LIMIT_REACHED
+from helpers.test_helpers import assert_common_success_response_json
+from test_data.test_data import generate_fake_last_names, get_fake_data_pool
+
+
+def lookup_concurrently(predict, names):
+    """
+    Looks up every name from its own thread, all released at once.
+    """
+    barrier = threading.Barrier(len(names))
+
+    def lookup(name):
+        barrier.wait()
+        try:
+            return predict(name)
+        except NationalizeApiError as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        return list(executor.map(lookup, names))
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_call(self):
+        """
+        Verifies that callers arriving while a call is in flight get its result without calling again.
+        """
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(timeout=5)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(single_flight.do, "key", fetch) for _ in range(8)]
+            while single_flight.calls < 8:
+                time.sleep(0.001)
+            release.set()
+            results = [future.result(timeout=5) for future in futures]
+
+        assert results == ["result"] * 8
+        assert len(calls) == 1
+        assert single_flight.stats == {"calls": 8, "saved": 7, "saved_rate": 7 / 8}
+        assert single_flight.do("key", lambda: "again") == "again"
+
+    @pytest.mark.smoke
+    @pytest.mark.parametrize("local_mock_server", [{"latency": 0.2}], indirect=True)
+    def test_spellings_of_a_name_share_one_request(self, local_mock_server):
+        """
+        Verifies that concurrent lookups of one normalized name send one request and keep their own spelling.
+        """
+        name = generate_fake_last_names(num_last_names=1)[0]
+        names = [name, name.upper(), f" {name} "] * 4
+        client = SingleFlightNationalizeClient(base_url=local_mock_server.url)
+
+        predictions = lookup_concurrently(client.predict, names)
+
+        assert local_mock_server.requests == 1
+        assert [prediction.name for prediction in predictions] == names
+        assert_common_success_response_json(data=predictions[0], name=name)
+        assert client.stats["saved"] == len(names) - 1
+
+    @pytest.mark.parametrize("local_mock_server", [{"latency": 0.2, "limit": 0}], indirect=True)
+    def test_error_reaches_every_waiter(self, local_mock_server):
+        """
+        Verifies that the error response of the shared request is raised to every caller.
+        """
+        client = SingleFlightNationalizeClient(base_url=local_mock_server.url)
+
+        errors = lookup_concurrently(client.predict, ["Smith"] * 6)
+
+        assert local_mock_server.requests == 1
+        assert all(isinstance(e, NationalizeApiError) for e in errors)
+        assert {e.error for e in errors} == {ERROR_REQUEST_LIMIT_REACHED}
+
+    @pytest.mark.parametrize("local_mock_server", [{"latency": 0.2}], indirect=True)
+    def test_skewed_async_traffic_is_deduplicated(self, local_mock_server):
+        """
+        Verifies that Zipf-like traffic from asyncio tasks spends one request per distinct name in flight.
+        """
+        distinct = generate_fake_last_names(num_last_names=10)
+        weights = [1 / rank for rank in range(1, len(distinct) + 1)]
+        names = get_fake_data_pool().random.choices(distinct, weights=weights, k=200)
+
+        async def run():
+            async with AsyncNationalizeClient(base_url=local_mock_server.url) as client:
+                single_flight_client = AsyncSingleFlightNationalizeClient(client)
+                predictions = await asyncio.gather(*(single_flight_client.predict(name) for name in names))
+                return single_flight_client, predictions
+
+        single_flight_client, predictions = asyncio.run(run())
+
+        assert [prediction.name for prediction in predictions] == names
+        assert local_mock_server.requests == len(set(names))
+        assert single_flight_client.stats["saved"] == len(names) - len(set(names))
+
+    def test_cancelled_waiter_does_not_cancel_the_call(self):
+        """
+        Verifies that cancelling the first caller leaves the shared call running for the others.
+        """
+        single_flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def run():
+            first = asyncio.ensure_future(single_flight.do("key", fetch))
+            second = asyncio.ensure_future(single_flight.do("key", fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == "result"
+        assert single_flight.saved == 1
@@ -0,0 +1,49 @@
+import re
+from pathlib import Path
+
+import requests
+
+from helpers.quota_budget import QuotaBudget
+from settings import url, max_batch_size
+from test_data.test_data import generate_fake_last_name, generate_fake_last_names
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestXdistSharding:
+
+    def test_rate_limit_tests_run_on_one_worker(self, pytester):
+        """
+        Verifies that in a run with two xdist workers every rate_limit test reports the same worker.
+        """
+        result = pytester.runpytest_subprocess(
+            "-n", "2", "-v", "-p", "no:faker", "-p", "no:anyio", "-o", "addopts=", "-p", "no:cacheprovider",
+            "--rootdir", str(ROOT), "-c", str(ROOT / "pytest.ini"),
+            str(ROOT / "tests" / "test_mock_quota_store.py"), str(ROOT / "tests" / "test_prediction_store.py"),
+        )
+
+        # xdist -v lines look like "[gw0] [ 27%] PASSED path::test@rate_limit"
+        line = re.compile(r"\[(gw\d+)\] \[\s*\d+%\] \w+ (\S+@rate_limit)")
+        rate_limit_workers = {}
+        for match in filter(None, map(line.match, result.outlines)):
+            rate_limit_workers[match.group(2)] = match.group(1)
+        assert result.ret == 0
+        assert len(rate_limit_workers) == 4
+        assert len(set(rate_limit_workers.values())) == 1
+
+    def test_quota_budget_is_split_between_workers(self, mock_responses, monkeypatch):
+        """
+        Verifies that every worker gets an even share of the budget and only successful names are charged.
+        """
+        monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "4")
+        budget = QuotaBudget(total=50)
+        session = requests.Session()
+        session.hooks["response"] = [budget.charge]
+
+        session.get(url=url, params={"name": generate_fake_last_name()})
+        session.get(url=url, params={"name[]": generate_fake_last_names(num_last_names=max_batch_size)})
+        session.get(url=url)
+
+        assert budget.share == 12
+        assert budget.used == max_batch_size + 1
+        assert budget.left == 1